@@ -1,14 +1,46 @@
+import time # Para cálculo de FPS e medição da inicialização
+STARTED = time.perf_counter() # Antes dos imports pesados: origem dos tempos de --startup-time
 import cv2
 import numpy as np
 import tkinter as tk
-from tkinter import Scale, Label, Button, Frame, StringVar, OptionMenu, IntVar, Checkbutton, ttk, colorchooser, messagebox
-from PIL import Image, ImageTk
-import time # Para cálculo de FPS
+from tkinter import Scale, Label, Button, Frame, StringVar, OptionMenu, IntVar, Checkbutton, ttk, colorchooser, messagebox, filedialog
+from capture import (CaptureSettings, FrameGrabber, SourceOpener, add_capture_arguments, capture_mode, describe_mode,
+                     file_frame_interval, open_source, settings_from_args)
+from pipeline import ProcessingPipeline
+from roi_tracking import RoiDetector
+from change_gate import ChangeGate
+from tuning import FrozenFrameProcessor
+from tracker import ObjectTracker
+from display import FrameDisplay
+from profiling import NULL_TIMER, StageProfiler, StartupTimer
+from quality import QualityController
+from presets import BUILTIN_NAMES, BUILTIN_PRESETS, PresetLibrary, read_presets
+from color_engine import ColorFilterEngine, ColorRange, FilterParams
 import traceback # Para impressão detalhada de erros
+import argparse
+import functools
+import os
+
+# Opções de resolução de análise (fração da resolução da câmera)
+PROCESS_SCALES = {"1": 1.0, "1/2": 0.5, "1/4": 0.25}
+# Métodos de análise da máscara (Componentes é vetorizado, mas não gera contornos)
+ANALYSIS_MODES = {"Contornos": "contours", "Componentes": "components"}
+# Modo pedido à câmera (Padrão = o que o driver escolher)
+CAMERA_RESOLUTIONS = ("Padrão", "640x480", "1280x720", "1920x1080")
+CAMERA_FPS = ("Padrão", "15", "30", "60")
+CAMERA_FORMATS = ("Padrão", "MJPG", "YUYV")
+CAMERA_BUFFERS = ("Padrão", "1", "2", "4")
+# FPS alvo do controle adaptativo de qualidade (0 = desligado)
+ADAPTIVE_TARGETS = {"Desligado": 0, "15 FPS": 15, "25 FPS": 25, "30 FPS": 30}
+# Variáveis da GUI guardadas por câmera no modo multicâmera (color_space primeiro: ele redefine os sliders)
+CAMERA_SETTINGS = ("color_space", "ch1_min_var", "ch1_max_var", "ch2_min_var", "ch2_max_var", "ch3_min_var",
+                   "ch3_max_var", "erosion_size", "dilation_size", "blur_size", "min_contour_area",
+                   "multi_color_mode", "process_scale", "analysis_mode", "current_color_name")
 
 class ColorFilterApp:
-    def __init__(self, root):
+    def __init__(self, root, sources=None, startup=None, capture_settings=None):
         self.root = root
+        self.startup = startup # StartupTimer no modo --startup-time
         self.root.title("Filtro de Cores Avançado com OpenCV (Estilo Simples)")
         # Iniciar maximizado para melhor visualização
         try:
@@ -21,23 +53,27 @@ class ColorFilterApp:
 
         self.root.protocol("WM_DELETE_WINDOW", self.quit) # Lidar com o botão de fechar janela
 
-        # --- Inicialização da Câmera (Simplificada como no exemplo) ---
-        self.camera_index = 0 # Manter o índice, mas inicializar diretamente
-        # Tentar com CAP_DSHOW primeiro, fallback se necessário
-        self.cap = cv2.VideoCapture(self.camera_index, cv2.CAP_DSHOW)
-        if not self.cap.isOpened():
-             print(f"Aviso: Falha ao abrir câmera {self.camera_index} com CAP_DSHOW, tentando sem...")
-             self.cap = cv2.VideoCapture(self.camera_index) # Fallback
-             if not self.cap.isOpened():
-                  messagebox.showerror("Erro de Câmera", f"Não foi possível abrir a câmera com índice {self.camera_index}.")
-                  self.root.destroy()
-                  return
-
-        print(f"Câmera {self.camera_index} iniciada.")
-        # Obter a resolução real inicial para referência de dimensionamento da exibição, se necessário
-        # actual_width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
-        # actual_height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
-        # print(f"Resolução da câmera: {int(actual_width)}x{int(actual_height)}")
+        # --- Fonte(s) de Vídeo ---
+        # Índices de câmera ou arquivos de vídeo (para testes); padrão: câmera 0.
+        # São abertas em background depois que a janela aparece (ver `poll_cameras`)
+        self.sources = list(sources or ["0"])
+        self.cap = None
+        self.grabber = None
+        self.stream = None # Multicâmera: CameraStream exibida e editada pelos controles
+        self.failed_sources = [] # Fontes que não abriram (botão "Tentar Novamente")
+        self.capture_settings = capture_settings or CaptureSettings() # Modo pedido às câmeras
+        self.capture_modes = {} # fonte -> modo negociado (`capture.capture_mode`)
+
+        # Biblioteca de presets em disco (lida sob demanda)
+        self.library = PresetLibrary()
+        # Motor de detecção (independente da GUI), compartilhado por todos os modos
+        self.engine = ColorFilterEngine()
+        self.multicam = None # MultiCameraProcessor com mais de uma fonte
+        self.camera_settings = {} # nome da câmera -> valores de CAMERA_SETTINGS
+        if len(self.sources) > 1:
+            from multicam import MultiCameraProcessor # Só carregado com mais de uma fonte
+            # Cada câmera tem sua thread de captura; o pool de workers é compartilhado, em rodízio
+            self.multicam = MultiCameraProcessor(self.engine).start()
 
 
         # --- Variáveis Tkinter ---
@@ -58,8 +94,15 @@ class ColorFilterApp:
         self.show_bounding_boxes = IntVar(value=1) # Ligar por padrão é geralmente útil
         self.show_object_center = IntVar(value=1) # Ligar por padrão
         self.color_space = StringVar(value="HSV") # Ainda útil para a lógica de processamento
-        # self.camera_resolution = StringVar(value="640x480") # Controle de resolução removido por simplicidade
+        settings = self.capture_settings
+        self.camera_resolution = StringVar(value=f"{settings.width}x{settings.height}" if settings.width > 0 else "Padrão")
+        self.camera_fps = StringVar(value=f"{settings.fps:g}" if settings.fps > 0 else "Padrão")
+        self.camera_format = StringVar(value=settings.fourcc or "Padrão")
+        self.camera_buffer = StringVar(value=str(settings.buffer_size) if settings.buffer_size > 0 else "Padrão")
+        self.camera_mode = StringVar(value="Modo: (abrindo)") # Modo negociado com a câmera exibida
         self.multi_color_mode = IntVar(value=0)
+        self.process_scale = StringVar(value="1") # Resolução de análise (1, 1/2, 1/4)
+        self.analysis_mode = StringVar(value="Contornos") # Contornos ou Componentes (vetorizado)
 
         # Gerenciamento Multi-Cor
         self.color_presets = []
@@ -70,17 +113,60 @@ class ColorFilterApp:
         # Usar um tamanho fixo ou calcular com base em uma largura desejada
         self.display_width = 480
         # Calcularemos a altura com base na proporção no update
+        self.poll_delay = 5 # ms entre verificações quando não há frame novo
         self.fps = 0
         self.last_update_time = time.time()
         self.frame_count = 0
 
-        # Atributos para armazenar referências PhotoImage (crucial!)
-        self.original_tk = None
-        self.mask_tk = None
-        self.result_tk = None
+        # Painéis de imagem (PhotoImages persistentes, criados em setup_gui)
+        self.display = None
+        self.show_mask_panel = IntVar(value=1)
+        self.show_result_panel = IntVar(value=1)
+
+        # Pool opcional de workers (modo de câmera única)
+        self.parallel_mode = IntVar(value=0)
+        self.pipeline = None
+        self.roi_mode = IntVar(value=0) # Processar só regiões ao redor dos objetos anteriores
+        self.roi_detector = RoiDetector(self.engine)
+        self.change_gate_mode = IntVar(value=0) # Reaproveitar detecções quando o quadro não muda
+        self.change_gate = ChangeGate(self.engine)
+        self.tiled_mode = IntVar(value=0) # Blocos sobrepostos com memória limitada (4K/8K)
+        self.tiled = None # TiledProcessor, criado ao ativar o modo
+        self.freeze_mode = IntVar(value=0) # Ajuste fino sobre um quadro parado
+        self.frozen = FrozenFrameProcessor(self.engine)
+        self.frozen_params = None
+        self.last_packet = None
+        self.adaptive_target = StringVar(value="Desligado") # Reduz escala/blur, usa ROI e pula quadros se preciso
+        self.quality = None # QualityController ativo
+        self.tracking_mode = IntVar(value=0) # IDs estáveis entre frames
+        self.tracker = ObjectTracker()
+        self.detection_log = None # AsyncSink ativo ao registrar detecções em arquivo
+        self.log_offsets = {} # Multicâmera: câmera -> (id da fonte, deslocamento dos rótulos) no log
+        self.recorder = None # VideoRecorder ativo
+        self.record_annotated = IntVar(value=1) # Streams gravados: original anotado, máscara, resultado filtrado
+        self.record_mask = IntVar(value=0)
+        self.record_result = IntVar(value=0)
+        self.profiling_mode = IntVar(value=0) # Tempos por etapa (p50/p95/p99) sobre o painel original
+        self.profiler = None
+        self.profile_overlay = None # Linhas do overlay, recalculadas a cada `profile_refresh` s
+        self.profile_refresh = 0.5
+        self.last_profile_refresh = 0.0
+        self.last_allocations = 0
+        self.last_shown_time = None
 
         # --- Configuração da GUI ---
         self.setup_gui() # Este método permanece basicamente o mesmo
+        self.root.update_idletasks() # Desenha a janela antes de negociar com as câmeras
+        if self.startup is not None:
+            self.startup.mark("window")
+
+        # Câmeras abrem em background, com novas tentativas; o andamento aparece na barra de status
+        self.opener = SourceOpener(self.open_camera)
+        for source in self.sources:
+            self.opener.open(source)
+
+        # Presets salvos são lidos depois que a janela aparece
+        self.root.after_idle(self.load_library)
 
         # --- Iniciar Loop de Atualização ---
         self.update()
@@ -97,6 +183,15 @@ class ColorFilterApp:
         control_panel.pack(side=tk.RIGHT, padx=10, pady=10, fill=tk.Y)
         control_panel.pack_propagate(False) # Impede que o painel de controle redimensione
 
+        if self.multicam is not None:
+            # Câmera exibida; os controles passam a editar os parâmetros dela
+            camera_frame = Frame(control_panel)
+            camera_frame.pack(fill=tk.X, pady=(0, 5))
+            Label(camera_frame, text="Câmera:", font=("Arial", 11, "bold")).pack(side=tk.LEFT)
+            self.camera_var = StringVar(value=self.sources[0])
+            OptionMenu(camera_frame, self.camera_var, *self.sources,
+                       command=self.select_camera).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         control_notebook = ttk.Notebook(control_panel)
         control_notebook.pack(fill=tk.BOTH, expand=True)
 
@@ -129,6 +224,9 @@ class ColorFilterApp:
         image_frame.grid_rowconfigure(3, weight=1)
         image_frame.grid_columnconfigure(0, weight=1)
         image_frame.grid_columnconfigure(1, weight=1)
+        self.display = FrameDisplay(
+            {"original": self.original_label, "mask": self.mask_label, "result": self.result_label},
+            width=self.display_width)
 
 
         # Barra de status (Inferior)
@@ -138,6 +236,8 @@ class ColorFilterApp:
         self.status_label.pack(side=tk.LEFT, padx=5)
         self.fps_label = Label(status_frame, text="FPS: 0", anchor=tk.E)
         self.fps_label.pack(side=tk.RIGHT, padx=5)
+        # Só aparece quando alguma fonte não abriu
+        self.retry_button = Button(status_frame, text="Tentar Novamente", command=self.retry_cameras)
 
         # --- Popular Aba Básica ---
         Label(basic_tab, text="Ajuste os Valores:", font=("Arial", 11, "bold")).pack(pady=(10, 5), anchor=tk.W)
@@ -184,6 +284,18 @@ class ColorFilterApp:
         color_spaces = ["HSV", "BGR", "RGB", "Lab", "YCrCb"] # Adicionado BGR
         OptionMenu(space_frame, self.color_space, *color_spaces, command=self.change_color_space).pack(side=tk.LEFT, fill=tk.X, expand=True)
 
+        # Escala de Processamento
+        scale_frame = Frame(advanced_tab)
+        scale_frame.pack(pady=5, fill=tk.X, padx=5)
+        Label(scale_frame, text="Escala Análise:", width=12, anchor=tk.W).pack(side=tk.LEFT)
+        OptionMenu(scale_frame, self.process_scale, *PROCESS_SCALES).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        # Método de Análise
+        analysis_frame = Frame(advanced_tab)
+        analysis_frame.pack(pady=5, fill=tk.X, padx=5)
+        Label(analysis_frame, text="Análise:", width=12, anchor=tk.W).pack(side=tk.LEFT)
+        OptionMenu(analysis_frame, self.analysis_mode, *ANALYSIS_MODES).pack(side=tk.LEFT, fill=tk.X, expand=True)
+
         # Morfologia
         morph_frame = Frame(advanced_tab)
         morph_frame.pack(pady=5, fill=tk.X, padx=5)
@@ -214,13 +326,66 @@ class ColorFilterApp:
         Checkbutton(viz_frame, text="Mostrar Contornos", variable=self.show_contours).pack(anchor=tk.W)
         Checkbutton(viz_frame, text="Mostrar Caixas Delimitadoras", variable=self.show_bounding_boxes).pack(anchor=tk.W)
         Checkbutton(viz_frame, text="Mostrar Centro dos Objetos", variable=self.show_object_center).pack(anchor=tk.W)
-
-        # Opções da Câmera - Removido por simplicidade com base no exemplo
-        # Label(advanced_tab, text="Opções da Câmera:", font=("Arial", 11, "bold")).pack(pady=(15, 5), anchor=tk.W)
-        # cam_frame = Frame(advanced_tab, padx=5)
-        # cam_frame.pack(pady=5, fill=tk.X)
-        # # Dropdown de resolução removido
-        # # Botão de alternar câmera removido
+        Checkbutton(viz_frame, text="Rastrear Objetos (IDs)", variable=self.tracking_mode,
+                    command=self.tracker.reset).pack(anchor=tk.W)
+        Checkbutton(viz_frame, text="Painel Máscara", variable=self.show_mask_panel,
+                    command=lambda: self.toggle_panel(self.mask_label, self.show_mask_panel)).pack(anchor=tk.W)
+        Checkbutton(viz_frame, text="Painel Resultado", variable=self.show_result_panel,
+                    command=lambda: self.toggle_panel(self.result_label, self.show_result_panel)).pack(anchor=tk.W)
+
+        # Desempenho
+        Label(advanced_tab, text="Desempenho:", font=("Arial", 11, "bold")).pack(pady=(15, 5), anchor=tk.W)
+        perf_frame = Frame(advanced_tab, padx=5)
+        perf_frame.pack(pady=5, fill=tk.X)
+        Checkbutton(perf_frame, text="Processamento Paralelo (multi-core)", variable=self.parallel_mode,
+                    command=self.toggle_parallel_mode).pack(anchor=tk.W)
+        Checkbutton(perf_frame, text="Rastreamento por ROI (só modo sequencial)", variable=self.roi_mode,
+                    command=self.roi_detector.reset).pack(anchor=tk.W)
+        Checkbutton(perf_frame, text="Ignorar Quadros sem Mudança (só modo sequencial)", variable=self.change_gate_mode,
+                    command=self.change_gate.reset).pack(anchor=tk.W)
+        Checkbutton(perf_frame, text="Processamento em Blocos (4K/8K, só modo sequencial)",
+                    variable=self.tiled_mode).pack(anchor=tk.W)
+        adaptive_frame = Frame(perf_frame)
+        adaptive_frame.pack(fill=tk.X, anchor=tk.W)
+        Label(adaptive_frame, text="Qualidade Adaptativa:").pack(side=tk.LEFT)
+        OptionMenu(adaptive_frame, self.adaptive_target, *ADAPTIVE_TARGETS,
+                   command=self.toggle_adaptive_quality).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        Checkbutton(perf_frame, text="Congelar Quadro (ajuste fino)", variable=self.freeze_mode,
+                    command=self.toggle_freeze).pack(anchor=tk.W)
+        Checkbutton(perf_frame, text="Perfil por Etapa (p50/p95/p99 ms)", variable=self.profiling_mode,
+                    command=self.toggle_profiling).pack(anchor=tk.W)
+
+        # Saída
+        Label(advanced_tab, text="Saída:", font=("Arial", 11, "bold")).pack(pady=(15, 5), anchor=tk.W)
+        output_frame = Frame(advanced_tab, padx=5)
+        output_frame.pack(pady=5, fill=tk.X)
+        self.log_button = Button(output_frame, text="Registrar Detecções...", command=self.toggle_detection_log)
+        self.log_button.pack(side=tk.LEFT, padx=2)
+        Button(output_frame, text="Salvar Estatísticas...", command=self.save_profile_stats).pack(side=tk.LEFT, padx=2)
+        record_frame = Frame(advanced_tab, padx=5)
+        record_frame.pack(pady=5, fill=tk.X)
+        self.record_button = Button(record_frame, text="Gravar Vídeo...", command=self.toggle_recording)
+        self.record_button.pack(side=tk.LEFT, padx=2)
+        Checkbutton(record_frame, text="Anotado", variable=self.record_annotated).pack(side=tk.LEFT)
+        Checkbutton(record_frame, text="Máscara", variable=self.record_mask).pack(side=tk.LEFT)
+        Checkbutton(record_frame, text="Resultado", variable=self.record_result).pack(side=tk.LEFT)
+
+        # Opções da Câmera (aplicadas ao reabrir; o driver pode escolher o modo suportado mais próximo)
+        Label(advanced_tab, text="Opções da Câmera:", font=("Arial", 11, "bold")).pack(pady=(15, 5), anchor=tk.W)
+        cam_frame = Frame(advanced_tab, padx=5)
+        cam_frame.pack(pady=5, fill=tk.X)
+        for text, var, options in (("Resolução:", self.camera_resolution, CAMERA_RESOLUTIONS),
+                                   ("FPS:", self.camera_fps, CAMERA_FPS),
+                                   ("Formato:", self.camera_format, CAMERA_FORMATS),
+                                   ("Buffer:", self.camera_buffer, CAMERA_BUFFERS)):
+            row = Frame(cam_frame)
+            row.pack(fill=tk.X, pady=1)
+            Label(row, text=text, width=12, anchor=tk.W).pack(side=tk.LEFT)
+            if var.get() not in options:
+                options = (var.get(),) + options # Valor vindo da linha de comando
+            OptionMenu(row, var, *options).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        Button(cam_frame, text="Aplicar e Reabrir Câmera", command=self.apply_camera_settings).pack(anchor=tk.W, pady=(4, 0))
+        Label(cam_frame, textvariable=self.camera_mode, anchor=tk.W, justify=tk.LEFT, wraplength=360).pack(fill=tk.X)
 
 
         # --- Popular Aba Multi-Cor ---
@@ -254,6 +419,10 @@ class ColorFilterApp:
         color_manage_frame.pack(fill=tk.X, pady=10)
         Button(color_manage_frame, text="Adicionar Cor Atual", command=self.add_current_color_to_multi).pack(side=tk.LEFT, padx=5)
         Button(color_manage_frame, text="Limpar Todas", command=self.clear_all_colors).pack(side=tk.LEFT, padx=5)
+        library_frame = Frame(multi_color_tab)
+        library_frame.pack(fill=tk.X, pady=(0, 10))
+        Button(library_frame, text="Importar...", command=self.import_presets).pack(side=tk.LEFT, padx=5)
+        Button(library_frame, text="Exportar...", command=self.export_presets).pack(side=tk.LEFT, padx=5)
 
         # Inicializar lista
         self.update_color_list()
@@ -322,28 +491,8 @@ class ColorFilterApp:
     # --- Certifique-se que load_color define o color_space correto antes de carregar valores ---
 
     def get_color_presets(self):
-        """Define presets HSV. Pode ser estendido para outros espaços."""
-        presets = {
-            "vermelho": {"h_min": 0, "h_max": 10, "s_min": 100, "s_max": 255, "v_min": 70, "v_max": 255},
-            "vermelho_wrap": {"h_min": 170, "h_max": 179, "s_min": 100, "s_max": 255, "v_min": 70, "v_max": 255},
-            "verde": {"h_min": 40, "h_max": 85, "s_min": 50, "s_max": 255, "v_min": 50, "v_max": 255},
-            "azul": {"h_min": 95, "h_max": 130, "s_min": 80, "s_max": 255, "v_min": 50, "v_max": 255},
-            "amarelo": {"h_min": 20, "h_max": 35, "s_min": 100, "s_max": 255, "v_min": 100, "v_max": 255},
-            "laranja": {"h_min": 10, "h_max": 25, "s_min": 120, "s_max": 255, "v_min": 120, "v_max": 255},
-            "ciano": {"h_min": 85, "h_max": 100, "s_min": 100, "s_max": 255, "v_min": 100, "v_max": 255},
-            "roxo": {"h_min": 130, "h_max": 160, "s_min": 80, "s_max": 255, "v_min": 50, "v_max": 255},
-            "rosa": {"h_min": 160, "h_max": 175, "s_min": 80, "s_max": 255, "v_min": 100, "v_max": 255},
-            "marrom": {"h_min": 10, "h_max": 25, "s_min": 80, "s_max": 255, "v_min": 20, "v_max": 120},
-            "preto": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 255, "v_min": 0, "v_max": 40},
-            "cinza": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 50, "v_min": 40, "v_max": 180},
-            "branco": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 30, "v_min": 200, "v_max": 255},
-        }
-        name_map = {
-            "Vermelho": "vermelho", "Verde": "verde", "Azul": "azul", "Amarelo": "amarelo",
-            "Laranja": "laranja", "Ciano": "ciano", "Roxo": "roxo", "Rosa": "rosa",
-            "Marrom": "marrom", "Preto": "preto", "Cinza": "cinza", "Branco": "branco"
-        }
-        return presets, name_map
+        """Presets HSV embutidos e o mapa nome exibido -> chave (constantes de `presets`)."""
+        return BUILTIN_PRESETS, BUILTIN_NAMES
 
     def set_preset(self, color_key):
         """Define os sliders com base em uma chave de cor pré-definida."""
@@ -373,6 +522,7 @@ class ColorFilterApp:
                      if not any(c['name'] == wrap_color['name'] for c in self.color_presets):
                          self.color_presets.append(wrap_color)
                          self.update_color_list()
+                         self.save_library()
                          self.update_status(f"Preset '{display_name}' aplicado. Adicionado range extra para vermelho.")
         else:
             self.update_status(f"Preset '{color_key}' não encontrado.")
@@ -463,6 +613,7 @@ class ColorFilterApp:
         }
         self.color_presets.append(current_color)
         self.update_color_list()
+        self.save_library()
         self.update_status(f"Cor '{name}' salva para modo Multi-Cor.")
         if not self.multi_color_mode.get():
             self.update_status(f"Cor '{name}' salva. Ative 'Modo Multi-Cor' para usá-la.")
@@ -474,6 +625,7 @@ class ColorFilterApp:
         if messagebox.askyesno("Limpar Tudo?", "Remover todas as cores salvas?"):
             self.color_presets = []
             self.update_color_list()
+            self.save_library()
             self.update_status("Lista Multi-Cor limpa.")
 
     def update_color_list(self):
@@ -553,8 +705,64 @@ class ColorFilterApp:
             if messagebox.askyesno("Remover Cor?", f"Remover '{name}'?"):
                 del self.color_presets[index]
                 self.update_color_list()
+                self.save_library()
                 self.update_status(f"Cor '{name}' removida.")
 
+    def load_library(self):
+        """Carrega os presets da biblioteca em disco na lista Multi-Cor (e nas câmeras ainda sem presets)."""
+        try:
+            saved = [dict(c) for c in self.library.load()]
+        except (OSError, ValueError) as e:
+            self.update_status(f"Erro ao ler a biblioteca de presets: {e}")
+            return
+        # Cores adicionadas antes da leitura terminar são mantidas
+        names = {c["name"] for c in self.color_presets}
+        self.color_presets[:0] = [c for c in saved if c["name"] not in names]
+        if self.multicam:
+            for stream in self.multicam.streams:
+                if stream is not self.stream and not stream.presets:
+                    stream.presets = [dict(c) for c in saved]
+        self.update_color_list()
+        if saved:
+            self.update_status(f"{len(saved)} presets carregados de '{self.library.path}'.")
+
+    def save_library(self):
+        """Grava a lista Multi-Cor na biblioteca (só com uma câmera: no modo multicâmera cada uma tem a sua)."""
+        if self.multicam or not self.library.loaded:
+            return
+        try:
+            self.library.replace(self.color_presets)
+            self.library.save()
+        except OSError as e:
+            self.update_status(f"Erro ao salvar a biblioteca de presets: {e}")
+
+    def import_presets(self):
+        """Acrescenta à lista Multi-Cor os presets de um JSON (nomes repetidos são substituídos)."""
+        path = filedialog.askopenfilename(title="Importar presets", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            imported = read_presets(path)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro", f"Não foi possível importar '{path}': {e}")
+            return
+        names = {c.get("name") for c in imported}
+        self.color_presets = [c for c in self.color_presets if c["name"] not in names] + imported
+        self.update_color_list()
+        self.save_library()
+        self.update_status(f"{len(imported)} presets importados de '{os.path.basename(path)}'.")
+
+    def export_presets(self):
+        """Grava a lista Multi-Cor em um JSON (aceito por Importar e pelo --presets do batch/multicam)."""
+        path = filedialog.asksaveasfilename(title="Exportar presets", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.library.export(path, self.color_presets)
+            self.update_status(f"{len(self.color_presets)} presets exportados para '{os.path.basename(path)}'.")
+        except OSError as e:
+            messagebox.showerror("Erro", f"Não foi possível exportar '{path}': {e}")
+
     def toggle_multi_color_mode(self):
         if self.multi_color_mode.get():
             status = f"Modo Multi-Cor ativado ({len(self.color_presets)} cores)."
@@ -604,189 +812,477 @@ class ColorFilterApp:
 
     # Métodos de resolução e alternância de câmera removidos por simplicidade
 
+    def get_filter_params(self):
+        """Cria um snapshot imutável dos parâmetros atuais da GUI para o motor."""
+        space = self.color_space.get()
+        if self.multi_color_mode.get() and self.color_presets:
+            ranges = tuple(ColorRange.from_preset(c) for c in self.color_presets)
+        else:
+            ranges = (ColorRange(
+                lower=(self.ch1_min_var.get(), self.ch2_min_var.get(), self.ch3_min_var.get()),
+                upper=(self.ch1_max_var.get(), self.ch2_max_var.get(), self.ch3_max_var.get()),
+                space=space, name=self.current_color_name.get()),)
+        return FilterParams(
+            ranges=ranges, color_space=space,
+            blur_size=self.blur_size.get(),
+            erosion_size=self.erosion_size.get(),
+            dilation_size=self.dilation_size.get(),
+            min_contour_area=self.min_contour_area.get(),
+            process_scale=PROCESS_SCALES.get(self.process_scale.get(), 1.0),
+            analysis=ANALYSIS_MODES.get(self.analysis_mode.get(), "contours"))
+
+    def poll_cameras(self):
+        """Conecta as fontes que o `SourceOpener` terminou de abrir (na thread da GUI)."""
+        for source, cap, frame_interval, elapsed in self.opener.poll():
+            if cap is None:
+                print(f"Erro: Não foi possível abrir a fonte '{source}'.")
+                self.failed_sources.append(source)
+                continue
+            mode = self.capture_modes.get(source)
+            print(f"Fonte {source} iniciada ({elapsed:.2f} s): {describe_mode(mode) if mode else '?'}")
+            if self.startup is not None:
+                self.startup.mark("camera_open")
+            if self.multicam is not None:
+                from multicam import CameraStream
+                # Câmeras que abrem depois da leitura da biblioteca começam com os presets dela
+                presets = [dict(c) for c in self.library.presets] if self.library.loaded else ()
+                stream = self.multicam.add(CameraStream(source, cap, presets=presets, frame_interval=frame_interval))
+                if self.stream is None:
+                    # Primeira câmera aberta é a exibida
+                    self.stream = stream
+                    self.cap, self.grabber = stream.cap, stream.grabber
+                    self.camera_var.set(source)
+                    self.show_camera_mode(source)
+            else:
+                self.cap = cap
+                # Leitura da câmera em thread própria (buffer só com o frame mais recente)
+                self.grabber = FrameGrabber(cap, frame_interval=frame_interval).start()
+                self.show_camera_mode(source)
+        if self.failed_sources and not self.opener.busy:
+            self.retry_button.pack(side=tk.RIGHT, padx=5)
+
+    def opening_status(self):
+        """Texto da barra de status enquanto nenhuma câmera está aberta."""
+        if not self.opener.busy and self.failed_sources:
+            return f"Erro: Não foi possível abrir {', '.join(self.failed_sources)}. Verifique a câmera e clique em Tentar Novamente."
+        states = ", ".join(f"{source} ({self.opener.state.get(source, 'aguardando')})" for source in self.sources)
+        return f"Abrindo câmera: {states}..."
+
+    def retry_cameras(self):
+        """Tenta abrir de novo as fontes que falharam."""
+        self.retry_button.pack_forget()
+        sources, self.failed_sources = self.failed_sources, []
+        for source in sources:
+            self.opener.open(source)
+        self.update_status(f"Abrindo câmera: {', '.join(sources)}...")
+
+    def finish_startup(self):
+        """Modo --startup-time: registra o primeiro quadro exibido, imprime as fases e encerra."""
+        self.startup.mark("first_frame")
+        print("Tempos de inicialização (desde o início dos imports):")
+        for line in self.startup.report():
+            print("  " + line)
+        self.root.after(0, self.quit)
+
+    def open_camera(self, source):
+        """Abre a fonte com o modo pedido em `capture_settings` (roda na thread do `SourceOpener`); retorna (cap, intervalo).
+
+        Arquivos são reproduzidos no ritmo original, como uma câmera ao vivo. Retorna (None, 0) se falhar.
+        """
+        cap, is_file = open_source(source, self.capture_settings)
+        if not cap.isOpened():
+            return None, 0.0
+        # Lido aqui, antes de a thread de captura começar a usar o cap
+        self.capture_modes[source] = dict(capture_mode(cap), is_file=is_file)
+        return cap, (file_frame_interval(cap, True) if is_file else 0.0)
+
+    def show_camera_mode(self, source):
+        """Mostra o modo negociado da fonte exibida (e o que o driver não aceitou do pedido)."""
+        mode = self.capture_modes.get(source)
+        if mode is None:
+            return
+        settings = None if mode["is_file"] else self.capture_settings
+        self.camera_mode.set(f"Modo: {describe_mode(mode, settings)}")
+
+    def get_capture_settings(self):
+        """`CaptureSettings` a partir das opções da câmera na GUI."""
+        resolution, fps = self.camera_resolution.get(), self.camera_fps.get()
+        width, height = (int(v) for v in resolution.split("x")) if resolution != "Padrão" else (0, 0)
+        fourcc = self.camera_format.get()
+        buffer_size = self.camera_buffer.get()
+        return CaptureSettings(width=width, height=height, fps=float(fps) if fps != "Padrão" else 0.0,
+                               fourcc=fourcc if fourcc != "Padrão" else "",
+                               buffer_size=int(buffer_size) if buffer_size != "Padrão" else 0)
+
+    def apply_camera_settings(self):
+        """Reabre a câmera (em background) pedindo a resolução, o FPS, o formato e o buffer escolhidos."""
+        if self.multicam is not None:
+            self.update_status("No modo multicâmera o modo das câmeras vem da linha de comando (--width, --fps, --fourcc...).", error=True)
+            return
+        if self.cap is None:
+            self.update_status("Aguarde a câmera abrir para mudar o modo.")
+            return
+        self.capture_settings = self.get_capture_settings()
+        self.grabber.stop()
+        self.cap.release()
+        self.cap = self.grabber = None
+        # Estado que depende da sequência de frames (e da resolução) da fonte anterior
+        self.tracker.reset()
+        self.roi_detector.reset()
+        self.change_gate.reset()
+        if self.freeze_mode.get():
+            self.freeze_mode.set(0)
+            self.toggle_freeze()
+        self.camera_mode.set("Modo: (abrindo)")
+        self.opener.open(self.sources[0])
+
     def update(self):
         """Loop principal: Lê o frame, processa e atualiza a exibição (Estilo Exemplo Simples)."""
-        if not self.cap or not self.cap.isOpened():
+        self.poll_cameras()
+        if self.cap is None:
+            # Nenhuma câmera aberta ainda: mostrar o andamento e verificar de novo em seguida
+            self.update_status(self.opening_status(), error=not self.opener.busy)
+            self.root.after(50 if self.opener.busy else 500, self.update)
+            return
+        if not self.cap.isOpened():
             self.update_status("Erro: Câmera indisponível.", error=True)
             self.root.after(1000, self.update) # Tentar novamente
             return
 
-        ret, frame = self.cap.read()
-
-        if not ret or frame is None:
+        # No modo multicâmera os frames são retirados pelo escalonador
+        packet = self.grabber.read(timeout=0) if self.multicam is None else None # Não bloquear a thread da GUI
+        if packet is None and self.grabber.failed_reads:
             self.update_status("Erro ao ler frame.", error=True)
-            self.root.after(100, self.update) # Tentar novamente em breve
-            return
+        timer = self.profiler.frame() if self.profiler is not None else NULL_TIMER
+        if packet is not None:
+            timer.add("capture", self.grabber.read_time)
 
-        # --- Processamento do Frame (Manter lógica avançada) ---
+        # --- Processamento do Frame (delegado ao motor sem GUI) ---
+        shown = False
+        quality = self.quality
         try:
-            process_start_time = time.time()
-            result_frame_for_drawing = frame.copy() # Manter para desenhar contornos etc.
-
-            # 1. Conversão do Espaço de Cor
-            space = self.color_space.get()
-            try:
-                if space == "HSV": converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-                elif space == "RGB": converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                elif space == "Lab": converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2Lab)
-                elif space == "YCrCb": converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2YCrCb)
-                elif space == "BGR": converted_frame = frame
-                else: converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV); space="HSV" # Fallback
-            except cv2.error as e:
-                 self.update_status(f"Erro conversão cor: {e}", error=True)
-                 converted_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV); space="HSV" # Fallback
-
-            # 2. Blur Opcional
-            blur_ksize = self.blur_size.get()
-            processed_frame = converted_frame # Começar com convertido (ou original se sem blur)
-            if blur_ksize > 0:
-                if blur_ksize % 2 == 0: blur_ksize += 1 # Deve ser ímpar
-                processed_frame = cv2.GaussianBlur(converted_frame, (blur_ksize, blur_ksize), 0)
-
-            # 3. Geração da Máscara (Lida com único/multi e wrap do vermelho)
-            final_mask = np.zeros(frame.shape[:2], dtype=np.uint8) # Começar com máscara vazia
-            # ... [ Lógica de geração da máscara permanece a mesma da versão avançada ] ...
-            if self.multi_color_mode.get() and self.color_presets:
-                # Modo Multi-Cor
-                for color_data in self.color_presets:
-                    if color_data['space'] == space: # Processar apenas se o espaço corresponder
-                        lower = np.array([color_data["ch1_min"], color_data["ch2_min"], color_data["ch3_min"]])
-                        upper = np.array([color_data["ch1_max"], color_data["ch2_max"], color_data["ch3_max"]])
-                        # Lidar com o Wrap do Vermelho especificamente para HSV
-                        if space == "HSV" and lower[0] > upper[0]:
-                             # 0 até Máx Matiz
-                             lower1 = np.array([0, lower[1], lower[2]])
-                             upper1 = np.array([upper[0], upper[1], upper[2]])
-                             mask1 = cv2.inRange(processed_frame, lower1, upper1)
-                             # Mín Matiz até 179
-                             lower2 = np.array([lower[0], lower[1], lower[2]])
-                             upper2 = np.array([179, upper[1], upper[2]])
-                             mask2 = cv2.inRange(processed_frame, lower2, upper2)
-                             mask = cv2.bitwise_or(mask1, mask2)
-                        else:
-                             mask = cv2.inRange(processed_frame, lower, upper)
-                        final_mask = cv2.bitwise_or(final_mask, mask)
-                    # Adicionar lógica aqui se quiser que multi-cor funcione entre espaços diferentes simultaneamente (mais complexo)
-
-            else:
-                 # Modo Cor Única
-                lower = np.array([self.ch1_min_var.get(), self.ch2_min_var.get(), self.ch3_min_var.get()])
-                upper = np.array([self.ch1_max_var.get(), self.ch2_max_var.get(), self.ch3_max_var.get()])
-                if space == "HSV" and lower[0] > upper[0] : # Caso de wrap-around para Matiz
-                    lower1 = np.array([0, lower[1], lower[2]]); upper1 = np.array([upper[0], upper[1], upper[2]])
-                    mask1 = cv2.inRange(processed_frame, lower1, upper1)
-                    lower2 = np.array([lower[0], lower[1], lower[2]]); upper2 = np.array([179, upper[1], upper[2]])
-                    mask2 = cv2.inRange(processed_frame, lower2, upper2)
-                    final_mask = cv2.bitwise_or(mask1, mask2)
-                else: # Caso normal
-                    final_mask = cv2.inRange(processed_frame, lower, upper)
-
-            # 4. Operações Morfológicas
-            erode_ksize = self.erosion_size.get()
-            dilate_ksize = self.dilation_size.get()
-            if erode_ksize > 0:
-                erode_kernel = np.ones((erode_ksize, erode_ksize), np.uint8)
-                final_mask = cv2.erode(final_mask, erode_kernel, iterations=1)
-            if dilate_ksize > 0:
-                dilate_kernel = np.ones((dilate_ksize, dilate_ksize), np.uint8)
-                final_mask = cv2.dilate(final_mask, dilate_kernel, iterations=1) # Geralmente 1 iteração é suficiente após erode
-
-            # 5. Encontrar e Filtrar Contornos
-            contours, _ = cv2.findContours(final_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            min_area = self.min_contour_area.get()
-            detected_objects = 0
-            filtered_contours = []
-            if contours:
-                filtered_contours = [cnt for cnt in contours if cv2.contourArea(cnt) > min_area]
-                detected_objects = len(filtered_contours)
-
-                # 6. Desenhar Visualizações em result_frame_for_drawing
-                if filtered_contours:
-                    if self.show_contours.get():
-                        cv2.drawContours(result_frame_for_drawing, filtered_contours, -1, (0, 255, 0), 2) # Contornos verdes
-                    for cnt in filtered_contours:
-                        # Caixas Delimitadoras
-                        if self.show_bounding_boxes.get():
-                            x, y, w, h = cv2.boundingRect(cnt)
-                            cv2.rectangle(result_frame_for_drawing, (x, y), (x+w, y+h), (255, 0, 0), 2) # Caixas azuis
-                        # Centro do Objeto
-                        if self.show_object_center.get():
-                            M = cv2.moments(cnt)
-                            if M["m00"] != 0:
-                                cX = int(M["m10"] / M["m00"]); cY = int(M["m01"] / M["m00"])
-                                cv2.circle(result_frame_for_drawing, (cX, cY), 5, (0, 0, 255), -1) # Ponto central vermelho
-                                # cv2.putText(result_frame_for_drawing, f"({cX},{cY})", ...) # Texto opcional
-
-            # 7. Aplicar Máscara ao Frame Original para Visualização do Resultado
-            result_masked = cv2.bitwise_and(frame, frame, mask=final_mask)
-            process_time = time.time() - process_start_time
-
-            # --- Atualizar Imagens da GUI (Diretamente como no exemplo simples) ---
-            # Decidir qual frame mostrar como "Original" ('frame' bruto ou 'result_frame_for_drawing')
-            original_display_frame = result_frame_for_drawing # Mostrar frame com desenhos
-
-            # Converter cores para PIL/Tkinter
-            original_img_rgb = cv2.cvtColor(original_display_frame, cv2.COLOR_BGR2RGB)
-            mask_img_rgb = cv2.cvtColor(final_mask, cv2.COLOR_GRAY2RGB) # Máscara precisa de conversão para RGB para PIL
-            result_img_rgb = cv2.cvtColor(result_masked, cv2.COLOR_BGR2RGB)
-
-            # Calcular tamanho de exibição com base na proporção
-            h, w = original_img_rgb.shape[:2]
-            aspect_ratio = w / h
-            # Evitar divisão por zero se a altura for 0
-            display_height = int(self.display_width / aspect_ratio) if aspect_ratio > 0 else self.display_width
-            display_size = (self.display_width, display_height)
-
-            # Redimensionar imagens
-            original_img_resized = cv2.resize(original_img_rgb, display_size, interpolation=cv2.INTER_LINEAR)
-            mask_img_resized = cv2.resize(mask_img_rgb, display_size, interpolation=cv2.INTER_LINEAR)
-            result_img_resized = cv2.resize(result_img_rgb, display_size, interpolation=cv2.INTER_LINEAR)
-
-            # Converter para formato PIL
-            original_pil = Image.fromarray(original_img_resized)
-            mask_pil = Image.fromarray(mask_img_resized)
-            result_pil = Image.fromarray(result_img_resized)
-
-            # Converter para formato Tkinter (Armazenar nos atributos self!)
-            self.original_tk = ImageTk.PhotoImage(image=original_pil)
-            self.mask_tk = ImageTk.PhotoImage(image=mask_pil)
-            self.result_tk = ImageTk.PhotoImage(image=result_pil)
-
-            # Atualizar labels e manter referências
-            self.original_label.config(image=self.original_tk)
-            self.original_label.image = self.original_tk # Manter referência!
-            self.mask_label.config(image=self.mask_tk)
-            self.mask_label.image = self.mask_tk # Manter referência!
-            self.result_label.config(image=self.result_tk)
-            self.result_label.image = self.result_tk # Manter referência!
-
-
-            # --- Atualizar Status e FPS ---
-            self.frame_count += 1
-            now = time.time()
-            elapsed = now - self.last_update_time
-            if elapsed >= 1.0: # Atualizar FPS aprox. a cada segundo
-                self.fps = self.frame_count / elapsed
-                self.fps_label.config(text=f"FPS: {self.fps:.1f}")
-                self.last_update_time = now
-                self.frame_count = 0
-
-            status_msg = f"{detected_objects} objeto(s)."
-            if self.multi_color_mode.get(): status_msg += f" (Multi: {len(self.color_presets)})"
-            else: status_msg += f" ({self.current_color_name.get()})"
-            #status_msg += f" | Proc: {process_time*1000:.1f}ms" # Detalhes de performance
-            self.update_status(status_msg)
-
+            if self.freeze_mode.get():
+                # Quadro congelado: só as etapas afetadas pelos parâmetros alterados são refeitas
+                params = self.get_filter_params()
+                # Opções de visualização também pedem redesenho (o processamento fica no cache)
+                key = (params, self.show_contours.get(), self.show_bounding_boxes.get(), self.show_object_center.get())
+                if key != self.frozen_params and self.frozen.frame is not None:
+                    self.frozen_params = key
+                    result = self.frozen.process(params, timer)
+                    index, timestamp = self.last_packet[:2]
+                    self.show_result(self.frozen.frame, result, index, timestamp, timer)
+                    shown = True
+            elif self.multicam is not None:
+                shown = self.update_cameras(timer)
+            elif self.pipeline is not None:
+                # Modo paralelo: enfileirar o frame novo e exibir o resultado mais recente em ordem
+                if packet is not None and not (quality is not None and quality.skip_frame()):
+                    # Descarta se o pool estiver cheio; índice e timestamp seguem como tag
+                    self.pipeline.submit(packet[2], self.get_adaptive_params(), tag=packet[:2])
+                completed = self.pipeline.ready()
+                if completed:
+                    (index, timestamp), frame, result = completed[-1]
+                    self.last_packet = (index, timestamp, frame)
+                    start = time.perf_counter()
+                    self.show_result(frame, result, index, timestamp, timer)
+                    shown = True
+                    if quality is not None:
+                        # Workers dividem o processamento; a exibição fica na thread da GUI
+                        quality.update(self.pipeline.last_process_time / self.pipeline.workers
+                                       + time.perf_counter() - start)
+            elif packet is not None and not (quality is not None and quality.skip_frame()):
+                index, timestamp, frame = packet
+                self.last_packet = packet
+                start = time.perf_counter()
+                # ROI e o gate de mudança dependem do frame anterior, por isso só existem no modo sequencial
+                if self.change_gate_mode.get():
+                    detector = self.change_gate
+                elif self.roi_mode.get() or (quality is not None and quality.use_roi):
+                    detector = self.roi_detector
+                elif self.tiled_mode.get():
+                    if self.tiled is None:
+                        from tiling import TiledProcessor
+                        self.tiled = TiledProcessor(self.engine, workers=os.cpu_count() or 1)
+                    detector = self.tiled
+                else:
+                    detector = self.engine
+                result = detector.process(frame, self.get_adaptive_params(), timer)
+                self.show_result(frame, result, index, timestamp, timer)
+                shown = True
+                if quality is not None:
+                    quality.update(time.perf_counter() - start)
         except Exception as e:
             self.update_status(f"Erro no processamento: {e}", error=True)
             print(f"Erro detalhado no loop update:")
             traceback.print_exc() # Imprimir stack trace no console
 
 
+        timer.commit()
+
+        if shown and self.startup is not None and "first_frame" not in self.startup.phases:
+            self.finish_startup()
+
         # --- Agendar Próxima Atualização ---
-        delay = 15 # Mirar em ~60 FPS loop (tempo de processamento limitará o FPS real)
-        self.root.after(delay, self.update)
+        # Sem atraso fixo: o FPS é limitado pela etapa mais lenta (captura ou processamento)
+        self.root.after(1 if shown else self.poll_delay, self.update)
+
+    def update_cameras(self, timer):
+        """Modo multicâmera: processa todas as câmeras no pool e exibe a selecionada; retorna se exibiu."""
+        params = self.stream.params = self.get_filter_params() # Os controles editam a câmera exibida
+        for stream in self.multicam.streams:
+            if stream.params is None:
+                stream.params = params # Câmeras ainda não ajustadas começam com os controles atuais
+        shown = None
+        for stream, packet, result in self.multicam.poll():
+            if stream is self.stream:
+                shown = packet, result # Só o mais recente é exibido
+            elif self.detection_log is not None:
+                self.detection_log.submit(self.camera_log_records(stream, packet, result))
+        if self.stream.error is not None:
+            self.update_status(f"Erro no processamento de '{self.stream.name}': {self.stream.error}", error=True)
+            self.stream.error = None
+        if shown is None:
+            return False
+        (index, timestamp, frame), result = shown
+        self.last_packet = (index, timestamp, frame)
+        self.show_result(frame, result, index, timestamp, timer)
+        return True
+
+    def camera_log_records(self, stream, packet, result):
+        """Registros de uma câmera com os rótulos deslocados para a faixa dela no arquivo de log.
+
+        Retorna a função que os monta, chamada pelo `AsyncSink` na thread de escrita.
+        """
+        from multicam import camera_records
+        stream_id, offset = self.log_offsets.get(stream, (self.multicam.streams.index(stream), 0))
+        return functools.partial(camera_records, packet, result, stream_id, offset)
+
+    def select_camera(self, name):
+        """Troca a câmera exibida, guardando os controles e presets da anterior e carregando os da nova."""
+        stream = next((s for s in self.multicam.streams if s.name == name), None)
+        if stream is None:
+            # Fonte ainda abrindo (ou que falhou): continua exibindo a atual
+            state = self.opener.state.get(name, "falhou")
+            self.camera_var.set(self.stream.name if self.stream is not None else name)
+            self.update_status(f"Câmera '{name}' indisponível ({state}).", error=state == "falhou")
+            return
+        if stream is self.stream:
+            return
+        self.camera_settings[self.stream.name] = {var: getattr(self, var).get() for var in CAMERA_SETTINGS}
+        self.stream.presets = self.color_presets
+        self.stream = stream
+        self.cap, self.grabber = stream.cap, stream.grabber
+        settings = self.camera_settings.get(name)
+        if settings is not None:
+            self.color_space.set(settings["color_space"])
+            self.change_color_space()
+            for var in CAMERA_SETTINGS[1:]:
+                getattr(self, var).set(settings[var])
+        self.color_presets = stream.presets
+        self.update_color_list()
+        # Estado que depende da sequência de frames da câmera anterior
+        self.tracker.reset()
+        self.last_packet = stream.latest[:3] if stream.latest is not None else None
+        if self.freeze_mode.get():
+            self.freeze_mode.set(0)
+            self.toggle_freeze()
+        self.show_camera_mode(name)
+        self.update_status(f"Câmera '{name}' selecionada.")
+
+    def show_result(self, frame, result, index=None, timestamp=None, timer=NULL_TIMER):
+        """Desenha as visualizações do resultado e atualiza as imagens e o status da GUI."""
+        if self.detection_log is not None:
+            if self.multicam is not None:
+                records = self.camera_log_records(self.stream, (index, timestamp, frame), result)
+            else:
+                from sinks import make_records
+                records = functools.partial(make_records, index, timestamp, result)
+            self.detection_log.submit(records) # Não bloqueia; os registros são montados na thread de escrita
+        tracks = None
+        if self.tracking_mode.get():
+            tracks = self.tracker.update(result.boxes, result.centroids, timestamp)
+
+        if self.recorder is not None:
+            # Desenho e codificação na resolução original acontecem na thread de gravação
+            self.recorder.submit(frame, result, self.show_contours.get(), self.show_bounding_boxes.get(),
+                                 self.show_object_center.get(), tracks)
+
+        # Painéis compostos na resolução de exibição, reaproveitando buffers e PhotoImages
+        self.display.show(
+            frame, result,
+            show_contours=self.show_contours.get(),
+            show_boxes=self.show_bounding_boxes.get(),
+            show_centers=self.show_object_center.get(),
+            tracks=tracks, overlay=self.get_profile_overlay(), timer=timer)
+
+        # --- Atualizar Status e FPS ---
+        self.frame_count += 1
+        now = time.time()
+        if self.last_shown_time is not None:
+            timer.add("frame", now - self.last_shown_time) # Intervalo entre frames exibidos
+        self.last_shown_time = now
+        elapsed = now - self.last_update_time
+        if elapsed >= 1.0: # Atualizar FPS aprox. a cada segundo
+            self.fps = self.frame_count / elapsed
+            self.fps_label.config(text=f"FPS: {self.fps:.1f}")
+            self.last_update_time = now
+            self.frame_count = 0
+
+        status_msg = f"{result.count} objeto(s)."
+        if self.multicam is not None: status_msg = f"[{self.stream.name}] " + status_msg
+        if self.multi_color_mode.get(): status_msg += f" (Multi: {len(self.color_presets)})"
+        else: status_msg += f" ({self.current_color_name.get()})"
+        if self.quality is not None: status_msg += f" [{self.quality.describe()}]"
+        self.update_status(status_msg)
+
+    def toggle_panel(self, label, var):
+        """Mostra/oculta um painel de imagem; painéis ocultos não são convertidos nem pintados."""
+        if var.get():
+            label.grid()
+        else:
+            label.grid_remove()
+
+    def toggle_detection_log(self):
+        """Inicia/para o registro das detecções por objeto em arquivo (JSON Lines, CSV ou binário)."""
+        if self.detection_log is not None:
+            log, self.detection_log = self.detection_log, None
+            log.close()
+            self.log_button.config(text="Registrar Detecções...")
+            dropped = f", {log.dropped} frame(s) descartado(s)" if log.dropped else ""
+            self.update_status(f"Registro encerrado: {log.written} objeto(s) gravado(s){dropped}.")
+            return
+
+        filetypes = [("JSON Lines", "*.jsonl"), ("CSV", "*.csv"), ("Registros binários", "*.bin")]
+        path = filedialog.asksaveasfilename(title="Registrar detecções em", defaultextension=".jsonl", filetypes=filetypes)
+        if not path:
+            return
+        from sinks import AsyncSink, open_sink # Só carregados ao registrar
+        # Nomes dos presets por rótulo, como estão no início do registro
+        if self.multicam is not None:
+            from multicam import label_map
+            # Uma faixa de rótulos por câmera e o nome da câmera em cada registro
+            self.stream.params = self.get_filter_params()
+            names, self.log_offsets = label_map(self.multicam.streams)
+            streams = {i: s.name for i, s in enumerate(self.multicam.streams)}
+        else:
+            names = {label: r.name for label, r in enumerate(self.get_filter_params().ranges, 1)}
+            streams = None
+        try:
+            self.detection_log = AsyncSink(open_sink(path, names, streams))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Erro ao Registrar", str(e))
+            return
+        self.log_button.config(text="Parar Registro")
+        self.update_status(f"Registrando detecções em {path}")
+
+    def toggle_recording(self):
+        """Inicia/para a gravação em vídeo dos streams marcados (na resolução da câmera)."""
+        if self.recorder is not None:
+            recorder, self.recorder = self.recorder, None
+            recorder.close() # Grava o que ainda estiver na fila
+            self.record_button.config(text="Gravar Vídeo...")
+            dropped = f", {recorder.dropped} descartado(s)" if recorder.dropped else ""
+            error = f" Erro: {recorder.error}" if recorder.error else ""
+            self.update_status(f"Gravação encerrada: {recorder.written} quadro(s){dropped}.{error}",
+                               error=recorder.error is not None)
+            return
 
+        streams = [name for name, var in (("annotated", self.record_annotated), ("mask", self.record_mask),
+                                          ("result", self.record_result)) if var.get()]
+        if not streams:
+            messagebox.showinfo("Gravar Vídeo", "Marque ao menos um stream (Anotado, Máscara ou Resultado).")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Gravar vídeo em", defaultextension=".mp4", filetypes=[("MP4", "*.mp4"), ("AVI", "*.avi")])
+        if not path:
+            return
+        # FPS informado pela câmera; sem ele, o FPS medido da aplicação
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.cap is not None else 0
+        if not 0 < fps <= 240:
+            fps = self.fps if self.fps > 0 else 30.0
+        fourcc = "XVID" if path.lower().endswith(".avi") else "mp4v"
+        from recorder import VideoRecorder # Só carregado ao gravar
+        self.recorder = VideoRecorder(path, fps=fps, streams=streams, fourcc=fourcc)
+        self.record_button.config(text="Parar Gravação")
+        self.update_status(f"Gravando {', '.join(self.recorder.paths.values())}")
+
+    def toggle_parallel_mode(self):
+        """Liga/desliga o processamento em um pool de workers (multi-core)."""
+        if self.parallel_mode.get():
+            self.pipeline = ProcessingPipeline(self.engine, profiler=self.profiler)
+            self.update_status(f"Processamento paralelo ativado ({self.pipeline.workers} workers).")
+        else:
+            if self.pipeline is not None:
+                self.pipeline.close(wait=False)
+            self.pipeline = None
+            self.update_status("Processamento paralelo desativado.")
+
+    def get_adaptive_params(self):
+        """`get_filter_params` com a escala e o blur reduzidos pelo controle adaptativo, se ativo."""
+        params = self.get_filter_params()
+        return params if self.quality is None else self.quality.apply(params)
+
+    def toggle_adaptive_quality(self, *args):
+        """Liga/desliga o controle adaptativo para o FPS alvo escolhido."""
+        target = ADAPTIVE_TARGETS.get(self.adaptive_target.get(), 0)
+        self.quality = QualityController(target_fps=target) if target else None
+        self.roi_detector.reset()
+        if target:
+            self.update_status(f"Qualidade adaptativa: alvo de {target} FPS.")
+        else:
+            self.update_status("Qualidade adaptativa desativada.")
+
+    def toggle_freeze(self):
+        """Congela o último quadro exibido para ajustar os parâmetros sobre ele."""
+        self.frozen_params = None
+        if self.freeze_mode.get():
+            if self.last_packet is None:
+                self.freeze_mode.set(0)
+                self.update_status("Nenhum quadro para congelar ainda.", error=True)
+                return
+            self.frozen.freeze(self.last_packet[2])
+            self.update_status("Quadro congelado: ajuste os parâmetros; só as etapas afetadas são refeitas.")
+        else:
+            self.frozen.release() # Libera o frame e os intermediários
+            self.roi_detector.reset()
+            self.update_status("Quadro liberado.")
+
+    def toggle_profiling(self):
+        """Liga/desliga a medição por etapa e o overlay de percentis."""
+        self.profiler = StageProfiler() if self.profiling_mode.get() else None
+        self.profile_overlay = None
+        if self.pipeline is not None:
+            self.pipeline.profiler = self.profiler
+
+    def get_profile_overlay(self):
+        """Linhas do overlay de perfil; os percentis só são recalculados a cada `profile_refresh` s."""
+        if self.profiler is None:
+            return None
+        now = time.time()
+        if self.profile_overlay is None or now - self.last_profile_refresh >= self.profile_refresh:
+            buffers = self.engine.buffer_stats()
+            # Alocações no intervalo: 0 em regime (temporários vêm todos do pool)
+            new_allocations = buffers["allocations"] - self.last_allocations
+            self.last_allocations = buffers["allocations"]
+            self.profile_overlay = (["etapa        p50    p95    p99"] + self.profiler.overlay_lines()
+                                    + [f"buffers {buffers['buffers']} ({buffers['bytes'] / 1e6:.1f} MB) +{new_allocations} aloc"])
+            self.last_profile_refresh = now
+        return self.profile_overlay
+
+    def save_profile_stats(self):
+        """Grava as estatísticas por etapa em JSON."""
+        if self.profiler is None:
+            messagebox.showinfo("Perfil", "Ative 'Perfil por Etapa' na aba Avançado para coletar estatísticas.")
+            return
+        path = filedialog.asksaveasfilename(
+            title="Salvar estatísticas", defaultextension=".json", filetypes=[("JSON", "*.json")])
+        if not path:
+            return
+        try:
+            self.profiler.dump(path, extra={"buffers": self.engine.buffer_stats()})
+            self.update_status(f"Estatísticas salvas em {path}.")
+        except OSError as e:
+            self.update_status(f"Erro ao salvar estatísticas: {e}", error=True)
 
     # método update_image_label removido
 
@@ -798,6 +1294,20 @@ class ColorFilterApp:
     def quit(self):
         """Libera a câmera e fecha a aplicação."""
         print("Encerrando aplicação...")
+        if getattr(self, "opener", None):
+            self.opener.close() # Cancela aberturas pendentes
+        if getattr(self, "multicam", None):
+            self.multicam.close(wait=False) # Para todas as capturas e libera as câmeras
+        elif getattr(self, "grabber", None):
+            self.grabber.stop()
+        if getattr(self, "pipeline", None):
+            self.pipeline.close(wait=False)
+        if getattr(self, "tiled", None):
+            self.tiled.close()
+        if getattr(self, "recorder", None):
+            self.recorder.close()
+        if getattr(self, "detection_log", None):
+            self.detection_log.close()
         if self.cap and self.cap.isOpened():
             print("Liberando câmera...")
             self.cap.release()
@@ -807,8 +1317,19 @@ class ColorFilterApp:
 
 # --- Execução Principal ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Filtro de cores em tempo real com OpenCV e Tkinter.")
+    parser.add_argument("sources", nargs="*",
+                        help="Índices de câmera, /dev/videoN, arquivos de vídeo e/ou synthetic[:LxA@FPS] (padrão: 0)")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="Mede o tempo de cada fase até o primeiro quadro exibido, imprime e encerra")
+    parser.add_argument("--startup-output", help="Com --startup-time, grava os tempos em JSON")
+    add_capture_arguments(parser)
+    args = parser.parse_args()
+    startup = StartupTimer(STARTED) if args.startup_time else None
+    if startup is not None:
+        startup.mark("imports")
     root = tk.Tk()
-    app = ColorFilterApp(root)
+    app = ColorFilterApp(root, args.sources, startup, settings_from_args(args))
     # Garantir que quit seja chamado ao fechar a janela, mesmo se __init__ falhar parcialmente
     root.protocol("WM_DELETE_WINDOW", app.quit)
     # Verificar se a inicialização da app foi bem-sucedida antes de iniciar o mainloop
@@ -817,3 +1338,5 @@ if __name__ == "__main__":
          root.mainloop()
     else:
          print("Falha na inicialização da aplicação.")
+    if startup is not None and args.startup_output:
+        startup.dump(args.startup_output, extra={"sources": args.sources or ["0"]})
@@ -0,0 +1,222 @@
+"""Processamento em lote (sem câmera nem display) de vídeos, pastas de imagens ou padrões glob.
+
+Exemplo:
+    python batch.py gravacoes/*.mp4 fotos/ -o deteccoes.csv --range 40,50,50 85,255,255 --blur 3
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+from color_engine import COLOR_SPACES, ColorFilterEngine, ColorRange, FilterParams
+from pipeline import ProcessingPipeline
+from profiling import StageProfiler
+from tiling import TiledProcessor
+from sinks import AsyncSink, SINK_FORMATS, make_records, open_sink
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def is_image(path):
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def expand_inputs(inputs):
+    """Expande pastas e padrões glob em uma lista ordenada de arquivos."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(os.path.join(item, name) for name in os.listdir(item) if is_image(name)))
+        elif glob.has_magic(item):
+            paths.extend(sorted(p for p in glob.glob(item) if os.path.isfile(p)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def video_frames(path, prefetch=64):
+    """Gera (índice, timestamp, frame) de um vídeo, decodificando em uma thread à frente do consumidor."""
+    frames = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+
+    def reader():
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                print(f"Aviso: não foi possível abrir o vídeo '{path}'.", file=sys.stderr)
+                return
+            index = 0
+            while not stop.is_set():
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                frames.put((index, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, frame))
+                index += 1
+            if index == 0:
+                print(f"Aviso: nenhum quadro decodificado de '{path}'.", file=sys.stderr)
+        finally:
+            cap.release()
+            frames.put(None)
+
+    thread = threading.Thread(target=reader, name=f"decode:{os.path.basename(path)}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = frames.get()
+            if item is None:
+                break
+            yield item
+    finally:
+        stop.set()
+        # Liberar a thread caso esteja bloqueada em put()
+        while thread.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                thread.join(timeout=0.05)
+
+
+def image_frames(paths, executor, window):
+    """Gera (caminho, frame) decodificando até `window` imagens em paralelo, preservando a ordem."""
+    pending = []
+    for path in paths:
+        pending.append((path, executor.submit(cv2.imread, path)))
+        if len(pending) >= window:
+            path, future = pending.pop(0)
+            yield path, future.result()
+    for path, future in pending:
+        yield path, future.result()
+
+
+def iter_frames(paths, decode_workers=4):
+    """Gera (fonte, índice, timestamp, frame) para todos os arquivos, na ordem dada."""
+    with ThreadPoolExecutor(max_workers=decode_workers, thread_name_prefix="decode") as executor:
+        images = []
+        for path in paths + [None]:
+            if path is not None and is_image(path):
+                images.append(path) # Agrupar imagens consecutivas para decodificar em paralelo
+                continue
+            for image_path, frame in image_frames(images, executor, decode_workers * 2):
+                if frame is None:
+                    print(f"Aviso: não foi possível ler '{image_path}'.", file=sys.stderr)
+                    continue
+                yield image_path, 0, None, frame
+            images = []
+            if path is not None:
+                yield from ((path, index, timestamp, frame) for index, timestamp, frame in video_frames(path))
+
+
+def load_ranges(args):
+    """Monta as faixas a partir de --range e --presets."""
+    ranges = [ColorRange(tuple(lower), tuple(upper), args.space, f"Faixa {i}")
+              for i, (lower, upper) in enumerate(args.range or [], 1)]
+    if args.presets:
+        with open(args.presets, encoding="utf-8") as f:
+            ranges.extend(ColorRange.from_preset(c) for c in json.load(f))
+    return tuple(ranges)
+
+
+def channel_triplet(text):
+    values = [int(v) for v in text.split(",")]
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError("use três valores separados por vírgula, ex: 40,50,50")
+    return values
+
+
+def add_filter_arguments(parser):
+    """Opções de linha de comando que definem o `FilterParams` (compartilhadas com outros scripts)."""
+    parser.add_argument("--range", nargs=2, type=channel_triplet, action="append", metavar=("MIN", "MAX"),
+                        help="Faixa Min/Max (ex: --range 40,50,50 85,255,255); pode repetir")
+    parser.add_argument("--presets", help="JSON com lista de presets no formato da aba Multi-Cor")
+    parser.add_argument("--space", default="HSV", choices=COLOR_SPACES, help="Espaço de cor das faixas de --range")
+    parser.add_argument("--blur", type=int, default=3)
+    parser.add_argument("--erosion", type=int, default=1)
+    parser.add_argument("--dilation", type=int, default=2)
+    parser.add_argument("--min-area", type=int, default=500)
+    parser.add_argument("--scale", type=float, default=1.0, help="Escala de análise (ex: 0.5)")
+    parser.add_argument("--analysis", default="contours", choices=("contours", "components"))
+
+
+def params_from_args(args, allow_empty=False):
+    """Monta o `FilterParams` das opções de `add_filter_arguments`; None se não houver faixas (salvo `allow_empty`)."""
+    ranges = load_ranges(args)
+    if not ranges and not allow_empty:
+        return None
+    return FilterParams(
+        ranges=ranges, color_space=args.space, blur_size=args.blur,
+        erosion_size=args.erosion, dilation_size=args.dilation, min_contour_area=args.min_area,
+        process_scale=args.scale, analysis=args.analysis)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Filtro de cores em lote sobre vídeos e imagens.")
+    parser.add_argument("inputs", nargs="+", help="Arquivos de vídeo/imagem, pastas ou padrões glob")
+    parser.add_argument("-o", "--output", required=True,
+                        help=f"Arquivo de saída; o formato vem da extensão ({', '.join(SINK_FORMATS)})")
+    add_filter_arguments(parser)
+    parser.add_argument("--workers", type=int, default=None, help="Workers de processamento (padrão: nº de núcleos)")
+    parser.add_argument("--decode-workers", type=int, default=4, help="Threads de decodificação de imagens")
+    parser.add_argument("--tile", type=int, metavar="PIXELS",
+                        help="Processar em blocos sobrepostos deste tamanho (limita a memória em 4K/8K)")
+    parser.add_argument("--profile", metavar="JSON", help="Gravar os tempos por etapa (p50/p95/p99) neste arquivo")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    params = params_from_args(args)
+    if params is None:
+        print("Erro: informe ao menos uma faixa (--range ou --presets).", file=sys.stderr)
+        return 2
+    names = {label: r.name for label, r in enumerate(params.ranges, 1)}
+
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("Erro: nenhum arquivo de entrada encontrado.", file=sys.stderr)
+        return 2
+
+    try:
+        sink = open_sink(args.output, names, streams=dict(enumerate(paths)))
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    # Em lote nada deve ser descartado: a escrita bloqueia se a fila encher
+    writer = AsyncSink(sink, drop_when_full=False)
+    profiler = StageProfiler(window=100000) if args.profile else None
+    engine = detector = ColorFilterEngine()
+    if args.tile:
+        # Os frames já são distribuídos entre workers; os blocos de cada frame rodam em sequência
+        detector = TiledProcessor(engine, tile_size=args.tile)
+    pipeline = ProcessingPipeline(detector, workers=args.workers, profiler=profiler)
+    streams = {path: stream for stream, path in enumerate(paths)}
+    jobs = (((streams[source], index, timestamp), frame, params)
+            for source, index, timestamp, frame in iter_frames(paths, args.decode_workers))
+    start = time.time()
+    frames = 0
+    try:
+        for (stream, index, timestamp), _, result in pipeline.imap(jobs):
+            writer.submit(make_records(index, timestamp, result, stream))
+            frames += 1
+    finally:
+        pipeline.close()
+        writer.close()
+    elapsed = time.time() - start
+    print(f"{frames} frame(s) de {len(paths)} arquivo(s) em {elapsed:.1f}s "
+          f"({frames / elapsed if elapsed > 0 else 0:.1f} FPS) -> {args.output}")
+    if profiler is not None:
+        data = profiler.dump(args.profile, extra={"buffers": engine.buffer_stats()})
+        for stage, stats in data["stages"].items():
+            print(f"  {stage:<10} p50 {stats['p50']:7.2f}  p95 {stats['p95']:7.2f}  p99 {stats['p99']:7.2f} ms")
+        print("  buffers    {buffers} em {pools} thread(s), {bytes} bytes, {allocations} alocação(ões)".format(**data["buffers"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""Benchmark reprodutível do pipeline de detecção (máscara, morfologia, contornos).
+
+Roda o motor sobre frames sintéticos (determinísticos) e/ou gravados, variando
+resolução, espaço de cor, número de presets e tamanhos de blur/erosão/dilatação,
+e grava FPS e tempos por etapa em JSON. Dois arquivos podem ser comparados para
+detectar regressões entre commits.
+
+Exemplo:
+    python benchmark.py -o bench_main.json
+    python benchmark.py -o bench_branch.json --quick
+    python benchmark.py --compare bench_main.json bench_branch.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from itertools import product
+
+import cv2
+import numpy as np
+
+from color_engine import COLOR_SPACES, ColorFilterEngine, ColorRange, FilterParams, convert_color
+from profiling import StageProfiler
+
+RESOLUTIONS = {"VGA": (640, 480), "HD": (1280, 720), "FHD": (1920, 1080), "4K": (3840, 2160)}
+PRESET_COUNTS = (1, 4, 16, 32)
+KERNELS = ((0, 0, 0), (3, 1, 2), (7, 3, 5)) # (blur, erosão, dilatação)
+QUICK = {"resolutions": ("VGA", "FHD"), "spaces": ("HSV", "Lab"), "presets": (1, 8), "kernels": ((3, 1, 2),)}
+
+
+def palette(count, seed=0):
+    """`count` cores BGR saturadas e bem espaçadas no matiz (determinísticas)."""
+    rng = np.random.RandomState(seed)
+    hues = (np.arange(count) * 180.0 / count + rng.uniform(0, 180.0 / count)) % 180
+    hsv = np.stack([hues, rng.randint(150, 256, count), rng.randint(150, 256, count)], axis=1)
+    return cv2.cvtColor(hsv.astype(np.uint8).reshape(1, -1, 3), cv2.COLOR_HSV2BGR).reshape(-1, 3)
+
+
+def synthetic_frame(size, colors, blobs=40, seed=0):
+    """Fundo com ruído e `blobs` manchas coloridas por cor; sempre o mesmo frame para a mesma semente."""
+    width, height = size
+    rng = np.random.RandomState(seed)
+    frame = rng.randint(0, 80, (height, width, 3)).astype(np.uint8)
+    radius = max(4, min(width, height) // 40)
+    for i in range(blobs):
+        color = tuple(int(c) for c in colors[i % len(colors)])
+        center = (int(rng.randint(0, width)), int(rng.randint(0, height)))
+        axes = (int(rng.randint(radius // 2, radius * 2)), int(rng.randint(radius // 2, radius * 2)))
+        cv2.ellipse(frame, center, axes, float(rng.uniform(0, 180)), 0, 360, color, -1)
+    return frame
+
+
+def make_ranges(colors, space, tolerance=(10, 60, 60)):
+    """Uma faixa por cor no espaço dado: valor convertido ± tolerância por canal."""
+    converted = convert_color(colors.reshape(1, -1, 3).astype(np.uint8), space).reshape(-1, 3).astype(int)
+    if space != "HSV":
+        tolerance = (40, 40, 40)
+    ranges = []
+    for i, value in enumerate(converted):
+        lower = tuple(int(max(0, v - t)) for v, t in zip(value, tolerance))
+        upper = tuple(int(min(255, v + t)) for v, t in zip(value, tolerance))
+        if space == "HSV":
+            upper = (min(179, upper[0]),) + upper[1:]
+        ranges.append(ColorRange(lower, upper, space, f"cor {i + 1}"))
+    return tuple(ranges)
+
+
+def load_video_frames(path, limit):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run_case(frames, params, repeat, warmup):
+    """Processa os frames em sequência `repeat` vezes (após `warmup`) e retorna as medidas."""
+    engine = ColorFilterEngine()
+    for i in range(warmup):
+        engine.process(frames[i % len(frames)], params) # Compila tabelas e aquece caches
+    allocations = engine.buffer_stats()["allocations"]
+    profiler = StageProfiler(window=repeat)
+    totals = np.empty(repeat, dtype=np.float64)
+    objects = 0
+    for i in range(repeat):
+        timer = profiler.frame()
+        start = time.perf_counter()
+        result = engine.process(frames[i % len(frames)], params, timer)
+        totals[i] = time.perf_counter() - start
+        timer.commit()
+        objects += result.count
+    ms = totals * 1000.0
+    return {
+        "fps": round(repeat / totals.sum(), 2),
+        "ms_p50": round(float(np.percentile(ms, 50)), 3),
+        "ms_p95": round(float(np.percentile(ms, 95)), 3),
+        "objects_per_frame": round(objects / float(repeat), 2),
+        # Buffers criados durante a medição (0 = sem alocação de temporários em regime)
+        "allocations": engine.buffer_stats()["allocations"] - allocations,
+        "stages": profiler.stats(),
+    }
+
+
+def case_id(case):
+    return "{source}/{resolution}/{space}/p{presets}/b{blur}e{erosion}d{dilation}/{analysis}/s{scale:g}".format(**case)
+
+
+def environment():
+    """Metadados para saber se duas execuções são comparáveis."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "commit": commit, "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(), "opencv": cv2.__version__, "numpy": np.__version__,
+        "platform": platform.platform(), "processor": platform.processor(), "cpus": os.cpu_count(),
+        "cv2_threads": cv2.getNumThreads(),
+    }
+
+
+def run_benchmarks(args):
+    if args.quick:
+        resolutions, spaces, preset_counts, kernels = (QUICK[k] for k in ("resolutions", "spaces", "presets", "kernels"))
+    else:
+        resolutions, spaces, preset_counts, kernels = args.resolutions, args.spaces, args.presets, args.kernels
+    colors_max = max(preset_counts)
+    colors = palette(colors_max, args.seed)
+
+    sources = []
+    if not args.no_synthetic:
+        for name in resolutions:
+            size = RESOLUTIONS[name]
+            frames = [synthetic_frame(size, colors, seed=args.seed + i) for i in range(args.frames)]
+            sources.append(("synthetic", name, frames))
+    for path in args.video or []:
+        frames = load_video_frames(path, args.frames)
+        if not frames:
+            print(f"Aviso: não foi possível ler '{path}'.", file=sys.stderr)
+            continue
+        height, width = frames[0].shape[:2]
+        sources.append((os.path.basename(path), f"{width}x{height}", frames))
+
+    cases = []
+    matrix = list(product(spaces, preset_counts, kernels, args.analysis, args.scales))
+    total = len(sources) * len(matrix)
+    for source, resolution, frames in sources:
+        for space, count, (blur, erosion, dilation), analysis, scale in matrix:
+            params = FilterParams(
+                ranges=make_ranges(colors[:count], space), color_space=space, blur_size=blur,
+                erosion_size=erosion, dilation_size=dilation, min_contour_area=args.min_area,
+                process_scale=scale, analysis=analysis)
+            case = {"source": source, "resolution": resolution, "space": space, "presets": count,
+                    "blur": blur, "erosion": erosion, "dilation": dilation, "analysis": analysis, "scale": scale}
+            case.update(run_case(frames, params, args.repeat, args.warmup))
+            case["id"] = case_id(case)
+            cases.append(case)
+            print(f"[{len(cases)}/{total}] {case['id']:<48} {case['fps']:9.1f} FPS  p50 {case['ms_p50']:8.2f} ms")
+    return cases
+
+
+def compare(old_path, new_path, threshold):
+    """Compara dois arquivos de resultado pelo p50 por caso; retorna o nº de regressões."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    old_cases = {c["id"]: c for c in old["cases"]}
+    print(f"{old['environment'].get('commit') or old_path} -> {new['environment'].get('commit') or new_path}")
+    if old["environment"].get("platform") != new["environment"].get("platform"):
+        print("Aviso: resultados de máquinas/plataformas diferentes.")
+    regressions = 0
+    for case in new["cases"]:
+        before = old_cases.get(case["id"])
+        if before is None:
+            continue
+        change = case["ms_p50"] / before["ms_p50"] - 1.0 if before["ms_p50"] > 0 else 0.0
+        flag = ""
+        if change > threshold:
+            regressions += 1
+            # A etapa que mais piorou ajuda a achar a causa
+            worst = max(case["stages"], key=lambda s: case["stages"][s]["p50"] - before["stages"].get(s, {}).get("p50", 0))
+            flag = f"  REGRESSÃO ({worst})"
+        elif change < -threshold:
+            flag = "  melhora"
+        print(f"{case['id']:<48} {before['ms_p50']:8.2f} -> {case['ms_p50']:8.2f} ms ({change:+6.1%}){flag}")
+    missing = len(set(old_cases) - {c["id"] for c in new["cases"]})
+    if missing:
+        print(f"{missing} caso(s) do primeiro arquivo não existem no segundo.")
+    print(f"{regressions} regressão(ões) acima de {threshold:.0%}.")
+    return regressions
+
+
+def kernel_triplet(text):
+    values = tuple(int(v) for v in text.split(","))
+    if len(values) != 3:
+        raise argparse.ArgumentTypeError("use blur,erosão,dilatação (ex: 3,1,2)")
+    return values
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de filtro de cores.")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Comparar dois arquivos de resultado")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora relativa do p50 considerada regressão")
+    parser.add_argument("--quick", action="store_true", help="Matriz reduzida para checagens rápidas")
+    parser.add_argument("--resolutions", nargs="+", default=tuple(RESOLUTIONS), choices=tuple(RESOLUTIONS))
+    parser.add_argument("--spaces", nargs="+", default=COLOR_SPACES, choices=COLOR_SPACES)
+    parser.add_argument("--presets", nargs="+", type=int, default=PRESET_COUNTS, help="Números de presets (faixas)")
+    parser.add_argument("--kernels", nargs="+", type=kernel_triplet, default=KERNELS, help="Trios blur,erosão,dilatação")
+    parser.add_argument("--analysis", nargs="+", default=("contours",), choices=("contours", "components"))
+    parser.add_argument("--scales", nargs="+", type=float, default=(1.0,), help="Escalas de análise")
+    parser.add_argument("--video", nargs="+", help="Vídeos gravados usados além (ou no lugar) dos frames sintéticos")
+    parser.add_argument("--no-synthetic", action="store_true", help="Usar só os vídeos de --video")
+    parser.add_argument("--frames", type=int, default=8, help="Frames distintos por fonte")
+    parser.add_argument("--repeat", type=int, default=30, help="Frames medidos por caso")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--min-area", type=int, default=100)
+    parser.add_argument("--threads", type=int, help="cv2.setNumThreads (fixe para resultados comparáveis)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.compare:
+        return 1 if compare(args.compare[0], args.compare[1], args.threshold) else 0
+    if args.threads is not None:
+        cv2.setNumThreads(args.threads)
+    settings = {k: v for k, v in vars(args).items() if k not in ("output", "compare", "threshold")}
+    cases = run_benchmarks(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "settings": settings, "cases": cases}, f, indent=1)
+    print(f"{len(cases)} caso(s) -> {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""Pool de buffers pré-alocados para os temporários do pipeline de detecção."""
+from collections import OrderedDict
+
+import numpy as np
+
+
+class BufferPool:
+    """Arrays reaproveitados entre frames, indexados por (nome, forma, tipo).
+
+    `get` devolve sempre o mesmo array para a mesma chave, então as funções do
+    OpenCV podem escrever nele via `dst=` sem alocar. Uma resolução nova cria
+    novos buffers; os menos usados saem quando há mais de `max_buffers`.
+    `allocations` conta os buffers criados: depois do primeiro frame de uma
+    resolução deve parar de crescer. `outputs` conta as cópias feitas por
+    `detach` para arrays que saem do motor (máscara e rótulos do resultado).
+
+    Não é thread-safe: cada thread deve ter o seu.
+    """
+
+    def __init__(self, max_buffers=64):
+        self.max_buffers = max_buffers
+        self.allocations = 0
+        self.outputs = 0
+        self._buffers = OrderedDict()
+
+    def get(self, name, shape, dtype=np.uint8):
+        """Buffer (não inicializado) para `name` com a forma e o tipo pedidos."""
+        key = (name, tuple(shape), np.dtype(dtype).str)
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = np.empty(shape, dtype=dtype)
+            self.allocations += 1
+            if len(self._buffers) > self.max_buffers:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(key)
+        return buffer
+
+    def owns(self, array):
+        """Indica se `array` é (uma visão de) um buffer do pool."""
+        base = array if array.base is None else array.base
+        return any(base is buffer for buffer in self._buffers.values())
+
+    def detach(self, array):
+        """Cópia própria de `array` se ele pertence ao pool; senão o próprio array."""
+        if array is None or not self.owns(array):
+            return array
+        self.outputs += 1
+        return array.copy()
+
+    def clear(self):
+        self._buffers.clear()
+
+    @property
+    def nbytes(self):
+        return sum(buffer.nbytes for buffer in self._buffers.values())
+
+    def stats(self):
+        return {"buffers": len(self._buffers), "bytes": self.nbytes,
+                "allocations": self.allocations, "outputs": self.outputs}
@@ -0,0 +1,417 @@
+"""Captura de frames em uma thread dedicada, desacoplada do loop da GUI, e backends de fonte (câmera, arquivo, sintética)."""
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+class FrameGrabber:
+    """Lê frames de um `cv2.VideoCapture` em background mantendo apenas o mais recente.
+
+    O buffer tem tamanho 1: se o consumidor não retirar o frame antes do próximo
+    chegar, o antigo é descartado (contado em `dropped`). Assim o consumidor
+    sempre processa o frame mais novo, sem acumular atraso.
+    """
+
+    def __init__(self, cap, stop_on_failure=False, frame_interval=0.0):
+        self.cap = cap
+        self.stop_on_failure = stop_on_failure # Útil para arquivos de vídeo (fim do arquivo)
+        self.frame_interval = frame_interval # > 0: ritmo de câmera ao vivo para arquivos (1 / FPS)
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._index = -1
+        self._thread = None
+        self.running = False
+        self.dropped = 0
+        self.failed_reads = 0 # Falhas consecutivas de leitura
+        self.read_time = 0.0 # Duração do último cap.read() em segundos
+
+    def start(self):
+        """Inicia a thread de captura."""
+        if self.running:
+            return self
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="FrameGrabber", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        next_read = time.perf_counter()
+        while self.running:
+            if self.frame_interval > 0:
+                delay = next_read - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                next_read = max(next_read + self.frame_interval, time.perf_counter() - self.frame_interval)
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            self.read_time = time.perf_counter() - start
+            if not ret or frame is None:
+                self.failed_reads += 1
+                if self.stop_on_failure:
+                    break
+                time.sleep(0.01) # Evitar loop ocupado com a câmera falhando
+                continue
+            self.failed_reads = 0
+            with self._cond:
+                if self._frame is not None:
+                    self.dropped += 1 # Frame anterior não foi consumido
+                self._frame = frame
+                self._timestamp = time.time()
+                self._index += 1
+                self._cond.notify_all()
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def read(self, timeout=None):
+        """Retira o frame mais recente como (índice, timestamp, frame).
+
+        Espera até `timeout` segundos (None = indefinidamente, 0 = não bloqueia)
+        e retorna None se nenhum frame novo estiver disponível.
+        """
+        with self._cond:
+            if self._frame is None and timeout != 0:
+                self._cond.wait_for(lambda: self._frame is not None or not self.running, timeout)
+            frame, self._frame = self._frame, None
+            if frame is None:
+                return None
+            return self._index, self._timestamp, frame
+
+    @property
+    def has_frame(self):
+        """Indica se há um frame capturado ainda não retirado por `read`."""
+        return self._frame is not None
+
+    def stop(self):
+        """Para a thread de captura (não libera a câmera)."""
+        self.running = False
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+
+
+# Prefixos de fonte que escolhem o backend (ex: "v4l2:0", "dshow:1", "file:video.mp4", "synthetic:1280x720@60")
+CAPTURE_BACKENDS = {
+    "v4l2": cv2.CAP_V4L2, "dshow": cv2.CAP_DSHOW, "msmf": cv2.CAP_MSMF,
+    "avfoundation": cv2.CAP_AVFOUNDATION, "file": None, "synthetic": None,
+}
+# APIs tentadas, em ordem, para um índice de câmera sem prefixo
+PLATFORM_APIS = {
+    "linux": (cv2.CAP_V4L2, cv2.CAP_ANY),
+    "win32": (cv2.CAP_DSHOW, cv2.CAP_MSMF, cv2.CAP_ANY),
+    "darwin": (cv2.CAP_AVFOUNDATION, cv2.CAP_ANY),
+}
+# Campos de `CaptureSettings` aceitos nas câmeras do --config do multicam
+CAPTURE_FIELDS = ("width", "height", "fps", "fourcc", "buffer_size")
+
+
+@dataclass(frozen=True)
+class CaptureSettings:
+    """Modo pedido à fonte; 0 (ou "" no FOURCC) mantém o padrão do driver.
+
+    O driver pode ajustar o pedido para o modo suportado mais próximo; o modo
+    realmente negociado é lido de volta com `capture_mode`.
+    """
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    fourcc: str = "" # ex: "MJPG" (comprimido, permite mais FPS em USB 2.0), "YUYV"
+    buffer_size: int = 0 # Frames no buffer do driver; 1 = menor latência
+
+
+def parse_source(source):
+    """Separa (backend, alvo) de uma fonte: índice de câmera, /dev/videoN, arquivo ou "synthetic[:WxH@FPS]"."""
+    source = str(source)
+    backend, sep, target = source.partition(":")
+    if sep and backend.lower() in CAPTURE_BACKENDS:
+        backend = backend.lower()
+    elif source.lower() == "synthetic":
+        return "synthetic", ""
+    elif source.isdigit():
+        return "camera", source
+    elif source.startswith("/dev/video"):
+        return "v4l2", source
+    else:
+        return "file", source
+    if backend not in ("file", "synthetic") and not (target.isdigit() or target.startswith("/dev/")):
+        raise ValueError(f"Fonte '{source}': o backend '{backend}' espera um índice de câmera ou /dev/videoN.")
+    return backend, target
+
+
+def apply_settings(cap, settings):
+    """Pede o modo de `settings` à câmera. O FOURCC vai primeiro: no V4L2 ele define as resoluções e FPS disponíveis."""
+    if settings.fourcc:
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings.fourcc.ljust(4)[:4]))
+    if settings.width > 0 and settings.height > 0:
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+    if settings.fps > 0:
+        cap.set(cv2.CAP_PROP_FPS, settings.fps)
+    if settings.buffer_size > 0:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+
+
+def fourcc_text(value):
+    """Código FOURCC numérico (como em CAP_PROP_FOURCC) em texto, ex: "MJPG"; "" se desconhecido."""
+    value = int(value)
+    text = "".join(chr((value >> (8 * i)) & 0xFF) for i in range(4))
+    return text.strip("\x00 ") if value > 0 and text.isprintable() else ""
+
+
+def capture_mode(cap):
+    """Modo negociado: backend, largura, altura, FPS, FOURCC e tamanho do buffer informados pela fonte."""
+    try:
+        backend = cap.getBackendName()
+    except cv2.error:
+        backend = ""
+    return {
+        "backend": backend,
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "fps": round(cap.get(cv2.CAP_PROP_FPS), 2), "fourcc": fourcc_text(cap.get(cv2.CAP_PROP_FOURCC)),
+        "buffer_size": int(cap.get(cv2.CAP_PROP_BUFFERSIZE)),
+    }
+
+
+def describe_mode(mode, settings=None):
+    """Texto curto do modo negociado; com `settings`, aponta o que o driver não aceitou."""
+    text = f"{mode['width']}x{mode['height']} @ {mode['fps']:g} FPS"
+    if mode["fourcc"]:
+        text += f" {mode['fourcc']}"
+    if mode["backend"]:
+        text += f" ({mode['backend']})"
+    if settings is not None:
+        refused = []
+        if settings.width > 0 and (mode["width"], mode["height"]) != (settings.width, settings.height):
+            refused.append(f"{settings.width}x{settings.height}")
+        if settings.fps > 0 and abs(mode["fps"] - settings.fps) > 0.5:
+            refused.append(f"{settings.fps:g} FPS")
+        if settings.fourcc and mode["fourcc"] and mode["fourcc"] != settings.fourcc:
+            refused.append(settings.fourcc)
+        if refused:
+            text += f" [pedido: {', '.join(refused)}]"
+    return text
+
+
+class SyntheticCapture:
+    """Fonte sintética com a interface de `cv2.VideoCapture`, para testar vazão sem câmera.
+
+    Gera manchas coloridas (vermelho, verde, azul, amarelo) que se movem e
+    quicam sobre um fundo escuro com ruído, sempre a mesma sequência para a
+    mesma semente. Como uma câmera, `read` entrega no máximo `fps` quadros
+    por segundo (0 = o mais rápido possível). Aceita qualquer resolução e FPS.
+    """
+
+    COLORS = ((0, 0, 220), (0, 200, 0), (220, 60, 0), (0, 220, 220))
+
+    def __init__(self, width=640, height=480, fps=30.0, blobs=12, seed=0):
+        self.fps = fps
+        self.blobs = blobs
+        self.seed = seed
+        self._opened = True
+        self._resize(width, height)
+
+    @classmethod
+    def from_spec(cls, spec, settings):
+        """Cria a partir de "WxH@FPS" (partes opcionais); o que faltar vem de `settings` ou dos padrões."""
+        size, _, fps = spec.partition("@")
+        width, height = settings.width or 640, settings.height or 480
+        if size:
+            width, height = (int(v) for v in size.lower().split("x"))
+        return cls(width, height, float(fps) if fps else (settings.fps or 30.0))
+
+    def _resize(self, width, height):
+        self.width, self.height = int(width), int(height)
+        rng = np.random.RandomState(self.seed)
+        self._background = rng.randint(0, 60, (self.height, self.width, 3)).astype(np.uint8)
+        self._positions = rng.uniform(0, 1, (self.blobs, 2)) * (self.width, self.height)
+        self._velocities = rng.uniform(-1, 1, (self.blobs, 2)) * max(self.width, self.height) / 100.0
+        self._radius = max(4, min(self.width, self.height) // 20)
+        self._index = 0
+        self._next = time.perf_counter()
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if self.fps > 0:
+            delay = self._next - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._next = max(self._next + 1.0 / self.fps, time.perf_counter() - 1.0 / self.fps)
+        frame = self._background.copy()
+        for i, (x, y) in enumerate(self._positions.astype(int)):
+            cv2.circle(frame, (int(x), int(y)), self._radius, self.COLORS[i % len(self.COLORS)], -1)
+        # Movimento para o próximo quadro, quicando nas bordas
+        self._positions += self._velocities
+        for axis, limit in enumerate((self.width, self.height)):
+            out = (self._positions[:, axis] < 0) | (self._positions[:, axis] >= limit)
+            self._velocities[out, axis] *= -1
+            np.clip(self._positions[:, axis], 0, limit - 1, out=self._positions[:, axis])
+        self._index += 1
+        return True, frame
+
+    def get(self, prop):
+        return {cv2.CAP_PROP_FRAME_WIDTH: self.width, cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+                cv2.CAP_PROP_FPS: self.fps, cv2.CAP_PROP_POS_FRAMES: self._index,
+                cv2.CAP_PROP_BUFFERSIZE: 1}.get(prop, 0.0)
+
+    def set(self, prop, value):
+        if prop == cv2.CAP_PROP_FRAME_WIDTH:
+            self._resize(value, self.height)
+        elif prop == cv2.CAP_PROP_FRAME_HEIGHT:
+            self._resize(self.width, value)
+        elif prop == cv2.CAP_PROP_FPS:
+            self.fps = float(value)
+        else:
+            return False
+        return True
+
+    def getBackendName(self):
+        return "SYNTHETIC"
+
+    def release(self):
+        self._opened = False
+
+
+def open_camera(target, settings=CaptureSettings(), apis=None):
+    """Abre uma câmera (índice ou /dev/videoN) tentando as APIs em ordem e pede o modo de `settings`.
+
+    Sem `apis`, usa a ordem da plataforma (`PLATFORM_APIS`): V4L2 no Linux,
+    DirectShow/Media Foundation no Windows. Retorna o cap (fechado se nenhuma API abriu).
+    """
+    target = int(target) if str(target).isdigit() else target
+    apis = apis or PLATFORM_APIS.get(sys.platform, (cv2.CAP_ANY,))
+    cap = None
+    for api in apis:
+        cap = cv2.VideoCapture(target, api)
+        if cap.isOpened():
+            apply_settings(cap, settings)
+            return cap
+        cap.release()
+    return cap
+
+
+def open_source(source, settings=CaptureSettings()):
+    """Abre uma fonte (veja `parse_source`) com o modo pedido; retorna (cap, é_arquivo).
+
+    Arquivos são lidos como gravados (`settings` não se aplica); a fonte
+    sintética já entrega os quadros no ritmo de uma câmera.
+    """
+    backend, target = parse_source(source)
+    if backend == "file":
+        return cv2.VideoCapture(target), True
+    if backend == "synthetic":
+        return SyntheticCapture.from_spec(target, settings), False
+    apis = None if backend == "camera" else (CAPTURE_BACKENDS[backend],)
+    return open_camera(target, settings, apis), False
+
+
+def file_frame_interval(cap, realtime):
+    """Intervalo entre frames para reproduzir um arquivo no ritmo original (0 = o mais rápido possível)."""
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    return 1.0 / fps if realtime and fps > 0 else 0.0
+
+
+def add_capture_arguments(parser):
+    """Opções de linha de comando que definem o `CaptureSettings` (compartilhadas entre os scripts)."""
+    parser.add_argument("--width", type=int, default=0, help="Largura pedida à câmera (0 = padrão do driver)")
+    parser.add_argument("--height", type=int, default=0, help="Altura pedida à câmera")
+    parser.add_argument("--fps", type=float, default=0.0, help="FPS pedido à câmera")
+    parser.add_argument("--fourcc", default="", help="Formato pedido à câmera (ex: MJPG, YUYV)")
+    parser.add_argument("--buffer-size", type=int, default=0, help="Frames no buffer do driver (1 = menor latência)")
+
+
+def settings_from_args(args):
+    return CaptureSettings(width=args.width, height=args.height, fps=args.fps,
+                           fourcc=args.fourcc.upper(), buffer_size=args.buffer_size)
+
+
+class SourceOpener:
+    """Abre fontes de vídeo em uma thread em background, com novas tentativas.
+
+    Negociar o modo de uma câmera pode levar segundos; com o `SourceOpener` a
+    GUI aparece antes e acompanha o andamento por `state` (fonte -> texto).
+    `open_fn(fonte)` deve retornar (cap, intervalo) ou (None, 0.0); uma fonte
+    que falha é tentada `retries` vezes, com `retry_delay` s entre as
+    tentativas. As fontes são abertas uma por vez, na ordem pedida, e `poll`
+    devolve as que terminaram desde a última chamada como (fonte, cap ou
+    None, intervalo, segundos gastos).
+    """
+
+    def __init__(self, open_fn, retries=3, retry_delay=1.0):
+        self.open_fn = open_fn
+        self.retries = max(1, retries)
+        self.retry_delay = retry_delay
+        self.state = {}
+        self._pending = queue.Queue()
+        self._done = queue.Queue()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._busy = False
+
+    def open(self, source):
+        """Agenda a abertura de `source` (também serve para tentar de novo uma fonte que falhou)."""
+        self.state[source] = "aguardando"
+        with self._lock:
+            self._pending.put(source)
+            if not self._busy:
+                self._busy = True
+                threading.Thread(target=self._run, name="SourceOpener", daemon=True).start()
+
+    @property
+    def busy(self):
+        """Indica se ainda há fontes sendo abertas (ou na fila)."""
+        return self._busy
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if self._pending.empty():
+                    self._busy = False
+                    return
+                source = self._pending.get()
+            started = time.perf_counter()
+            cap, interval = None, 0.0
+            for attempt in range(1, self.retries + 1):
+                self.state[source] = "abrindo" if attempt == 1 else f"abrindo (tentativa {attempt}/{self.retries})"
+                try:
+                    cap, interval = self.open_fn(source)
+                except Exception as e: # Backend com erro conta como falha da tentativa
+                    print(f"Aviso: erro ao abrir a fonte {source}: {e}")
+                    cap = None
+                if cap is not None or self._stop.wait(self.retry_delay if attempt < self.retries else 0):
+                    break
+            if self._stop.is_set():
+                if cap is not None:
+                    cap.release() # Aberta depois do `close`: ninguém vai usar
+                break
+            self.state[source] = "aberta" if cap is not None else "falhou"
+            self._done.put((source, cap, interval, time.perf_counter() - started))
+        with self._lock:
+            self._busy = False
+
+    def poll(self):
+        """Fontes que terminaram de abrir (ou falharam) desde a última chamada."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._done.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def close(self):
+        """Cancela as aberturas pendentes e libera as fontes abertas que não foram retiradas por `poll`."""
+        self._stop.set()
+        for _, cap, _, _ in self.poll():
+            if cap is not None:
+                cap.release()
@@ -0,0 +1,129 @@
+"""Reaproveitamento das detecções quando o quadro quase não muda (câmeras fixas)."""
+import cv2
+import numpy as np
+
+from color_engine import kernel_margin
+from profiling import NULL_TIMER
+from roi_tracking import merge_windows
+
+
+class ChangeGate:
+    """Compara cada frame com o último processado e só refaz o que mudou.
+
+    O frame é reduzido por `sample` (média de blocos `sample` x `sample`,
+    barata) e comparado com a referência: cada bloco de `tile` x `tile` pixels
+    em que a maior diferença de cor passa de `threshold` é considerado alterado. Sem blocos alterados, o
+    resultado anterior é devolvido como está. Com poucos blocos alterados (até
+    `max_partial` do frame), só eles são reprocessados, com margem de contexto
+    para blur e morfologia, e a máscara corrigida passa de novo pela busca de
+    objetos. Caso contrário, ou quando os parâmetros mudam, ou a cada
+    `refresh_interval` frames, o frame inteiro é processado. O reprocessamento
+    parcial só é usado com escala de análise 1; nas outras escalas o gate
+    apenas decide entre reaproveitar e processar tudo.
+
+    Guarda estado entre frames, então deve ser usado com frames em sequência.
+    """
+
+    def __init__(self, engine, tile=32, sample=4, threshold=12, max_partial=0.5, refresh_interval=60):
+        self.engine = engine
+        self.sample = sample
+        self.tile = max(sample, tile // sample * sample) # Múltiplo de `sample`
+        self.threshold = threshold
+        self.max_partial = max_partial
+        self.refresh_interval = refresh_interval
+        self.counts = {"reused": 0, "partial": 0, "full": 0}
+        self.reset()
+
+    def reset(self):
+        """Força o processamento completo do próximo frame."""
+        self._reference = None
+        self._result = None
+        self._params = None
+        self._shape = None
+        self._frames_since_refresh = 0
+        self.last_action = None
+        self.last_changed = 1.0 # Fração de blocos alterados no último frame
+
+    def _thumbnail(self, frame):
+        h, w = frame.shape[:2]
+        size = (max(1, -(-w // self.sample)), max(1, -(-h // self.sample)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+    def _changed_tiles(self, thumb):
+        """Mapa booleano (linhas, colunas) dos blocos `tile` x `tile` alterados."""
+        diff = cv2.absdiff(thumb, self._reference)
+        if diff.ndim == 3:
+            diff = diff.max(axis=2)
+        k = self.tile // self.sample
+        h, w = diff.shape
+        rows, cols = -(-h // k), -(-w // k)
+        padded = np.zeros((rows * k, cols * k), dtype=diff.dtype)
+        padded[:h, :w] = diff
+        return padded.reshape(rows, k, cols, k).max(axis=(1, 3)) > self.threshold
+
+    def process(self, frame, params, timer=NULL_TIMER):
+        """Retorna um `DetectionResult` para o frame, reaproveitando o anterior quando possível."""
+        thumb = self._thumbnail(frame)
+        if (self._result is None or params != self._params or frame.shape != self._shape
+                or self._frames_since_refresh >= self.refresh_interval):
+            return self._full(frame, params, thumb, timer)
+
+        changed = self._changed_tiles(thumb)
+        self.last_changed = float(changed.mean())
+        self._frames_since_refresh += 1
+        if not changed.any():
+            self.counts["reused"] += 1
+            self.last_action = "reused"
+            return self._result
+        if self.last_changed > self.max_partial or self._result.scale != 1.0:
+            return self._full(frame, params, thumb, timer)
+        return self._partial(frame, params, thumb, changed, timer)
+
+    def _full(self, frame, params, thumb, timer):
+        result = self.engine.process(frame, params, timer)
+        self._reference = thumb
+        self._result = result
+        self._params = params
+        self._shape = frame.shape
+        self._frames_since_refresh = 0
+        self.last_changed = 1.0
+        self.counts["full"] += 1
+        self.last_action = "full"
+        return result
+
+    def _partial(self, frame, params, thumb, changed, timer):
+        height, width = frame.shape[:2]
+        margin = kernel_margin(params)
+        mask = self._result.mask.copy()
+        labels = None if self._result.labels is None else self._result.labels.copy()
+
+        # Blocos alterados + margem (pixels cuja máscara pode mudar), unidos quando se sobrepõem
+        rows, cols = np.nonzero(changed)
+        windows = merge_windows(
+            [max(0, c * self.tile - margin), max(0, r * self.tile - margin),
+             min(width, (c + 1) * self.tile + margin), min(height, (r + 1) * self.tile + margin)]
+            for r, c in zip(rows, cols))
+        for x0, y0, x1, y1 in windows:
+            # Processar com mais uma margem de contexto e copiar de volta só a janela
+            cx0, cy0 = max(0, x0 - margin), max(0, y0 - margin)
+            cx1, cy1 = min(width, x1 + margin), min(height, y1 + margin)
+            part_mask, part_labels, _ = self.engine.compute_mask(frame[cy0:cy1, cx0:cx1], params, timer)
+            inner = (slice(y0 - cy0, y1 - cy0), slice(x0 - cx0, x1 - cx0))
+            mask[y0:y1, x0:x1] = part_mask[inner]
+            if labels is not None and part_labels is not None:
+                labels[y0:y1, x0:x1] = part_labels[inner]
+
+        timer.start()
+        result = self.engine.find(mask, params, 1.0)
+        result.labels = labels
+        timer.mark("contours")
+
+        # A referência só avança nos blocos reprocessados, para que mudanças lentas acumulem
+        k = self.tile // self.sample
+        fine = np.kron(changed, np.ones((k, k), dtype=bool))[:thumb.shape[0], :thumb.shape[1]]
+        self._reference = self._reference.copy()
+        self._reference[fine] = thumb[fine]
+        self._result = result
+        self.counts["partial"] += 1
+        self.last_action = "partial"
+        return result
@@ -0,0 +1,533 @@
+"""Motor de detecção de cores independente da GUI (roda sem display)."""
+import threading
+import weakref
+from dataclasses import dataclass
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from buffers import BufferPool
+from profiling import NULL_TIMER
+
+# Espaços de cor suportados e o código de conversão a partir de BGR (None = sem conversão)
+CONVERSION_CODES = {
+    "HSV": cv2.COLOR_BGR2HSV,
+    "BGR": None,
+    "RGB": cv2.COLOR_BGR2RGB,
+    "Lab": cv2.COLOR_BGR2Lab,
+    "YCrCb": cv2.COLOR_BGR2YCrCb,
+}
+COLOR_SPACES = tuple(CONVERSION_CODES)
+HUE_MAX = 179 # Máximo do Matiz (Hue) no HSV do OpenCV
+
+
+@dataclass(frozen=True)
+class ColorRange:
+    """Faixa Min/Max dos três canais em um espaço de cor."""
+    lower: tuple
+    upper: tuple
+    space: str = "HSV"
+    name: str = ""
+
+    @classmethod
+    def from_preset(cls, color_data):
+        """Cria a faixa a partir de um dict no formato de `color_presets`."""
+        return cls(
+            lower=(int(color_data["ch1_min"]), int(color_data["ch2_min"]), int(color_data["ch3_min"])),
+            upper=(int(color_data["ch1_max"]), int(color_data["ch2_max"]), int(color_data["ch3_max"])),
+            space=color_data.get("space", "HSV"),
+            name=color_data.get("name", ""),
+        )
+
+    def wraps_hue(self):
+        """Indica o caso de wrap-around do Matiz (ex: vermelho 170-10)."""
+        return self.space == "HSV" and self.lower[0] > self.upper[0]
+
+
+@dataclass(frozen=True)
+class FilterParams:
+    """Snapshot imutável dos parâmetros usados para processar um frame."""
+    ranges: tuple = ()
+    color_space: str = "HSV"
+    blur_size: int = 0
+    erosion_size: int = 0
+    dilation_size: int = 0
+    min_contour_area: int = 500
+    process_scale: float = 1.0 # Fração da resolução usada na análise (ex: 0.5, 0.25)
+    analysis: str = "contours" # "contours" (findContours) ou "components" (connectedComponentsWithStats)
+
+
+@dataclass
+class DetectionResult:
+    """Saída do motor: máscara final, contornos e estatísticas por objeto."""
+    mask: np.ndarray
+    contours: list
+    areas: np.ndarray     # (N,) área de cada objeto em pixels
+    boxes: np.ndarray     # (N, 4) caixas x, y, w, h
+    centroids: np.ndarray # (N, 2) centros cx, cy (NaN se o momento m00 for zero)
+    space: str
+    labels: np.ndarray = None # Índice+1 da faixa de cada pixel (antes da morfologia); None com uma única faixa
+    scale: float = 1.0 # Escala de `mask`/`labels`; contornos e estatísticas já estão na resolução original
+
+    @property
+    def count(self):
+        return len(self.areas)
+
+    def object_labels(self):
+        """Rótulo (posição em `params.ranges` + 1) de cada objeto: a faixa mais frequente dentro da caixa.
+
+        Com uma única faixa não há imagem de rótulos e todos os objetos recebem 1.
+        As contagens saem de uma imagem integral por faixa, lida nos cantos de
+        todas as caixas de uma vez: o custo depende do número de faixas, não
+        do número de objetos.
+        """
+        if self.labels is None:
+            return np.ones(self.count, dtype=np.int64)
+        height, width = self.labels.shape[:2]
+        boxes = np.round(self.boxes * self.scale).astype(np.int64)
+        x0 = boxes[:, 0].clip(0, width)
+        y0 = boxes[:, 1].clip(0, height)
+        x1 = (x0 + np.maximum(boxes[:, 2], 1)).clip(0, width)
+        y1 = (y0 + np.maximum(boxes[:, 3], 1)).clip(0, height)
+        result = np.zeros(self.count, dtype=np.int64)
+        best = np.zeros(self.count, dtype=np.int64)
+        for label in range(1, int(self.labels.max()) + 1 if self.count else 1):
+            sums = cv2.integral(np.equal(self.labels, label).view(np.uint8), sdepth=cv2.CV_32S)
+            counts = sums[y1, x1] - sums[y0, x1] - sums[y1, x0] + sums[y0, x0]
+            # Empates ficam com a faixa de menor índice (pixels sem faixa são ignorados)
+            better = counts > best
+            result[better] = label
+            best[better] = counts[better]
+        return result
+
+    def full_mask(self, shape):
+        """Máscara na resolução original `shape` (redimensionada se a análise foi reduzida)."""
+        if self.mask.shape[:2] == tuple(shape[:2]):
+            return self.mask
+        return cv2.resize(self.mask, (shape[1], shape[0]), interpolation=cv2.INTER_NEAREST)
+
+
+def convert_color(frame, space, dst=None):
+    """Converte um frame BGR para o espaço de cor indicado (em `dst`, se dado)."""
+    code = CONVERSION_CODES[space]
+    return frame if code is None else cv2.cvtColor(frame, code, dst=dst)
+
+
+def scale_kernel(size, scale):
+    """Ajusta um tamanho de kernel (em pixels da resolução original) para a escala de análise."""
+    return max(1, int(round(size * scale))) if size > 0 else 0
+
+
+def kernel_margin(params):
+    """Pixels de vizinhança (na resolução original) que influenciam a máscara final de um pixel.
+
+    Soma os raios do blur, da erosão e da dilatação; regiões processadas
+    separadamente precisam dessa margem de contexto para sair iguais ao frame inteiro.
+    """
+    blur = params.blur_size + (1 - params.blur_size % 2) if params.blur_size > 0 else 0
+    return blur // 2 + max(params.erosion_size, 0) + max(params.dilation_size, 0) + 1
+
+
+def blur_frame(image, blur_size, dst=None):
+    """Aplica Gaussian Blur (kernel forçado a ímpar); 0 desativa."""
+    if blur_size <= 0:
+        return image
+    if blur_size % 2 == 0: blur_size += 1 # Deve ser ímpar
+    return cv2.GaussianBlur(image, (blur_size, blur_size), 0, dst=dst)
+
+
+def _buffer(pool, name, shape, dtype=np.uint8):
+    """Buffer do pool para `dst=`, ou None (o OpenCV aloca) sem pool."""
+    return None if pool is None else pool.get(name, shape, dtype)
+
+
+def _array(pool, name, shape, dtype=np.uint8):
+    """Buffer do pool, ou um array novo sem pool (para saídas `out=` do NumPy)."""
+    return np.empty(shape, dtype=dtype) if pool is None else pool.get(name, shape, dtype)
+
+
+def _copy(pool, name, array):
+    """Cópia de `array` em um buffer do pool (ou em um array novo sem pool)."""
+    copy = _array(pool, name, array.shape, array.dtype)
+    np.copyto(copy, array)
+    return copy
+
+
+@lru_cache(maxsize=256)
+def range_bounds(color_range):
+    """Limites (inferior, superior) da faixa como arrays, criados uma vez por faixa.
+
+    No wrap-around do Matiz retorna dois pares: (0 a Máx Matiz) e (Mín Matiz a 179).
+    """
+    lower, upper = np.array(color_range.lower), np.array(color_range.upper)
+    if color_range.wraps_hue():
+        bounds = ((np.array([0, lower[1], lower[2]]), upper), (lower, np.array([HUE_MAX, upper[1], upper[2]])))
+    else:
+        bounds = ((lower, upper),)
+    for pair in bounds:
+        for array in pair:
+            array.flags.writeable = False # Compartilhados entre chamadas
+    return bounds
+
+
+def range_mask(image, color_range, pool=None, name="range"):
+    """Máscara binária de uma faixa, tratando o wrap-around do Matiz."""
+    bounds = range_bounds(color_range)
+    shape = image.shape[:2]
+    mask = cv2.inRange(image, *bounds[0], dst=_buffer(pool, name, shape))
+    if len(bounds) > 1:
+        extra = cv2.inRange(image, *bounds[1], dst=_buffer(pool, name + "_wrap", shape))
+        mask = cv2.bitwise_or(mask, extra, dst=mask)
+    return mask
+
+
+class RangeLUT:
+    """Tabelas de bits por canal que avaliam várias faixas em uma única passada.
+
+    Cada canal tem uma tabela de 256 entradas em que o bit j indica se o valor
+    está dentro da faixa j. O AND das três tabelas dá o conjunto de faixas que
+    contém cada pixel, então o custo por frame não depende do número de faixas
+    (até `MAX_RANGES`). O bit menos significativo define o rótulo do pixel.
+    """
+    MAX_RANGES = 31
+
+    def __init__(self, entries):
+        """`entries` é uma sequência de (rótulo, ColorRange); rótulos vão de 1 a 255."""
+        self.entries = tuple(entries)
+        if len(self.entries) > self.MAX_RANGES:
+            raise ValueError(f"No máximo {self.MAX_RANGES} faixas por tabela.")
+        self.dtype = np.uint8 if len(self.entries) <= 8 else np.int32
+        values = np.arange(256)
+        tables = np.zeros((3, 256), dtype=np.int64)
+        for bit, (_, color_range) in enumerate(self.entries):
+            for ch in range(3):
+                inside = (values >= color_range.lower[ch]) & (values <= color_range.upper[ch])
+                if ch == 0 and color_range.wraps_hue():
+                    inside = (values <= color_range.upper[0]) | ((values >= color_range.lower[0]) & (values <= HUE_MAX))
+                tables[ch, inside] |= 1 << bit
+        self.tables = [table.astype(self.dtype).reshape(1, 256) for table in tables]
+
+        # Rótulo por posição do bit menos significativo + 1 (0 = nenhuma faixa)
+        bit_labels = np.zeros(256, dtype=np.uint8)
+        bit_labels[1:len(self.entries) + 1] = [label for label, _ in self.entries]
+        self.bit_labels = bit_labels.reshape(1, 256)
+        if self.dtype == np.uint8:
+            # Para até 8 faixas o rótulo sai direto de uma tabela indexada pelo byte de bits
+            byte_values = np.arange(256)
+            lowest = np.zeros(256, dtype=np.int64)
+            nonzero = byte_values > 0
+            lowest[nonzero] = np.log2(byte_values[nonzero] & -byte_values[nonzero]).astype(np.int64) + 1
+            self.byte_labels = bit_labels[lowest].reshape(1, 256)
+
+    def apply(self, image, pool=None, name="lut"):
+        """Retorna (máscara 0/255, imagem de rótulos uint8) para uma imagem de 3 canais.
+
+        Com `pool` (um `BufferPool`) todos os temporários e as saídas são
+        buffers reaproveitados, com nomes prefixados por `name`.
+        """
+        shape = image.shape[:2]
+        # extractChannel é bem mais barato que cv2.split para frames grandes
+        c1, c2, c3 = (cv2.extractChannel(image, ch, dst=_buffer(pool, f"{name}_channel{ch}", shape)) for ch in range(3))
+        bits = cv2.LUT(c1, self.tables[0], dst=_buffer(pool, name + "_bits", shape, self.dtype))
+        plane = cv2.LUT(c2, self.tables[1], dst=_buffer(pool, name + "_plane", shape, self.dtype))
+        bits = cv2.bitwise_and(bits, plane, dst=bits)
+        plane = cv2.LUT(c3, self.tables[2], dst=plane)
+        bits = cv2.bitwise_and(bits, plane, dst=bits)
+        mask = cv2.compare(bits, 0, cv2.CMP_NE, dst=_buffer(pool, name + "_mask", shape))
+        labels = _buffer(pool, name + "_labels", shape)
+        if self.dtype == np.uint8:
+            return mask, cv2.LUT(bits, self.byte_labels, dst=labels)
+        # Isola o bit menos significativo e lê sua posição no expoente do float32
+        lowest = np.bitwise_and(bits, np.negative(bits, out=plane), out=plane)
+        as_float = _array(pool, name + "_float", shape, np.float32)
+        np.copyto(as_float, lowest, casting="unsafe")
+        exponent = np.right_shift(as_float.view(np.int32), 23, out=lowest)
+        np.subtract(exponent, 126, out=exponent)
+        np.clip(exponent, 0, 255, out=exponent)
+        position = _array(pool, name + "_position", shape)
+        np.copyto(position, exponent, casting="unsafe")
+        return mask, cv2.LUT(position, self.bit_labels, dst=labels)
+
+
+@lru_cache(maxsize=64)
+def morph_kernel(size):
+    """Kernel quadrado `size` x `size`, criado uma vez por tamanho."""
+    kernel = np.ones((size, size), np.uint8)
+    kernel.flags.writeable = False
+    return kernel
+
+
+def apply_morphology(mask, erosion_size, dilation_size, pool=None):
+    """Erosão seguida de dilatação com kernels quadrados; 0 desativa cada etapa.
+
+    Com `pool`, a erosão que ainda vai ser dilatada é escrita em um buffer
+    reaproveitado; a saída da última etapa é sempre um array novo.
+    """
+    if erosion_size > 0:
+        dst = _buffer(pool, "eroded", mask.shape) if dilation_size > 0 else None
+        mask = cv2.erode(mask, morph_kernel(erosion_size), dst=dst, iterations=1)
+    if dilation_size > 0:
+        mask = cv2.dilate(mask, morph_kernel(dilation_size), iterations=1)
+    return mask
+
+
+def contour_stats(contours):
+    """Calcula áreas, caixas e centros de uma lista de contornos."""
+    count = len(contours)
+    areas = np.empty(count, dtype=np.float64)
+    boxes = np.empty((count, 4), dtype=np.int32)
+    centroids = np.full((count, 2), np.nan, dtype=np.float64)
+    for i, cnt in enumerate(contours):
+        M = cv2.moments(cnt)
+        areas[i] = abs(M["m00"])
+        boxes[i] = cv2.boundingRect(cnt)
+        if M["m00"] != 0:
+            centroids[i] = (M["m10"] / M["m00"], M["m01"] / M["m00"])
+    return areas, boxes, centroids
+
+
+def group_ranges(ranges):
+    """Agrupa as faixas por espaço de cor como {espaço: ((rótulo, faixa), ...)}.
+
+    O rótulo de cada faixa é sua posição em `ranges` + 1.
+    """
+    groups = {}
+    for label, color_range in enumerate(ranges, 1):
+        space = color_range.space if color_range.space in CONVERSION_CODES else "HSV"
+        groups.setdefault(space, []).append((label, color_range))
+    return {space: tuple(entries) for space, entries in groups.items()}
+
+
+def fill_unlabeled(labels, new_labels, pool=None):
+    """Copia `new_labels` para os pixels ainda sem rótulo (0) de `labels`, no lugar."""
+    unlabeled = np.equal(labels, 0, out=_array(pool, "unlabeled", labels.shape, np.bool_))
+    np.copyto(labels, new_labels, where=unlabeled)
+
+
+def merge_masks(parts, shape, pool=None):
+    """Une as (máscara, rótulos) de cada espaço; rótulos de espaços anteriores têm prioridade.
+
+    As entradas não são modificadas. Sem partes, retorna uma máscara vazia do tamanho `shape`.
+    """
+    if not parts:
+        mask = _array(pool, "merged", shape[:2])
+        mask.fill(0)
+        return mask, None
+    mask, labels = parts[0]
+    if len(parts) > 1:
+        mask, labels = _copy(pool, "merged", mask), _copy(pool, "merged_labels", labels)
+        for space_mask, space_labels in parts[1:]:
+            cv2.bitwise_or(mask, space_mask, dst=mask)
+            fill_unlabeled(labels, space_labels, pool)
+    return mask, labels
+
+
+class ColorFilterEngine:
+    """Pipeline conversão -> blur -> máscara -> morfologia -> contornos, sem Tkinter."""
+
+    LUT_CACHE_SIZE = 32
+
+    def __init__(self, pooled=True):
+        self._luts = {} # Tabelas compiladas, indexadas pelas faixas que as geraram
+        # Temporários por frame vêm de um `BufferPool` por thread (o pipeline chama de várias)
+        self.pooled = pooled
+        # Os pools ficam no `threading.local`; o conjunto fraco some com eles quando a thread termina
+        self._local = threading.local()
+        self._pools = weakref.WeakSet()
+
+    def buffers(self):
+        """`BufferPool` da thread atual, ou None com `pooled=False`."""
+        if not self.pooled:
+            return None
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            pool = self._local.pool = BufferPool()
+            self._pools.add(pool)
+        return pool
+
+    def buffer_stats(self):
+        """Soma de `BufferPool.stats` das threads vivas; `allocations` estável = sem alocação por frame."""
+        totals = {"pools": len(self._pools), "buffers": 0, "bytes": 0, "allocations": 0, "outputs": 0}
+        for pool in list(self._pools):
+            for key, value in pool.stats().items():
+                totals[key] += value
+        return totals
+
+    def process(self, frame, params, timer=NULL_TIMER):
+        """Processa um frame BGR com um snapshot `FilterParams` e retorna um `DetectionResult`.
+
+        Cada faixa é avaliada no seu próprio espaço de cor; o frame é convertido
+        (e suavizado) no máximo uma vez por espaço distinto. `timer` (um
+        `profiling.FrameTimer`) recebe o tempo de cada etapa.
+        """
+        timer.start()
+        mask, labels, scale = self.compute_mask(frame, params, timer)
+        result = self.find(mask, params, scale)
+        result.labels = labels
+        timer.mark("contours")
+        return result
+
+    def compute_mask(self, frame, params, timer=NULL_TIMER):
+        """Etapas até a morfologia; retorna (máscara final, rótulos, escala efetiva).
+
+        Os temporários usam o pool da thread; máscara e rótulos retornados são
+        sempre arrays próprios, que podem ser guardados entre frames.
+        """
+        pool = self.buffers()
+        frame, scale = self.scale_frame(frame, params.process_scale, pool)
+        if scale != 1.0:
+            timer.mark("scale")
+        # Kernels são definidos em pixels da resolução original
+        blur_size = scale_kernel(params.blur_size, scale)
+        erosion_size = scale_kernel(params.erosion_size, scale)
+        dilation_size = scale_kernel(params.dilation_size, scale)
+
+        groups = group_ranges(params.ranges)
+        images = {} # Frame convertido + suavizado por espaço, reaproveitado neste frame
+        parts = []
+        for range_space, entries in groups.items():
+            image = self.prepare_image(frame, range_space, blur_size, images, timer, pool)
+            parts.append(self.build_mask(image, entries, with_labels=len(groups) > 1, pool=pool, name=range_space))
+            timer.mark("mask")
+        mask, labels = merge_masks(parts, frame.shape, pool)
+
+        mask = apply_morphology(mask, erosion_size, dilation_size, pool)
+        if pool is not None:
+            mask, labels = pool.detach(mask), pool.detach(labels)
+        timer.mark("morphology")
+        return mask, labels, scale
+
+    def scale_frame(self, frame, scale, pool=None):
+        """Reduz o frame para a escala de análise; retorna (frame, escala efetiva).
+
+        Com `pool` o frame reduzido é um buffer reaproveitado (válido até o próximo frame da thread).
+        """
+        if 0 < scale < 1:
+            h, w = frame.shape[:2]
+            # Mesmo arredondamento do OpenCV para o tamanho de saída com fx/fy
+            dst = _buffer(pool, "scaled", (int(round(h * scale)), int(round(w * scale))) + frame.shape[2:], frame.dtype)
+            return cv2.resize(frame, None, dst=dst, fx=scale, fy=scale, interpolation=cv2.INTER_AREA), scale
+        return frame, 1.0
+
+    def find(self, mask, params, scale):
+        """Extrai os objetos da máscara final conforme `params.analysis`."""
+        space = params.color_space if params.color_space in CONVERSION_CODES else "HSV" # Fallback
+        if params.analysis == "components":
+            return self.find_components(mask, params.min_contour_area, space, scale)
+        return self.find_objects(mask, params.min_contour_area, space, scale)
+
+    def prepare_image(self, frame, space, blur_size, images, timer=NULL_TIMER, pool=None):
+        """Converte e suaviza o frame para o espaço, usando `images` como cache do frame atual."""
+        image = images.get(space)
+        if image is None:
+            converted = _buffer(pool, "converted_" + space, frame.shape) if CONVERSION_CODES[space] is not None else None
+            image = convert_color(frame, space, converted)
+            timer.mark("conversion")
+            blurred = _buffer(pool, "blurred_" + space, image.shape) if blur_size > 0 else None
+            image = images[space] = blur_frame(image, blur_size, blurred)
+            timer.mark("blur")
+        return image
+
+    def build_mask(self, image, entries, with_labels=False, pool=None, name="mask"):
+        """Gera (máscara, rótulos) para faixas de um mesmo espaço; várias faixas usam tabelas pré-compiladas.
+
+        Com `pool`, as saídas são buffers do pool com nomes prefixados por `name`.
+        """
+        shape = image.shape[:2]
+        if not entries:
+            mask = _array(pool, name, shape)
+            mask.fill(0)
+            return mask, (np.zeros_like(mask) if with_labels else None)
+        if len(entries) == 1 and not entries[0][1].wraps_hue():
+            # inRange direto é mais rápido para uma faixa; o rótulo só é gerado se pedido
+            label, color_range = entries[0]
+            mask = range_mask(image, color_range, pool, name)
+            if not with_labels:
+                return mask, None
+            return mask, np.bitwise_and(mask, np.uint8(label), out=_array(pool, name + "_labels", shape))
+
+        mask = labels = None
+        for start in range(0, len(entries), RangeLUT.MAX_RANGES):
+            lut = self.get_lut(entries[start:start + RangeLUT.MAX_RANGES])
+            chunk_mask, chunk_labels = lut.apply(image, pool, f"{name}_{start}")
+            if mask is None:
+                mask, labels = chunk_mask, chunk_labels
+            else:
+                # Rótulos de tabelas anteriores têm prioridade
+                fill_unlabeled(labels, chunk_labels, pool)
+                cv2.bitwise_or(mask, chunk_mask, dst=mask)
+        return mask, labels
+
+    def get_lut(self, entries):
+        """Retorna a tabela compilada para as faixas, compilando só quando elas mudam."""
+        lut = self._luts.get(entries)
+        if lut is None:
+            if len(self._luts) >= self.LUT_CACHE_SIZE:
+                self._luts.clear()
+            lut = self._luts[entries] = RangeLUT(entries)
+        return lut
+
+    def find_objects(self, mask, min_area, space, scale=1.0):
+        """Encontra contornos externos na máscara e filtra por área mínima.
+
+        Com `scale` < 1 a máscara está reduzida: a área mínima é convertida para
+        a escala da máscara e os resultados são mapeados de volta para a
+        resolução original.
+        """
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        scaled_min_area = min_area * scale * scale
+        contours = [cnt for cnt in contours if cv2.contourArea(cnt) > scaled_min_area]
+        areas, boxes, centroids = contour_stats(contours)
+        return self.make_result(mask, contours, areas, boxes, centroids, space, scale)
+
+    def find_components(self, mask, min_area, space, scale=1.0):
+        """Alternativa vetorizada a `find_objects` via `connectedComponentsWithStats`.
+
+        Áreas, caixas e centros saem como arrays de uma única chamada, sem
+        laço Python por objeto; útil com milhares de manchas pequenas. A área
+        é a contagem de pixels do componente e nenhum contorno é gerado.
+        """
+        components = _buffer(self.buffers(), "components", mask.shape, np.int32) # Imagem de índices, descartada
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(mask, components, connectivity=8)
+        # O componente 0 é o fundo
+        areas = stats[1:, cv2.CC_STAT_AREA].astype(np.float64)
+        keep = areas > min_area * scale * scale
+        boxes = np.ascontiguousarray(stats[1:, :4][keep], dtype=np.int32)
+        return self.make_result(mask, [], areas[keep], boxes, centroids[1:][keep], space, scale)
+
+    def make_result(self, mask, contours, areas, boxes, centroids, space, scale):
+        """Monta o `DetectionResult`, mapeando as medidas de volta à resolução original se reduzida."""
+        if scale != 1.0:
+            inv = 1.0 / scale
+            offset = 0.5 * inv - 0.5 # Centro do pixel reduzido na grade original
+            contours = [np.round(cnt * inv + offset).astype(np.int32) for cnt in contours]
+            areas = areas * (inv * inv)
+            boxes = np.round(boxes * inv).astype(np.int32)
+            centroids = centroids * inv + offset
+        return DetectionResult(mask, contours, areas, boxes, centroids, space, scale=scale)
+
+
+def draw_detections(image, result, show_contours=True, show_boxes=True, show_centers=True, scale=1.0):
+    """Desenha contornos (verde), caixas (azul) e centros (vermelho) sobre a imagem.
+
+    `scale` converte as coordenadas do resultado para as da imagem (ex: exibição reduzida).
+    """
+    if show_contours and result.contours:
+        contours = result.contours
+        if scale != 1.0:
+            contours = [np.round(cnt * scale).astype(np.int32) for cnt in contours]
+        cv2.drawContours(image, contours, -1, (0, 255, 0), 2)
+    if show_boxes:
+        for x, y, w, h in np.round(result.boxes * scale).astype(np.int64):
+            cv2.rectangle(image, (int(x), int(y)), (int(x + w), int(y + h)), (255, 0, 0), 2)
+    if show_centers:
+        for cX, cY in result.centroids * scale:
+            if not np.isnan(cX):
+                cv2.circle(image, (int(cX), int(cY)), 5, (0, 0, 255), -1)
+    return image
+
+
+def apply_mask(frame, mask):
+    """Mantém apenas os pixels do frame cobertos pela máscara."""
+    return cv2.bitwise_and(frame, frame, mask=mask)
@@ -0,0 +1,140 @@
+"""Exibição dos painéis da GUI reaproveitando buffers e PhotoImages entre frames."""
+import cv2
+import numpy as np
+from PIL import Image, ImageTk
+
+from color_engine import draw_detections
+from profiling import NULL_TIMER
+from tracker import draw_tracks
+
+PANELS = ("original", "mask", "result")
+
+
+class FrameDisplay:
+    """Pinta original, máscara e resultado em Labels Tk sem recriar imagens a cada frame.
+
+    O frame é reduzido uma única vez para o tamanho de exibição e os três
+    painéis são compostos nessa resolução (desenhos, máscara e recorte). Cada
+    painel tem um buffer NumPy pré-alocado que compartilha memória com uma
+    imagem PIL (`Image.frombuffer`), e um `ImageTk.PhotoImage` persistente que
+    é atualizado com `paste`. Painéis não visíveis (`winfo_viewable`) não são
+    convertidos, e a máscara só é repintada quando muda.
+    """
+
+    def __init__(self, labels, width=480):
+        self.labels = labels # nome do painel -> Label
+        self.width = width
+        self.size = None # (largura, altura) de exibição atual
+        self.painted = 0 # Painéis atualizados
+        self.skipped = 0 # Painéis pulados (ocultos ou sem mudança)
+        self._last = None
+
+    def display_size(self, shape):
+        """Tamanho de exibição para um frame de `shape`, mantendo a proporção."""
+        h, w = shape[:2]
+        return self.width, max(1, int(round(self.width * h / float(w)))) if w > 0 else self.width
+
+    def _allocate(self, size):
+        w, h = size
+        self.size = size
+        self._small = np.empty((h, w, 3), dtype=np.uint8) # Frame reduzido (BGR), sem desenhos
+        self._drawn = np.empty_like(self._small)
+        self._masked = np.empty_like(self._small)
+        self._scratch_mask = np.empty((h, w), dtype=np.uint8)
+        self._buffers = {
+            "original": np.empty((h, w, 4), dtype=np.uint8),
+            "mask": np.zeros((h, w), dtype=np.uint8),
+            "result": np.empty((h, w, 4), dtype=np.uint8),
+        }
+        self._mask_valid = False
+        self._photos = {}
+        for name, buffer in self._buffers.items():
+            mode = "L" if buffer.ndim == 2 else "RGBA"
+            # frombuffer com esses modos compartilha a memória do array: sem cópia por frame
+            image = Image.frombuffer(mode, size, buffer, "raw", mode, 0, 1)
+            photo = ImageTk.PhotoImage(mode, size, width=w, height=h)
+            self._photos[name] = (image, photo)
+            label = self.labels[name]
+            label.config(image=photo)
+            label.image = photo # Manter referência!
+
+    def _visible(self, name):
+        try:
+            return bool(self.labels[name].winfo_viewable())
+        except Exception:
+            return True
+
+    def _paste(self, name):
+        image, photo = self._photos[name]
+        photo.paste(image)
+        self.painted += 1
+
+    def show(self, frame, result, show_contours=True, show_boxes=True, show_centers=True, tracks=None,
+             overlay=None, timer=NULL_TIMER):
+        """Atualiza os painéis com o frame BGR e o `DetectionResult` correspondente.
+
+        `overlay` é uma lista opcional de linhas de texto escritas no painel
+        original; `timer` recebe os tempos de composição ("drawing") e de
+        pintura ("display").
+        """
+        key = (id(frame), id(result), show_contours, show_boxes, show_centers, id(tracks), id(overlay))
+        if key == self._last:
+            self.skipped += len(PANELS) # Mesmo frame e resultado já exibidos
+            return
+        self._last = key
+
+        timer.start()
+        size = self.display_size(frame.shape)
+        if size != self.size:
+            self._allocate(size)
+        visible = {name: self._visible(name) for name in PANELS}
+        self.skipped += len(PANELS) - sum(visible.values())
+        if not any(visible.values()):
+            return
+
+        # Reduzir uma vez; a máscara sai direto da resolução de análise
+        cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        if visible["mask"] or visible["result"]:
+            cv2.resize(result.mask, size, dst=self._scratch_mask, interpolation=cv2.INTER_NEAREST)
+
+        changed = []
+        if visible["original"]:
+            scale = size[0] / float(frame.shape[1])
+            np.copyto(self._drawn, self._small)
+            draw_detections(self._drawn, result, show_contours, show_boxes, show_centers, scale=scale)
+            if tracks is not None:
+                draw_tracks(self._drawn, tracks, scale=scale)
+            if overlay:
+                draw_overlay(self._drawn, overlay)
+            cv2.cvtColor(self._drawn, cv2.COLOR_BGR2RGBA, dst=self._buffers["original"])
+            changed.append("original")
+
+        if visible["mask"]:
+            if self._mask_valid and np.array_equal(self._scratch_mask, self._buffers["mask"]):
+                self.skipped += 1
+            else:
+                np.copyto(self._buffers["mask"], self._scratch_mask)
+                self._mask_valid = True
+                changed.append("mask")
+
+        if visible["result"]:
+            self._masked.fill(0)
+            cv2.copyTo(self._small, self._scratch_mask, self._masked)
+            cv2.cvtColor(self._masked, cv2.COLOR_BGR2RGBA, dst=self._buffers["result"])
+            changed.append("result")
+        timer.mark("drawing")
+
+        for name in changed:
+            self._paste(name)
+        timer.mark("display")
+
+
+def draw_overlay(image, lines, origin=(6, 14), line_height=14):
+    """Escreve linhas de texto com fundo escuro no canto superior esquerdo."""
+    x, y = origin
+    width = max(len(line) for line in lines) * 7 + 8
+    region = image[max(0, y - 12):y - 12 + line_height * len(lines) + 4, max(0, x - 4):x - 4 + width]
+    region //= 3 # Escurecer o fundo para legibilidade
+    for i, line in enumerate(lines):
+        cv2.putText(image, line, (x, y + i * line_height), cv2.FONT_HERSHEY_PLAIN, 0.9, (255, 255, 255), 1, cv2.LINE_AA)
+    return image
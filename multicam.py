@@ -0,0 +1,358 @@
+"""Várias câmeras (ou vídeos) processadas ao mesmo tempo com um pool de workers compartilhado.
+
+Exemplos:
+    python multicam.py 0 1 -o deteccoes.jsonl --range 40,50,50 85,255,255
+    python multicam.py --config estacao.json -o deteccoes.csv
+    python multicam.py gravacao1.mp4 gravacao2.mp4 --presets pecas.json --fast
+    python multicam.py 0 1 --width 1280 --height 720 --fps 30 --fourcc MJPG --presets pecas.json
+    python multicam.py synthetic synthetic:1920x1080@60 --presets pecas.json   # sem câmeras
+
+O arquivo de --config lista as câmeras, cada uma com parâmetros e presets próprios:
+    {"cameras": [
+        {"source": "0", "name": "esteira", "presets": "pecas.json", "blur": 5, "fourcc": "MJPG", "fps": 60},
+        {"source": "rtsp://...", "name": "saida", "presets": [{"name": "Verde", ...}], "scale": 0.5}
+    ]}
+As chaves omitidas usam as opções da linha de comando; width, height, fps, fourcc e
+buffer_size definem o modo pedido à câmera.
+"""
+import argparse
+import dataclasses
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from batch import add_filter_arguments, params_from_args
+from capture import (CAPTURE_FIELDS, CaptureSettings, FrameGrabber, add_capture_arguments, capture_mode,
+                     describe_mode, file_frame_interval, open_source, settings_from_args)
+from color_engine import ColorFilterEngine, ColorRange
+from sinks import AsyncSink, make_records, open_sink
+
+# Chaves de câmera em --config que sobrepõem campos do FilterParams da linha de comando
+CONFIG_FIELDS = {"blur": "blur_size", "erosion": "erosion_size", "dilation": "dilation_size",
+                 "min_area": "min_contour_area", "scale": "process_scale", "analysis": "analysis", "space": "color_space"}
+
+
+class CameraStream:
+    """Uma fonte de vídeo com sua thread de captura, seu `FilterParams` e sua lista de presets.
+
+    `params` pode ser trocado a qualquer momento (vale para o próximo frame
+    enviado); None pausa o processamento da câmera. `presets` guarda a lista
+    no formato da aba Multi-Cor, para quem edita os parâmetros (a GUI).
+    Uma exceção no processamento de um frame fica em `error` (até quem a
+    exibe limpá-la) e é contada em `errors`; as outras câmeras seguem.
+    """
+
+    def __init__(self, name, cap, params=None, presets=(), is_file=False, frame_interval=0.0):
+        self.name = name
+        self.cap = cap
+        self.params = params
+        self.presets = list(presets)
+        self.is_file = is_file
+        self.mode = capture_mode(cap) # Modo negociado com a fonte (resolução, FPS, formato)
+        self.grabber = FrameGrabber(cap, stop_on_failure=is_file, frame_interval=frame_interval)
+        self.in_flight = 0
+        self.submitted = 0
+        self.processed = 0
+        self.stale = 0 # Resultados que chegaram depois de um frame mais novo (descartados)
+        self.latest = None # (índice, timestamp, frame, resultado) mais recente
+        self.process_time = 0.0 # Média móvel do tempo de processamento no worker (s)
+        self.error = None # Última exceção do processamento ainda não informada
+        self.errors = 0
+
+    @classmethod
+    def open(cls, source, name=None, params=None, presets=(), realtime=True, settings=CaptureSettings()):
+        """Abre uma fonte (veja `capture.parse_source`) pedindo o modo `settings`; arquivos são lidos no ritmo original se `realtime`."""
+        cap, is_file = open_source(source, settings)
+        if not cap.isOpened():
+            raise IOError(f"Não foi possível abrir a fonte '{source}'.")
+        interval = file_frame_interval(cap, realtime) if is_file else 0.0
+        return cls(name or source, cap, params, presets, is_file, interval)
+
+    @property
+    def finished(self):
+        """Arquivo lido até o fim e sem frames pendentes."""
+        return (self.is_file and not self.grabber.running and not self.grabber.has_frame
+                and self.in_flight == 0)
+
+    def close(self):
+        self.grabber.stop()
+        self.cap.release()
+
+
+class MultiCameraProcessor:
+    """Processa várias `CameraStream` com um pool de workers compartilhado e escalonamento justo.
+
+    Cada câmera tem no máximo `per_camera` frames em processamento (por
+    padrão, os workers divididos igualmente, no mínimo 1). Quando há worker
+    livre, as câmeras são percorridas em rodízio a partir da seguinte à
+    última atendida, e cada uma recebe no máximo uma vaga por rodada: uma
+    câmera lenta (alta resolução, muitas faixas) ocupa só as suas vagas e não
+    atrasa as outras. Como cada grabber guarda só o frame mais recente, a
+    câmera que não é atendida a tempo perde frames (`grabber.dropped`) em vez
+    de acumular atraso.
+
+    `poll` deve ser chamado periodicamente (pela GUI ou por `run`): despacha
+    frames novos e devolve os resultados prontos.
+    """
+
+    def __init__(self, engine, workers=None, per_camera=None):
+        self.engine = engine
+        self.workers = workers or os.cpu_count() or 1
+        self.per_camera = per_camera
+        self.streams = []
+        self.started = None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="CameraWorker")
+        self._cond = threading.Condition()
+        self._completed = deque() # (câmera, pacote, resultado, duração, erro)
+        self._in_flight = 0
+        self._next = 0 # Próxima câmera do rodízio
+
+    def add(self, stream):
+        self.streams.append(stream)
+        if self.started is not None:
+            stream.grabber.start()
+        return stream
+
+    def start(self):
+        self.started = time.time()
+        for stream in self.streams:
+            stream.grabber.start()
+        return self
+
+    def quota(self):
+        return self.per_camera or max(1, self.workers // max(1, len(self.streams)))
+
+    def dispatch(self):
+        """Envia frames novos aos workers livres, em rodízio entre as câmeras; retorna quantos."""
+        quota = self.quota()
+        count = len(self.streams)
+        sent = idle = 0
+        while idle < count and self._in_flight < self.workers:
+            stream = self.streams[self._next]
+            self._next = (self._next + 1) % count
+            params = stream.params
+            packet = None
+            if params is not None and stream.in_flight < quota:
+                packet = stream.grabber.read(timeout=0)
+            if packet is None:
+                idle += 1 # Uma volta inteira sem envio encerra a rodada
+                continue
+            idle = 0
+            with self._cond:
+                stream.in_flight += 1
+                self._in_flight += 1
+            stream.submitted += 1
+            self._executor.submit(self._process, stream, packet, params)
+            sent += 1
+        return sent
+
+    def _process(self, stream, packet, params):
+        start = time.perf_counter()
+        result = error = None
+        try:
+            result = self.engine.process(packet[2], params)
+        except Exception as e: # Registrado na câmera em `poll`
+            error = e
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            stream.in_flight -= 1
+            self._in_flight -= 1
+            self._completed.append((stream, packet, result, elapsed, error))
+            self._cond.notify_all()
+
+    def poll(self, timeout=0):
+        """Despacha frames novos e retorna os resultados prontos como (câmera, (índice, timestamp, frame), resultado).
+
+        Espera até `timeout` segundos por um resultado (0 = não bloqueia).
+        Resultados mais antigos que o último entregue da mesma câmera são descartados;
+        frames cujo processamento falhou não são entregues e a exceção fica em `stream.error`.
+        """
+        self.dispatch()
+        with self._cond:
+            if not self._completed and timeout and self._in_flight:
+                self._cond.wait(timeout)
+            items = list(self._completed)
+            self._completed.clear()
+        if items:
+            self.dispatch() # Vagas liberadas pelos resultados recebidos
+        ready = []
+        for stream, packet, result, elapsed, error in items:
+            stream.process_time += 0.2 * (elapsed - stream.process_time)
+            if error is not None:
+                stream.error = error
+                stream.errors += 1
+                continue
+            if stream.latest is not None and packet[0] <= stream.latest[0]:
+                stream.stale += 1
+                continue
+            stream.processed += 1
+            stream.latest = packet + (result,)
+            ready.append((stream, packet, result))
+        return ready
+
+    @property
+    def finished(self):
+        """Todas as fontes são arquivos que já terminaram."""
+        return all(stream.finished for stream in self.streams)
+
+    def stats(self):
+        """Por câmera: frames processados, FPS médio, descartados, atrasados e tempo no worker."""
+        elapsed = time.time() - self.started if self.started else 0.0
+        return [{
+            "name": stream.name, "processed": stream.processed,
+            "fps": round(stream.processed / elapsed, 2) if elapsed > 0 else 0.0,
+            "dropped": stream.grabber.dropped, "stale": stream.stale, "errors": stream.errors,
+            "process_ms": round(stream.process_time * 1000.0, 2),
+        } for stream in self.streams]
+
+    def run(self, callback, duration=None, poll_timeout=0.005):
+        """Processa até todas as fontes terminarem (ou `duration` s), chamando `callback(câmera, pacote, resultado)`."""
+        deadline = None if duration is None else time.time() + duration
+        reported = {} # Última mensagem de erro exibida por câmera (não repete a cada frame)
+        while not self.finished and (deadline is None or time.time() < deadline):
+            for item in self.poll(poll_timeout):
+                callback(*item)
+            for stream in self.streams:
+                if stream.error is not None:
+                    message = str(stream.error)
+                    if reported.get(stream) != message:
+                        print(f"Erro na câmera '{stream.name}': {message}", file=sys.stderr)
+                        reported[stream] = message
+                    stream.error = None
+            if not self._in_flight and not any(s.grabber.has_frame for s in self.streams):
+                time.sleep(poll_timeout) # Nada a fazer até as câmeras entregarem frames
+
+    def close(self, wait=True):
+        """Para as capturas, encerra o pool e libera as fontes."""
+        for stream in self.streams:
+            stream.grabber.stop()
+        self._executor.shutdown(wait=wait)
+        for stream in self.streams:
+            stream.close()
+
+
+def load_presets(presets):
+    """Lista de presets: a própria lista ou o caminho de um JSON no formato da aba Multi-Cor."""
+    if isinstance(presets, str):
+        with open(presets, encoding="utf-8") as f:
+            return json.load(f)
+    return list(presets or [])
+
+
+def camera_params(entry, defaults):
+    """(`FilterParams`, presets) de uma câmera de --config: `defaults` com as chaves da entrada aplicadas.
+
+    O `FilterParams` é None se a câmera terminar sem nenhuma faixa.
+    """
+    presets = load_presets(entry.get("presets"))
+    changes = {field: entry[key] for key, field in CONFIG_FIELDS.items() if key in entry}
+    if presets:
+        changes["ranges"] = tuple(ColorRange.from_preset(c) for c in presets)
+    params = dataclasses.replace(defaults, **changes)
+    return (params if params.ranges else None), presets
+
+
+def label_map(streams):
+    """Rótulos globais para registrar várias câmeras em um arquivo.
+
+    Os presets de cada câmera ocupam uma faixa própria de rótulos; retorna
+    ({rótulo: "câmera/preset"}, {câmera: (id da fonte, deslocamento)}).
+    """
+    names, offsets, offset = {}, {}, 0
+    for stream_id, stream in enumerate(streams):
+        ranges = stream.params.ranges if stream.params is not None else ()
+        offsets[stream] = (stream_id, offset)
+        names.update({offset + label: f"{stream.name}/{r.name}" for label, r in enumerate(ranges, 1)})
+        offset += len(ranges)
+    return names, offsets
+
+
+def camera_records(packet, result, stream_id, offset):
+    """`make_records` de um frame da câmera `stream_id`, com os rótulos deslocados por `offset`."""
+    records = make_records(packet[0], packet[1], result, stream_id)
+    records["label"][records["label"] > 0] += offset
+    return records
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Filtro de cores em várias câmeras/vídeos ao mesmo tempo.")
+    parser.add_argument("sources", nargs="*",
+                        help="Índices de câmera, /dev/videoN, arquivos de vídeo ou synthetic[:LxA@FPS]")
+    parser.add_argument("--config", help="JSON com as câmeras e seus parâmetros/presets")
+    parser.add_argument("-o", "--output", help="Arquivo de detecções (.jsonl, .csv ou .bin)")
+    add_filter_arguments(parser)
+    add_capture_arguments(parser)
+    parser.add_argument("--workers", type=int, default=None, help="Workers compartilhados (padrão: nº de núcleos)")
+    parser.add_argument("--per-camera", type=int, default=None, help="Frames em processamento por câmera")
+    parser.add_argument("--fast", action="store_true", help="Ler arquivos o mais rápido possível (sem ritmo de câmera)")
+    parser.add_argument("--duration", type=float, help="Encerrar após N segundos")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    defaults = params_from_args(args, allow_empty=True) # Câmeras sem presets próprios usam estas faixas
+    default_settings = settings_from_args(args)
+    entries = [{"source": source} for source in args.sources]
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            entries.extend(json.load(f)["cameras"])
+    if not entries:
+        print("Erro: informe ao menos uma fonte (ou --config).", file=sys.stderr)
+        return 2
+
+    processor = MultiCameraProcessor(ColorFilterEngine(), workers=args.workers, per_camera=args.per_camera)
+    for entry in entries:
+        params, presets = camera_params(entry, defaults)
+        if params is None:
+            print(f"Erro: a câmera '{entry['source']}' não tem faixas (--range, --presets ou 'presets').", file=sys.stderr)
+            processor.close()
+            return 2
+        settings = dataclasses.replace(default_settings, **{key: entry[key] for key in CAPTURE_FIELDS if key in entry})
+        try:
+            stream = CameraStream.open(str(entry["source"]), entry.get("name"), params, presets,
+                                       realtime=not args.fast, settings=settings)
+        except (IOError, ValueError) as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            processor.close()
+            return 2
+        processor.add(stream)
+        print(f"  {stream.name}: {describe_mode(stream.mode, None if stream.is_file else settings)}")
+
+    names, offsets = label_map(processor.streams)
+    writer = None
+    if args.output:
+        try:
+            writer = AsyncSink(open_sink(args.output, names, {i: s.name for i, s in enumerate(processor.streams)}),
+                               drop_when_full=False)
+        except ValueError as e:
+            print(f"Erro: {e}", file=sys.stderr)
+            processor.close()
+            return 2
+
+    def on_result(stream, packet, result):
+        if writer is not None:
+            writer.submit(camera_records(packet, result, *offsets[stream]))
+
+    print("Processando", ", ".join(s.name for s in processor.streams), f"com {processor.workers} worker(s)")
+    processor.start()
+    try:
+        processor.run(on_result, args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        processor.close()
+        if writer is not None:
+            writer.close()
+    for stats in processor.stats():
+        print("  {name:<20} {processed:6d} frame(s)  {fps:7.1f} FPS  {dropped:5d} descartado(s)  "
+              "{process_ms:7.2f} ms/frame  {errors:4d} erro(s)".format(**stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Processamento paralelo de frames em um pool de threads com entrega em ordem."""
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ProcessingPipeline:
+    """Distribui frames entre workers e devolve os resultados na ordem de chegada.
+
+    As funções do OpenCV liberam o GIL, então um pool de threads já ocupa
+    vários núcleos sem o custo de copiar frames entre processos. O motor
+    precisa ser seguro para uso concorrente (o `ColorFilterEngine` é). Com um
+    `profiler` (`profiling.StageProfiler`), cada worker registra os tempos por etapa.
+    `last_process_time` guarda quanto o último resultado entregue levou no worker.
+    """
+
+    def __init__(self, engine, workers=None, max_pending=None, profiler=None):
+        self.engine = engine
+        self.profiler = profiler
+        self.workers = workers or os.cpu_count() or 1
+        # Limite de frames em processamento; acima disso o chamador deve descartar
+        self.max_pending = max_pending or self.workers * 2
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ColorWorker")
+        self._pending = deque() # (tag, frame, future) em ordem de submissão
+        self.last_process_time = 0.0
+
+    def submit(self, frame, params, tag=None):
+        """Enfileira um frame; retorna False (frame descartado) se o pool estiver cheio."""
+        if len(self._pending) >= self.max_pending:
+            return False
+        future = self._executor.submit(self._process, frame, params)
+        self._pending.append((tag, frame, future))
+        return True
+
+    def _process(self, frame, params):
+        start = time.perf_counter()
+        profiler = self.profiler
+        if profiler is None:
+            return self.engine.process(frame, params), time.perf_counter() - start
+        timer = profiler.frame()
+        result = self.engine.process(frame, params, timer)
+        timer.commit()
+        return result, time.perf_counter() - start
+
+    def _result(self, future):
+        result, self.last_process_time = future.result()
+        return result
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def ready(self):
+        """Retorna os resultados já concluídos, em ordem, como (tag, frame, resultado).
+
+        Para no primeiro frame ainda em processamento, mesmo que frames
+        posteriores já tenham terminado, preservando a ordem de entrega.
+        """
+        completed = []
+        while self._pending and self._pending[0][2].done():
+            tag, frame, future = self._pending.popleft()
+            completed.append((tag, frame, self._result(future)))
+        return completed
+
+    def next_result(self):
+        """Bloqueia até o próximo resultado em ordem; None se não houver pendentes."""
+        if not self._pending:
+            return None
+        tag, frame, future = self._pending.popleft()
+        return tag, frame, self._result(future)
+
+    def imap(self, items):
+        """Processa um iterável de (tag, frame, params) e gera (tag, frame, resultado) em ordem."""
+        for tag, frame, params in items:
+            while not self.submit(frame, params, tag):
+                yield self.next_result()
+        while self._pending:
+            yield self.next_result()
+
+    def close(self, wait=True):
+        """Encerra o pool, descartando frames ainda não iniciados."""
+        for _, _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,101 @@
+"""Biblioteca persistente de presets de cor, com importação e exportação em JSON."""
+import json
+import os
+
+# Presets HSV embutidos (botões de cor rápida); "vermelho_wrap" é o segundo range do vermelho
+BUILTIN_PRESETS = {
+    "vermelho": {"h_min": 0, "h_max": 10, "s_min": 100, "s_max": 255, "v_min": 70, "v_max": 255},
+    "vermelho_wrap": {"h_min": 170, "h_max": 179, "s_min": 100, "s_max": 255, "v_min": 70, "v_max": 255},
+    "verde": {"h_min": 40, "h_max": 85, "s_min": 50, "s_max": 255, "v_min": 50, "v_max": 255},
+    "azul": {"h_min": 95, "h_max": 130, "s_min": 80, "s_max": 255, "v_min": 50, "v_max": 255},
+    "amarelo": {"h_min": 20, "h_max": 35, "s_min": 100, "s_max": 255, "v_min": 100, "v_max": 255},
+    "laranja": {"h_min": 10, "h_max": 25, "s_min": 120, "s_max": 255, "v_min": 120, "v_max": 255},
+    "ciano": {"h_min": 85, "h_max": 100, "s_min": 100, "s_max": 255, "v_min": 100, "v_max": 255},
+    "roxo": {"h_min": 130, "h_max": 160, "s_min": 80, "s_max": 255, "v_min": 50, "v_max": 255},
+    "rosa": {"h_min": 160, "h_max": 175, "s_min": 80, "s_max": 255, "v_min": 100, "v_max": 255},
+    "marrom": {"h_min": 10, "h_max": 25, "s_min": 80, "s_max": 255, "v_min": 20, "v_max": 120},
+    "preto": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 255, "v_min": 0, "v_max": 40},
+    "cinza": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 50, "v_min": 40, "v_max": 180},
+    "branco": {"h_min": 0, "h_max": 179, "s_min": 0, "s_max": 30, "v_min": 200, "v_max": 255},
+}
+BUILTIN_NAMES = {
+    "Vermelho": "vermelho", "Verde": "verde", "Azul": "azul", "Amarelo": "amarelo",
+    "Laranja": "laranja", "Ciano": "ciano", "Roxo": "roxo", "Rosa": "rosa",
+    "Marrom": "marrom", "Preto": "preto", "Cinza": "cinza", "Branco": "branco"
+}
+
+DEFAULT_LIBRARY = os.path.join(os.path.expanduser("~"), ".colorfilter", "presets.json")
+PRESET_FIELDS = {"ch1_min", "ch1_max", "ch2_min", "ch2_max", "ch3_min", "ch3_max"}
+
+
+def read_presets(path):
+    """Lista de presets de um JSON no formato da aba Multi-Cor (lista de dicts com name, space, chN_min/max).
+
+    Presets sem nome recebem "Cor N" e sem espaço de cor, "HSV".
+    """
+    with open(path, encoding="utf-8") as f:
+        presets = json.load(f)
+    if not isinstance(presets, list) or not all(isinstance(c, dict) and PRESET_FIELDS <= set(c) for c in presets):
+        raise ValueError(f"'{path}' não é uma lista de presets.")
+    for i, color_data in enumerate(presets):
+        color_data.setdefault("name", f"Cor {i + 1}")
+        color_data.setdefault("space", "HSV")
+    return presets
+
+
+def write_json(path, data):
+    """Grava em um arquivo temporário e troca no final, para não corromper o arquivo se a escrita falhar."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp = path + ".tmp"
+    with open(temp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(temp, path)
+
+
+class PresetLibrary:
+    """Presets do usuário em um arquivo JSON.
+
+    Nada é lido no construtor: a lista de presets é carregada no primeiro
+    acesso a `presets` (ou por `load`, que pode rodar fora da thread da GUI),
+    então a janela abre sem esperar pelo arquivo. As tabelas de faixas não
+    são guardadas em disco: compilar uma `RangeLUT` custa o mesmo que lê-la
+    de um cache (~0,5 ms), e o motor já as guarda em memória.
+    """
+
+    def __init__(self, path=DEFAULT_LIBRARY):
+        self.path = path
+        self._presets = None
+
+    @property
+    def loaded(self):
+        return self._presets is not None
+
+    def load(self):
+        """Lê (uma vez) e retorna a lista de presets; arquivo inexistente = biblioteca vazia."""
+        if self._presets is None:
+            self._presets = read_presets(self.path) if os.path.exists(self.path) else []
+        return self._presets
+
+    @property
+    def presets(self):
+        return self.load()
+
+    def replace(self, presets):
+        """Substitui a lista de presets (gravada no próximo `save`)."""
+        self._presets = [dict(c) for c in presets]
+
+    def save(self):
+        """Grava os presets."""
+        write_json(self.path, self.presets)
+
+    def import_file(self, path):
+        """Acrescenta os presets de um JSON; presets com o mesmo nome são substituídos. Retorna os importados."""
+        imported = read_presets(path)
+        names = {c.get("name") for c in imported}
+        self._presets = [c for c in self.presets if c.get("name") not in names] + imported
+        return imported
+
+    def export(self, path, presets=None):
+        """Grava `presets` (padrão: os da biblioteca) em `path`, no formato aceito por `import_file` e `--presets`."""
+        write_json(path, list(self.presets if presets is None else presets))
@@ -0,0 +1,157 @@
+"""Medição do tempo de cada etapa do pipeline com percentis móveis."""
+import json
+import time
+from collections import deque
+
+import numpy as np
+
+# Ordem de exibição; etapas desconhecidas aparecem depois, em ordem alfabética
+STAGES = ("capture", "scale", "conversion", "blur", "mask", "morphology", "contours", "drawing", "display", "frame")
+
+
+class FrameTimer:
+    """Acumula as durações das etapas de um frame; `commit` envia ao `StageProfiler`.
+
+    `mark(etapa)` atribui à etapa o tempo desde a marca anterior (ou desde
+    `start`). Chamadas repetidas para a mesma etapa somam, então um frame com
+    vários espaços de cor ou várias janelas de ROI gera uma única amostra por etapa.
+    """
+
+    __slots__ = ("profiler", "times", "_last")
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.times = {}
+        self._last = time.perf_counter()
+
+    def start(self):
+        """Reinicia a contagem sem atribuir o intervalo a nenhuma etapa."""
+        self._last = time.perf_counter()
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.times[stage] = self.times.get(stage, 0.0) + (now - self._last)
+        self._last = now
+
+    def add(self, stage, seconds):
+        """Soma uma duração medida fora do timer (ex: leitura da câmera)."""
+        self.times[stage] = self.times.get(stage, 0.0) + seconds
+
+    def commit(self):
+        for stage, seconds in self.times.items():
+            self.profiler.add(stage, seconds)
+        self.times = {}
+
+
+class _NullTimer:
+    """Timer que não mede nada; padrão quando o perfil está desligado."""
+
+    __slots__ = ()
+
+    def start(self):
+        pass
+
+    def mark(self, stage):
+        pass
+
+    def add(self, stage, seconds):
+        pass
+
+    def commit(self):
+        pass
+
+
+NULL_TIMER = _NullTimer()
+
+
+class StageProfiler:
+    """Guarda as últimas `window` durações de cada etapa e calcula p50/p95/p99 sob demanda.
+
+    `add` só faz um `deque.append` (seguro entre threads), então o custo por
+    frame é desprezível; os percentis só são calculados em `stats`.
+    """
+
+    def __init__(self, window=300):
+        self.window = window
+        self._samples = {}
+        self.started = time.time()
+
+    def frame(self):
+        """Novo `FrameTimer` ligado a este perfil."""
+        return FrameTimer(self)
+
+    def add(self, stage, seconds):
+        samples = self._samples.get(stage)
+        if samples is None:
+            samples = self._samples.setdefault(stage, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def reset(self):
+        self._samples = {}
+        self.started = time.time()
+
+    def stages(self):
+        known = [s for s in STAGES if s in self._samples]
+        return known + sorted(s for s in self._samples if s not in STAGES)
+
+    def stats(self):
+        """Estatísticas em milissegundos por etapa: count, mean, p50, p95, p99, max."""
+        result = {}
+        for stage in self.stages():
+            values = np.array(self._samples[stage], dtype=np.float64) * 1000.0
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            result[stage] = {
+                "count": int(len(values)), "mean": round(float(values.mean()), 3),
+                "p50": round(float(p50), 3), "p95": round(float(p95), 3), "p99": round(float(p99), 3),
+                "max": round(float(values.max()), 3),
+            }
+        return result
+
+    def overlay_lines(self):
+        """Linhas de texto curtas (uma por etapa) para sobrepor à imagem."""
+        return [f"{stage:<10} {s['p50']:6.2f} {s['p95']:6.2f} {s['p99']:6.2f} ms"
+                for stage, s in self.stats().items()]
+
+    def dump(self, path, extra=None):
+        """Grava as estatísticas em JSON (legível por máquina); `extra` é um dict de campos adicionais."""
+        data = {"window": self.window, "elapsed": round(time.time() - self.started, 3), "stages": self.stats()}
+        data.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
+
+
+class StartupTimer:
+    """Tempo de cada fase da inicialização (imports, janela, câmera, primeiro quadro) desde `origin`.
+
+    `origin` é um `time.perf_counter()` tomado o mais cedo possível (antes dos
+    imports pesados); cada fase guarda só a primeira marca, então chamadas
+    repetidas (ex: a cada câmera aberta) são ignoradas.
+    """
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = {}
+
+    def mark(self, phase):
+        if phase not in self.phases:
+            self.phases[phase] = time.perf_counter() - self.origin
+        return self.phases[phase]
+
+    def report(self):
+        """Linhas com o tempo acumulado e o intervalo desde a fase anterior, em ms."""
+        lines, previous = [], 0.0
+        for phase, seconds in self.phases.items():
+            lines.append(f"{phase:<12} {seconds * 1000.0:8.1f} ms (+{(seconds - previous) * 1000.0:.1f})")
+            previous = seconds
+        return lines
+
+    def dump(self, path, extra=None):
+        """Grava as fases (em ms desde a origem) em JSON; `extra` é um dict de campos adicionais."""
+        data = {"phases": {phase: round(seconds * 1000.0, 3) for phase, seconds in self.phases.items()}}
+        data.update(extra or {})
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        return data
@@ -0,0 +1,121 @@
+"""Controle adaptativo de qualidade para manter um FPS alvo em máquinas mais fracas."""
+import dataclasses
+
+# Níveis do melhor para o pior: (escala máxima, fator do blur, usar ROI, processar 1 a cada N quadros)
+QUALITY_LEVELS = (
+    (1.0, 1.0, False, 1),
+    (0.5, 1.0, False, 1),
+    (0.5, 0.5, False, 1),
+    (0.5, 0.5, True, 1),
+    (0.25, 0.0, True, 1),
+    (0.25, 0.0, True, 2),
+    (0.25, 0.0, True, 3),
+)
+
+
+class QualityController:
+    """Escolhe o nível de qualidade que cabe no orçamento de tempo por quadro.
+
+    O orçamento é `latency_budget` segundos ou, sem ele, 1 / `target_fps`. A
+    cada quadro processado, `update` recebe o custo medido (processamento e
+    exibição) e mantém uma média móvel exponencial da carga por quadro da
+    câmera (o custo dividido por N quando só 1 a cada N quadros é
+    processado). Se a carga passa do orçamento por `patience` quadros
+    seguidos, a qualidade desce um nível; se fica abaixo de `headroom` x
+    orçamento, sobe um nível. Depois de cada mudança há `cooldown` quadros sem
+    novas decisões, e a carga medida em cada nível é lembrada por `memory`
+    quadros: não se volta a um nível que estourou o orçamento há pouco, o que
+    evita oscilar entre dois níveis.
+
+    `apply` ajusta a escala de análise e o blur dos `FilterParams`; `use_roi`
+    e `skip_frame` dizem ao chamador se deve usar o `RoiDetector` e se deve
+    descartar o quadro atual.
+    """
+
+    def __init__(self, target_fps=25.0, latency_budget=None, levels=QUALITY_LEVELS,
+                 headroom=0.6, patience=5, cooldown=15, memory=300, smoothing=0.2):
+        self.target_fps = target_fps
+        self.latency_budget = latency_budget
+        self.levels = levels
+        self.headroom = headroom
+        self.patience = patience
+        self.cooldown = cooldown
+        self.memory = memory
+        self.smoothing = smoothing
+        self.reset()
+
+    def reset(self):
+        """Volta à qualidade máxima e esquece as medidas."""
+        self.level = 0
+        self.load = None # Média móvel da carga por quadro da câmera (s)
+        self.changes = 0
+        self._over = 0
+        self._cooldown = 0
+        self._frames = 0
+        self._seen = 0
+        self._loads = {} # nível -> (carga, quadro em que foi medida)
+
+    @property
+    def budget(self):
+        return self.latency_budget if self.latency_budget else 1.0 / self.target_fps
+
+    @property
+    def use_roi(self):
+        return self.levels[self.level][2]
+
+    def skip_frame(self):
+        """Chamado uma vez por quadro da câmera; True se o quadro deve ser descartado."""
+        self._seen += 1
+        return self._seen % self.levels[self.level][3] != 0
+
+    def apply(self, params):
+        """`FilterParams` com a escala e o blur do nível atual (nunca acima dos pedidos)."""
+        max_scale, blur_factor = self.levels[self.level][:2]
+        scale = min(params.process_scale, max_scale) if params.process_scale > 0 else max_scale
+        blur_size = int(params.blur_size * blur_factor)
+        if scale == params.process_scale and blur_size == params.blur_size:
+            return params
+        return dataclasses.replace(params, process_scale=scale, blur_size=blur_size)
+
+    def update(self, cost):
+        """Registra o custo (s) de um quadro processado; retorna o nível a usar no próximo."""
+        self._frames += 1
+        load = cost / self.levels[self.level][3]
+        self.load = load if self.load is None else self.load + self.smoothing * (load - self.load)
+        self._loads[self.level] = (self.load, self._frames)
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return self.level
+
+        budget = self.budget
+        if self.load > budget:
+            self._over += 1
+            if self._over >= self.patience and self.level < len(self.levels) - 1:
+                self._change(self.level + 1)
+        else:
+            self._over = 0
+            if self.level > 0 and self.load < self.headroom * budget:
+                previous, measured_at = self._loads.get(self.level - 1, (0.0, -self.memory))
+                # Só volta se o nível melhor não estourou o orçamento recentemente
+                if previous <= budget or self._frames - measured_at >= self.memory:
+                    self._change(self.level - 1)
+        return self.level
+
+    def _change(self, level):
+        self.level = level
+        self.load = None # A carga do nível novo é medida do zero
+        self.changes += 1
+        self._over = 0
+        self._cooldown = self.cooldown
+
+    def describe(self):
+        """Texto curto do nível atual para a barra de status."""
+        max_scale, blur_factor, use_roi, every = self.levels[self.level]
+        parts = [f"escala ≤{max_scale:g}"]
+        if blur_factor < 1:
+            parts.append("blur reduzido" if blur_factor > 0 else "sem blur")
+        if use_roi:
+            parts.append("ROI")
+        if every > 1:
+            parts.append(f"1 a cada {every} quadros")
+        return f"qualidade {len(self.levels) - self.level}/{len(self.levels)} ({', '.join(parts)})"
@@ -0,0 +1,152 @@
+"""Gravação em vídeo, em background, do que a aplicação exibe (anotado, máscara e resultado filtrado)."""
+import os
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+from color_engine import draw_detections
+from tracker import draw_tracks
+
+RECORD_STREAMS = ("annotated", "mask", "result") # Original com desenhos, máscara, frame recortado pela máscara
+DROP_POLICIES = ("newest", "oldest", "block")
+
+
+def stream_paths(path, streams):
+    """Arquivo de cada stream: o próprio `path` para um só, senão `base_stream.ext`."""
+    if len(streams) == 1:
+        return {streams[0]: path}
+    base, ext = os.path.splitext(path)
+    return {stream: f"{base}_{stream}{ext}" for stream in streams}
+
+
+class VideoRecorder:
+    """Codifica frames com `cv2.VideoWriter` em uma thread própria, alimentada por uma fila limitada.
+
+    `submit` só enfileira referências ao frame e ao `DetectionResult` (sem
+    cópia); desenhos, máscara e codificação acontecem na thread de gravação,
+    na resolução original, então gravar não reduz o FPS do processamento ao
+    vivo. Com a fila cheia, `drop_policy` decide: "newest" descarta o frame
+    novo, "oldest" descarta o mais antigo da fila (o vídeo fica mais recente)
+    e "block" espera (nada é perdido, mas o chamador pode atrasar). Frames
+    descartados são contados em `dropped`.
+
+    Os arquivos são abertos no primeiro frame, com o tamanho dele; frames de
+    outro tamanho são redimensionados. Erros de escrita ficam em `error`.
+    """
+
+    def __init__(self, path, fps=30.0, streams=("annotated",), fourcc="mp4v", max_queue=16, drop_policy="newest"):
+        streams = tuple(streams)
+        unknown = set(streams) - set(RECORD_STREAMS)
+        if not streams or unknown:
+            raise ValueError(f"Streams de gravação inválidos {sorted(unknown)} (use {', '.join(RECORD_STREAMS)}).")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Política de descarte desconhecida '{drop_policy}' (use {', '.join(DROP_POLICIES)}).")
+        self.streams = streams
+        self.paths = stream_paths(path, streams)
+        self.fps = fps
+        self.fourcc = fourcc
+        self.drop_policy = drop_policy
+        self.dropped = 0 # Frames descartados (fila cheia ou gravação com erro)
+        self.written = 0 # Frames gravados (em todos os streams)
+        self.error = None
+        self.size = None # (largura, altura) dos vídeos, definido pelo primeiro frame
+        self._writers = {}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="VideoRecorder", daemon=True)
+        self._thread.start()
+
+    def submit(self, frame, result, show_contours=True, show_boxes=True, show_centers=True, tracks=None):
+        """Enfileira um frame BGR e seu resultado; retorna False se o frame foi descartado.
+
+        Frame, resultado e trilhas não são copiados e não devem ser modificados depois.
+        """
+        item = (frame, result, (show_contours, show_boxes, show_centers), tracks)
+        if self.drop_policy == "block":
+            self._queue.put(item)
+            return True
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+        if self.drop_policy == "oldest":
+            try:
+                self._queue.get_nowait() # Abre espaço descartando o mais antigo
+            except queue.Empty:
+                pass
+            self.dropped += 1
+            try:
+                self._queue.put_nowait(item)
+                return True
+            except queue.Full:
+                pass
+        self.dropped += 1
+        return False
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self.error is not None:
+                self.dropped += 1
+                continue
+            try:
+                self._write(*item)
+                self.written += 1
+            except Exception as e: # Registrado para o chamador; os próximos frames são descartados
+                self.error = e
+        for writer in self._writers.values():
+            writer.release()
+
+    def _open(self, size):
+        w, h = size
+        self.size = size
+        self._frame = np.empty((h, w, 3), dtype=np.uint8)
+        self._drawn = np.empty_like(self._frame)
+        self._mask = np.empty((h, w), dtype=np.uint8)
+        self._mask_bgr = np.empty_like(self._frame)
+        self._masked = np.empty_like(self._frame)
+        fourcc = cv2.VideoWriter_fourcc(*self.fourcc)
+        for stream, path in self.paths.items():
+            writer = cv2.VideoWriter(path, fourcc, self.fps, size)
+            if not writer.isOpened():
+                raise IOError(f"Não foi possível abrir '{path}' para gravação ({self.fourcc}).")
+            self._writers[stream] = writer
+
+    def _write(self, frame, result, flags, tracks):
+        h, w = frame.shape[:2]
+        if self.size is None:
+            self._open((w, h))
+        scale = 1.0
+        if (w, h) != self.size:
+            # Troca de resolução no meio da gravação: ajustar ao tamanho do vídeo
+            scale = self.size[0] / float(w)
+            frame = cv2.resize(frame, self.size, dst=self._frame, interpolation=cv2.INTER_AREA)
+        mask = result.mask
+        if mask.shape[:2] != (self.size[1], self.size[0]):
+            mask = cv2.resize(mask, self.size, dst=self._mask, interpolation=cv2.INTER_NEAREST)
+
+        if "annotated" in self._writers:
+            np.copyto(self._drawn, frame)
+            draw_detections(self._drawn, result, *flags, scale=scale)
+            if tracks is not None:
+                draw_tracks(self._drawn, tracks, scale=scale)
+            self._writers["annotated"].write(self._drawn)
+        if "mask" in self._writers:
+            self._writers["mask"].write(cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR, dst=self._mask_bgr))
+        if "result" in self._writers:
+            self._masked.fill(0)
+            cv2.copyTo(frame, mask, self._masked)
+            self._writers["result"].write(self._masked)
+
+    def close(self):
+        """Grava os frames ainda na fila e fecha os arquivos."""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,124 @@
+"""Detecção restrita a regiões de interesse (ROI) ao redor dos objetos do frame anterior."""
+import cv2
+import numpy as np
+
+from color_engine import DetectionResult
+from profiling import NULL_TIMER
+
+
+def expand_box(box, margin, min_margin, width, height):
+    """Expande uma caixa x, y, w, h pela margem relativa e recorta aos limites do frame."""
+    x, y, w, h = (int(v) for v in box)
+    pad = max(min_margin, int(margin * max(w, h)))
+    x0, y0 = max(0, x - pad), max(0, y - pad)
+    x1, y1 = min(width, x + w + pad), min(height, y + h + pad)
+    return [x0, y0, x1, y1]
+
+
+def merge_windows(windows):
+    """Une janelas (x0, y0, x1, y1) que se sobrepõem até não haver mais sobreposição.
+
+    Cada passada percorre as janelas ordenadas por x0 e só compara com as
+    ainda "abertas" (x1 além do x0 atual). Uma união pode criar novas
+    sobreposições, então repete enquanto houver uniões (em geral 1 ou 2
+    passadas).
+    """
+    windows = [list(w) for w in windows]
+    merged = True
+    while merged and len(windows) > 1:
+        merged = False
+        windows.sort()
+        result, active = [], []
+        for window in windows:
+            x0, y0, x1, y1 = window
+            active = [a for a in active if a[2] > x0]
+            for a in active:
+                if a[1] < y1 and y0 < a[3]: # Em x já se sobrepõem (a[0] <= x0 < a[2])
+                    a[1], a[2], a[3] = min(a[1], y0), max(a[2], x1), max(a[3], y1)
+                    merged = True
+                    break
+            else:
+                result.append(window)
+                active.append(window)
+        windows = result
+    return windows
+
+
+class RoiDetector:
+    """Envolve o motor e processa só janelas ao redor das caixas do frame anterior.
+
+    Após uma detecção no frame inteiro, os frames seguintes analisam apenas as
+    caixas anteriores expandidas por `margin` (fração do lado maior, mínimo
+    `min_margin` pixels). Uma varredura completa é feita a cada
+    `refresh_interval` frames para encontrar objetos novos, quando nada foi
+    encontrado, quando os parâmetros mudam, quando as janelas cobririam mais
+    de `max_coverage` do frame ou quando passariam de `max_windows` (com
+    muitas janelas pequenas o custo fixo por janela supera o do frame
+    inteiro). Guarda estado entre frames, então deve ser usado com frames em
+    sequência (não no pool paralelo).
+    """
+
+    def __init__(self, engine, margin=0.5, min_margin=16, refresh_interval=15, max_coverage=0.6, max_windows=64):
+        self.engine = engine
+        self.margin = margin
+        self.min_margin = min_margin
+        self.refresh_interval = refresh_interval
+        self.max_coverage = max_coverage
+        self.max_windows = max_windows
+        self.reset()
+
+    def reset(self):
+        """Força uma varredura completa no próximo frame."""
+        self._boxes = None
+        self._params = None
+        self._frames_since_refresh = 0
+        self.last_coverage = 1.0 # Fração do frame analisada no último processamento
+
+    def process(self, frame, params, timer=NULL_TIMER):
+        """Processa o frame (inteiro ou só as ROIs) e retorna um `DetectionResult` em coordenadas do frame."""
+        height, width = frame.shape[:2]
+        windows = None
+        if (self._boxes is not None and len(self._boxes) and params == self._params
+                and self._frames_since_refresh < self.refresh_interval):
+            windows = merge_windows(expand_box(b, self.margin, self.min_margin, width, height) for b in self._boxes)
+            covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in windows)
+            if covered > self.max_coverage * width * height or len(windows) > self.max_windows:
+                windows = None
+
+        if windows is None:
+            result = self.engine.process(frame, params, timer)
+            self._frames_since_refresh = 0
+            self.last_coverage = 1.0
+        else:
+            result = self.process_windows(frame, params, windows, timer)
+            self._frames_since_refresh += 1
+            self.last_coverage = covered / float(width * height)
+
+        self._boxes = result.boxes
+        self._params = params
+        return result
+
+    def process_windows(self, frame, params, windows, timer=NULL_TIMER):
+        """Roda o motor em cada janela e junta os resultados em coordenadas do frame completo."""
+        mask = np.zeros(frame.shape[:2], dtype=np.uint8)
+        labels = None
+        contours, areas, boxes, centroids = [], [], [], []
+        space = params.color_space
+        for x0, y0, x1, y1 in windows:
+            window = frame[y0:y1, x0:x1]
+            part = self.engine.process(window, params, timer)
+            space = part.space
+            mask[y0:y1, x0:x1] = part.full_mask(window.shape)
+            if part.labels is not None:
+                if labels is None:
+                    labels = np.zeros(frame.shape[:2], dtype=np.uint8)
+                labels[y0:y1, x0:x1] = cv2.resize(part.labels, (x1 - x0, y1 - y0), interpolation=cv2.INTER_NEAREST)
+            offset = np.array([x0, y0], dtype=np.int32)
+            contours.extend(cnt + offset for cnt in part.contours)
+            areas.append(part.areas)
+            boxes.append(part.boxes + np.array([x0, y0, 0, 0], dtype=np.int32))
+            centroids.append(part.centroids + offset)
+        return DetectionResult(
+            mask, contours,
+            np.concatenate(areas), np.concatenate(boxes).astype(np.int32), np.concatenate(centroids),
+            space, labels=labels)
@@ -0,0 +1,316 @@
+"""Servidor local de detecções (TCP ou socket Unix) com protocolo binário leve.
+
+Cada mensagem é um cabeçalho `HEADER` seguido de `length` bytes de payload:
+
+    magic "CDET" | versão (B) | tipo (B) | reservado (H) | frame (Q) | timestamp (d) | length (I)
+
+Tipos enviados pelo servidor:
+    MSG_HELLO       JSON com o dtype dos registros e os nomes dos presets (ao conectar)
+    MSG_DETECTIONS  registros `sinks.RECORD_DTYPE` brutos, um por objeto
+    MSG_MASK_JPEG   máscara codificada em JPEG
+    MSG_MASK_RAW    altura e largura (!HH) seguidas dos bytes uint8 da máscara
+
+O cliente escolhe o que receber enviando MSG_SUBSCRIBE com 1 byte de flags
+(SUB_DETECTIONS | SUB_MASK_JPEG | SUB_MASK_RAW); o padrão é só detecções.
+Cada cliente tem uma fila limitada que descarta a mensagem mais antiga quando
+enche, então um cliente lento nunca atrasa a captura nem os demais.
+
+Exemplo:
+    python server.py --source 0 --port 8765 --range 40,50,50 85,255,255
+    python server.py --connect 127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+from batch import add_filter_arguments, params_from_args
+from capture import (FrameGrabber, add_capture_arguments, capture_mode, describe_mode, file_frame_interval,
+                     open_source, settings_from_args)
+from change_gate import ChangeGate
+from color_engine import ColorFilterEngine
+from sinks import RECORD_DTYPE, make_records
+
+MAGIC = b"CDET"
+VERSION = 1
+HEADER = struct.Struct("!4sBBHQdI")
+
+MSG_HELLO = 0
+MSG_DETECTIONS = 1
+MSG_MASK_JPEG = 2
+MSG_MASK_RAW = 3
+MSG_SUBSCRIBE = 16
+
+SUB_DETECTIONS = 1
+SUB_MASK_JPEG = 2
+SUB_MASK_RAW = 4
+
+
+def pack_message(msg_type, payload=b"", frame=0, timestamp=0.0):
+    """Monta uma mensagem (cabeçalho + payload)."""
+    return HEADER.pack(MAGIC, VERSION, msg_type, 0, frame, timestamp, len(payload)) + payload
+
+
+async def read_message(reader):
+    """Lê uma mensagem e retorna (tipo, frame, timestamp, payload)."""
+    header = await reader.readexactly(HEADER.size)
+    magic, version, msg_type, _, frame, timestamp, length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Mensagem com cabeçalho inválido.")
+    payload = await reader.readexactly(length) if length else b""
+    return msg_type, frame, timestamp, payload
+
+
+def decode_detections(payload):
+    """Converte o payload de MSG_DETECTIONS em um array `RECORD_DTYPE`."""
+    return np.frombuffer(payload, dtype=RECORD_DTYPE)
+
+
+def decode_raw_mask(payload):
+    """Converte o payload de MSG_MASK_RAW em uma imagem uint8 (altura, largura)."""
+    height, width = struct.unpack_from("!HH", payload)
+    return np.frombuffer(payload, dtype=np.uint8, offset=4).reshape(height, width)
+
+
+class ClientConnection:
+    """Fila de saída de um cliente com descarte da mensagem mais antiga."""
+
+    def __init__(self, writer, queue_size):
+        self.writer = writer
+        self.flags = SUB_DETECTIONS
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def push(self, message):
+        if self.queue.full():
+            self.queue.get_nowait() # Descarta a mais antiga
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+
+class DetectionServer:
+    """Captura, processa e publica detecções para clientes locais.
+
+    A captura (`FrameGrabber`) e o processamento rodam em threads próprias; o
+    loop asyncio só distribui as mensagens já codificadas.
+    """
+
+    def __init__(self, cap, params, engine=None, queue_size=8, jpeg_quality=80, stop_on_failure=False, frame_interval=0.0,
+                 skip_static=False):
+        self.grabber = FrameGrabber(cap, stop_on_failure=stop_on_failure, frame_interval=frame_interval)
+        self.params = params
+        self.engine = engine or ColorFilterEngine()
+        # Câmeras fixas: reaproveitar as detecções quando o quadro não muda
+        self.detector = ChangeGate(self.engine) if skip_static else self.engine
+        self.queue_size = queue_size
+        self.jpeg_quality = jpeg_quality
+        self.clients = set()
+        self.frames = 0
+        self._wanted = 0 # União das assinaturas, atualizada no loop asyncio
+        self._loop = None
+        self._servers = []
+        self._handlers = set()
+        self._unix_path = None
+        self._worker = None
+        self._running = False
+        names = {str(label): r.name for label, r in enumerate(params.ranges, 1)}
+        hello = {"dtype": RECORD_DTYPE.descr, "names": names}
+        self._hello = pack_message(MSG_HELLO, json.dumps(hello).encode("utf-8"))
+
+    async def start(self, host="127.0.0.1", port=8765, unix_path=None):
+        """Abre os sockets e inicia captura e processamento."""
+        self._loop = asyncio.get_running_loop()
+        if port is not None:
+            self._servers.append(await asyncio.start_server(self._handle_client, host, port))
+        self._unix_path = unix_path
+        if unix_path:
+            if os.path.exists(unix_path):
+                os.unlink(unix_path)
+            self._servers.append(await asyncio.start_unix_server(self._handle_client, unix_path))
+        self._running = True
+        self.grabber.start()
+        self._worker = threading.Thread(target=self._process_loop, name="DetectionServer", daemon=True)
+        self._worker.start()
+
+    @property
+    def addresses(self):
+        return [sock.getsockname() for server in self._servers for sock in server.sockets]
+
+    async def stop(self):
+        """Para captura/processamento e fecha os clientes."""
+        self._running = False
+        self.grabber.stop()
+        if self._worker is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._worker.join)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        for task in list(self._handlers):
+            task.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if self._unix_path and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+
+    def _process_loop(self):
+        while self._running:
+            packet = self.grabber.read(timeout=0.5)
+            if packet is None:
+                if not self.grabber.running:
+                    break # Fim do arquivo ou câmera encerrada
+                continue
+            index, timestamp, frame = packet
+            result = self.detector.process(frame, self.params)
+            self.frames += 1
+
+            # Codificar apenas o que algum cliente assinou, uma vez para todos
+            wanted = self._wanted
+            messages = {SUB_DETECTIONS: pack_message(
+                MSG_DETECTIONS, make_records(index, timestamp, result).tobytes(), index, timestamp)}
+            if wanted & (SUB_MASK_JPEG | SUB_MASK_RAW):
+                mask = result.full_mask(frame.shape)
+                if wanted & SUB_MASK_JPEG:
+                    ok, jpeg = cv2.imencode(".jpg", mask, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+                    if ok:
+                        messages[SUB_MASK_JPEG] = pack_message(MSG_MASK_JPEG, jpeg.tobytes(), index, timestamp)
+                if wanted & SUB_MASK_RAW:
+                    raw = struct.pack("!HH", *mask.shape[:2]) + np.ascontiguousarray(mask).tobytes()
+                    messages[SUB_MASK_RAW] = pack_message(MSG_MASK_RAW, raw, index, timestamp)
+            self._loop.call_soon_threadsafe(self._broadcast, messages)
+
+    def _update_wanted(self):
+        wanted = 0
+        for client in self.clients:
+            wanted |= client.flags
+        self._wanted = wanted
+
+    def _broadcast(self, messages):
+        for client in self.clients:
+            for flag, message in messages.items():
+                if client.flags & flag:
+                    client.push(message)
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        client = ClientConnection(writer, self.queue_size)
+        client.push(self._hello)
+        self.clients.add(client)
+        self._update_wanted()
+        sender = asyncio.ensure_future(self._send_loop(client))
+        try:
+            while True:
+                msg_type, _, _, payload = await read_message(reader)
+                if msg_type == MSG_SUBSCRIBE and payload:
+                    client.flags = payload[0]
+                    self._update_wanted()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass # Cliente desconectou ou enviou lixo; o cancelamento (servidor parando) segue adiante
+        finally:
+            self._handlers.discard(task)
+            self.clients.discard(client)
+            self._update_wanted()
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            writer.close()
+
+    async def _send_loop(self, client):
+        try:
+            while True:
+                client.writer.write(await client.queue.get())
+                await client.writer.drain()
+        except ConnectionError:
+            pass # Cliente desconectou; `_handle_client` encerra a conexão
+
+
+async def run_client(host, port, flags, count=None):
+    """Cliente de exemplo: assina e imprime um resumo de cada mensagem."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(pack_message(MSG_SUBSCRIBE, bytes([flags])))
+    await writer.drain()
+    received = 0
+    try:
+        while count is None or received < count:
+            msg_type, frame, timestamp, payload = await read_message(reader)
+            if msg_type == MSG_HELLO:
+                print("Conectado:", json.loads(payload.decode("utf-8"))["names"])
+                continue
+            if msg_type == MSG_DETECTIONS:
+                print(f"frame {frame}: {len(decode_detections(payload))} objeto(s)")
+            elif msg_type == MSG_MASK_JPEG:
+                print(f"frame {frame}: máscara JPEG {len(payload)} bytes")
+            elif msg_type == MSG_MASK_RAW:
+                print(f"frame {frame}: máscara {decode_raw_mask(payload).shape}")
+            received += 1
+    finally:
+        writer.close()
+
+
+async def serve(args, params):
+    settings = settings_from_args(args)
+    try:
+        cap, is_file = open_source(args.source, settings)
+    except ValueError as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 2
+    if not cap.isOpened():
+        print(f"Erro: não foi possível abrir a fonte '{args.source}'.", file=sys.stderr)
+        return 2
+    print("Fonte:", describe_mode(capture_mode(cap), None if is_file else settings))
+    interval = file_frame_interval(cap, not args.fast) if is_file else 0.0
+    server = DetectionServer(cap, params, queue_size=args.queue_size, stop_on_failure=is_file,
+                             frame_interval=interval, skip_static=args.skip_static)
+    await server.start(args.host, None if args.no_tcp else args.port, args.unix)
+    print("Servindo detecções em", ", ".join(str(a) for a in server.addresses))
+    try:
+        while server.grabber.running or not is_file:
+            await asyncio.sleep(0.5)
+    finally:
+        await server.stop()
+        cap.release()
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor local de detecções de cor.")
+    parser.add_argument("--source", default="0",
+                        help="Índice da câmera, /dev/videoN, arquivo de vídeo ou synthetic[:LxA@FPS]")
+    parser.add_argument("--fast", action="store_true", help="Arquivos: processar o mais rápido possível em vez do FPS original")
+    parser.add_argument("--skip-static", action="store_true",
+                        help="Reaproveitar detecções e reprocessar só os blocos que mudaram (câmeras fixas)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--no-tcp", action="store_true", help="Não abrir socket TCP (use com --unix)")
+    parser.add_argument("--unix", help="Caminho de um socket Unix adicional")
+    parser.add_argument("--queue-size", type=int, default=8, help="Mensagens pendentes por cliente antes de descartar")
+    parser.add_argument("--connect", metavar="HOST:PORTA", help="Rodar como cliente de exemplo")
+    parser.add_argument("--subscribe", type=int, default=SUB_DETECTIONS, help="Flags de assinatura do cliente")
+    add_filter_arguments(parser)
+    add_capture_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        try:
+            asyncio.run(run_client(host, int(port), args.subscribe))
+        except (KeyboardInterrupt, asyncio.IncompleteReadError, BrokenPipeError):
+            pass
+        return 0
+
+    params = params_from_args(args)
+    if params is None:
+        print("Erro: informe ao menos uma faixa (--range ou --presets).", file=sys.stderr)
+        return 2
+    try:
+        return asyncio.run(serve(args, params))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Saída das detecções por objeto (JSON Lines, CSV ou registros binários) com escrita em background."""
+import csv
+import json
+import math
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# Um registro por objeto detectado
+RECORD_DTYPE = np.dtype([
+    ("stream", "<i4"), ("frame", "<i8"), ("timestamp", "<f8"), ("label", "<i4"),
+    ("x", "<i4"), ("y", "<i4"), ("w", "<i4"), ("h", "<i4"),
+    ("cx", "<f4"), ("cy", "<f4"), ("area", "<f4"),
+])
+CSV_FIELDS = ("stream", "frame", "timestamp", "name", "x", "y", "w", "h", "cx", "cy", "area")
+
+
+def make_records(frame_index, timestamp, result, stream=0):
+    """Converte um `DetectionResult` em um array estruturado `RECORD_DTYPE`.
+
+    As colunas são copiadas dos arrays do resultado e os rótulos vêm de
+    `DetectionResult.object_labels` (uma imagem integral por faixa), sem laço
+    por objeto. `stream` identifica a fonte (câmera ou arquivo) quando há mais de uma.
+    """
+    records = np.empty(result.count, dtype=RECORD_DTYPE)
+    records["stream"] = stream
+    records["frame"] = frame_index
+    records["timestamp"] = np.nan if timestamp is None else timestamp
+    records["label"] = result.object_labels()
+    for i, field in enumerate(("x", "y", "w", "h")):
+        records[field] = result.boxes[:, i]
+    records["cx"] = result.centroids[:, 0]
+    records["cy"] = result.centroids[:, 1]
+    records["area"] = result.areas
+    return records
+
+
+def _optional(value):
+    """NaN vira None (null / célula vazia)."""
+    value = float(value)
+    return None if math.isnan(value) else round(value, 3)
+
+
+class JsonLinesSink:
+    """Uma linha JSON por objeto."""
+
+    def __init__(self, path, names=None, streams=None):
+        self.names = names or {}
+        self.streams = streams or {}
+        self._file = open(path, "w", encoding="utf-8")
+
+    def write_batch(self, records):
+        lines = []
+        for r in records.tolist():
+            stream, frame, timestamp, label, x, y, w, h, cx, cy, area = r
+            lines.append(json.dumps({
+                "stream": self.streams.get(stream, stream), "frame": frame, "timestamp": _optional(timestamp),
+                "name": self.names.get(label, ""), "box": [x, y, w, h], "centroid": None if math.isnan(cx) else [round(cx, 2), round(cy, 2)],
+                "area": round(area, 2),
+            }))
+        if lines:
+            self._file.write("\n".join(lines) + "\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class CsvSink:
+    """CSV com cabeçalho `CSV_FIELDS`, uma linha por objeto."""
+
+    def __init__(self, path, names=None, streams=None):
+        self.names = names or {}
+        self.streams = streams or {}
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(CSV_FIELDS)
+
+    def write_batch(self, records):
+        self._writer.writerows(
+            (self.streams.get(stream, stream), frame, _optional(timestamp), self.names.get(label, ""),
+             x, y, w, h, _optional(cx), _optional(cy), round(area, 2))
+            for stream, frame, timestamp, label, x, y, w, h, cx, cy, area in records.tolist())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class BinarySink:
+    """Registros `RECORD_DTYPE` brutos, precedidos por uma linha JSON de cabeçalho. Leia com `read_binary_records`."""
+
+    def __init__(self, path, names=None, streams=None):
+        self._file = open(path, "wb")
+        header = {"dtype": RECORD_DTYPE.descr,
+                  "names": {str(k): v for k, v in (names or {}).items()},
+                  "streams": {str(k): v for k, v in (streams or {}).items()}}
+        self._file.write((json.dumps(header) + "\n").encode("utf-8"))
+
+    def write_batch(self, records):
+        self._file.write(np.ascontiguousarray(records, dtype=RECORD_DTYPE).tobytes())
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read_binary_records(path):
+    """Lê um arquivo de `BinarySink` e retorna (registros, nomes por rótulo, nomes por stream)."""
+    with open(path, "rb") as f:
+        header = json.loads(f.readline().decode("utf-8"))
+        dtype = np.dtype([tuple(field) for field in header["dtype"]])
+        records = np.frombuffer(f.read(), dtype=dtype)
+    return (records, {int(k): v for k, v in header["names"].items()},
+            {int(k): v for k, v in header.get("streams", {}).items()})
+
+
+SINK_FORMATS = {".jsonl": JsonLinesSink, ".csv": CsvSink, ".bin": BinarySink}
+
+
+def open_sink(path, names=None, streams=None):
+    """Abre o sink adequado pela extensão do arquivo (.jsonl, .csv ou .bin).
+
+    `names` mapeia rótulo -> nome do preset e `streams` mapeia id da fonte -> nome.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINK_FORMATS:
+        raise ValueError(f"Formato de saída desconhecido '{ext}' (use {', '.join(SINK_FORMATS)}).")
+    return SINK_FORMATS[ext](path, names, streams)
+
+
+class AsyncSink:
+    """Escreve registros em uma thread própria, com fila limitada e flush em lotes.
+
+    `submit` nunca bloqueia quando `drop_when_full` é True: se a fila estiver
+    cheia o lote é descartado e contado em `dropped`. Os registros acumulados
+    são gravados juntos a cada `batch_rows` objetos ou `flush_interval`
+    segundos, o que acontecer primeiro.
+
+    `submit` também aceita uma função sem argumentos que retorna os
+    registros (ex: `functools.partial(make_records, ...)`): ela é chamada na
+    thread de escrita, tirando a montagem dos registros da thread que envia.
+    """
+
+    def __init__(self, sink, max_queue=256, batch_rows=4096, flush_interval=0.5, drop_when_full=True):
+        self.sink = sink
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self.drop_when_full = drop_when_full
+        self.dropped = 0 # Lotes (frames) descartados por fila cheia
+        self.written = 0 # Registros gravados
+        self.error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name="AsyncSink", daemon=True)
+        self._thread.start()
+
+    def submit(self, records):
+        """Enfileira um array de registros (tipicamente de um frame) ou uma função que o retorna."""
+        if self.drop_when_full:
+            try:
+                self._queue.put_nowait(records)
+            except queue.Full:
+                self.dropped += 1
+        else:
+            self._queue.put(records)
+
+    def _run(self):
+        pending, rows = [], 0
+        last_flush = time.monotonic()
+        done = False
+        while not done:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                if item is None:
+                    done = True
+                elif callable(item):
+                    try:
+                        item = item()
+                        pending.append(item)
+                        rows += len(item)
+                    except Exception as e:
+                        self.error = e # Frame perdido; os próximos continuam
+                else:
+                    pending.append(item)
+                    rows += len(item)
+            except queue.Empty:
+                pass
+            if pending and (done or rows >= self.batch_rows or time.monotonic() - last_flush >= self.flush_interval):
+                try:
+                    self.sink.write_batch(np.concatenate(pending))
+                    self.sink.flush()
+                    self.written += rows
+                except Exception as e:
+                    self.error = e # Registrado para o chamador; a escrita continua com os próximos lotes
+                pending, rows = [], 0
+                last_flush = time.monotonic()
+        self.sink.close()
+
+    def close(self):
+        """Grava o que estiver pendente e fecha o sink."""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,78 @@
+"""`ChangeGate` deve devolver o mesmo resultado que processar o frame inteiro."""
+import cv2
+import numpy as np
+
+from change_gate import ChangeGate
+from color_engine import ColorFilterEngine, ColorRange, FilterParams
+
+PARAMS = FilterParams(ranges=(ColorRange((0, 100, 100), (10, 255, 255)), ColorRange((100, 100, 100), (130, 255, 255))),
+                      blur_size=5, erosion_size=2, dilation_size=3, min_contour_area=30)
+
+
+def make_frame():
+    frame = np.random.RandomState(0).randint(0, 40, (256, 320, 3)).astype(np.uint8)
+    cv2.circle(frame, (60, 60), 25, (0, 0, 230), -1)
+    cv2.rectangle(frame, (150, 100), (230, 170), (230, 40, 0), -1)
+    cv2.circle(frame, (280, 220), 20, (0, 0, 230), -1)
+    return frame
+
+
+def assert_same(result, expected):
+    assert np.array_equal(result.mask, expected.mask)
+    assert np.array_equal(result.labels, expected.labels)
+    assert np.array_equal(result.boxes, expected.boxes)
+    assert np.allclose(result.areas, expected.areas)
+    assert np.allclose(result.centroids, expected.centroids, equal_nan=True)
+    assert np.array_equal(result.object_labels(), expected.object_labels())
+
+
+def test_partial_matches_full_engine():
+    engine = ColorFilterEngine()
+    gate = ChangeGate(engine, tile=32)
+    frame = make_frame()
+    gate.process(frame, PARAMS)
+    assert gate.last_action == "full"
+
+    # Um objeto novo dentro de um único bloco
+    changed = frame.copy()
+    cv2.circle(changed, (112, 208), 10, (230, 40, 0), -1)
+    result = gate.process(changed, PARAMS)
+    assert gate.last_action == "partial"
+    assert 0 < gate.last_changed <= gate.max_partial
+    assert_same(result, engine.process(changed, PARAMS))
+
+    # Mudança encostada nas bordas do bloco: blur e morfologia precisam da margem de contexto
+    changed = changed.copy()
+    changed[64:96, 176:208] = (230, 40, 0)
+    result = gate.process(changed, PARAMS)
+    assert gate.last_action == "partial"
+    assert_same(result, engine.process(changed, PARAMS))
+
+    assert gate.process(changed, PARAMS) is result
+    assert gate.last_action == "reused"
+
+
+def test_forced_full_rescan():
+    engine = ColorFilterEngine()
+    gate = ChangeGate(engine, refresh_interval=2)
+    frame = make_frame()
+    gate.process(frame, PARAMS)
+    gate.process(frame, PARAMS)
+    gate.process(frame, PARAMS)
+    assert gate.counts == {"reused": 2, "partial": 0, "full": 1}
+    # `refresh_interval` frames depois do último completo, mesmo sem mudança
+    gate.process(frame, PARAMS)
+    assert gate.last_action == "full"
+
+    # Parâmetros novos ou mudança em mais de `max_partial` do frame também refazem tudo
+    params = FilterParams(ranges=PARAMS.ranges[:1], min_contour_area=30)
+    assert_same(gate.process(frame, params), engine.process(frame, params))
+    assert gate.last_action == "full"
+    flipped = np.ascontiguousarray(frame[::-1])
+    assert_same(gate.process(flipped, params), engine.process(flipped, params))
+    assert gate.last_action == "full"
+    assert gate.counts["full"] == 4
+
+    gate.reset()
+    gate.process(flipped, params)
+    assert gate.last_action == "full"
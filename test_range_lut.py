@@ -0,0 +1,92 @@
+"""`RangeLUT` e `build_mask` devem coincidir com um `cv2.inRange` por faixa."""
+import cv2
+import numpy as np
+import pytest
+
+from buffers import BufferPool
+from color_engine import HUE_MAX, ColorFilterEngine, ColorRange, RangeLUT
+
+
+def random_ranges(rng, count):
+    """Faixas HSV aleatórias (algumas com wrap-around do Matiz), largas o bastante para se sobreporem."""
+    ranges = []
+    for i in range(count):
+        lower = rng.randint(0, 200, 3)
+        upper = np.minimum(lower + rng.randint(30, 120, 3), 255)
+        lower[0] = rng.randint(0, HUE_MAX + 1)
+        if i % 4 == 3:
+            upper[0] = rng.randint(0, lower[0]) if lower[0] > 0 else 0 # Wrap: mínimo > máximo
+            lower[0] = max(lower[0], upper[0] + 1)
+        else:
+            upper[0] = min(lower[0] + rng.randint(5, 60), HUE_MAX)
+        ranges.append(ColorRange(tuple(int(v) for v in lower), tuple(int(v) for v in upper), "HSV"))
+    return ranges
+
+
+def reference(image, entries):
+    """Máscara e rótulos esperados: uma faixa por vez, o primeiro rótulo que cobre o pixel vence."""
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    labels = np.zeros(image.shape[:2], dtype=np.uint8)
+    for label, r in entries:
+        lower, upper = np.array(r.lower), np.array(r.upper)
+        if r.wraps_hue():
+            inside = (cv2.inRange(image, np.array([0, lower[1], lower[2]]), upper)
+                      | cv2.inRange(image, lower, np.array([HUE_MAX, upper[1], upper[2]])))
+        else:
+            inside = cv2.inRange(image, lower, upper)
+        labels[(inside > 0) & (labels == 0)] = label
+        mask |= inside
+    return mask, labels
+
+
+def random_frame(rng, shape=(97, 131)):
+    return rng.randint(0, 256, shape + (3,)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("count", [1, 8, 9, 31])
+@pytest.mark.parametrize("pooled", [False, True])
+def test_lut_matches_inrange(count, pooled):
+    rng = np.random.RandomState(count)
+    entries = tuple(enumerate(random_ranges(rng, count), 1))
+    lut = RangeLUT(entries)
+    assert lut.dtype == (np.uint8 if count <= 8 else np.int32)
+    pool = BufferPool() if pooled else None
+    for _ in range(3):
+        image = random_frame(rng)
+        expected_mask, expected_labels = reference(image, entries)
+        mask, labels = lut.apply(image, pool)
+        assert np.array_equal(mask, expected_mask)
+        assert np.array_equal(labels, expected_labels)
+
+
+@pytest.mark.parametrize("count", [1, 2, 8, 9, 31, 32, 70])
+def test_build_mask_matches_inrange(count):
+    # Acima de 31 faixas o motor divide em várias tabelas; rótulos das primeiras têm prioridade
+    rng = np.random.RandomState(100 + count)
+    entries = tuple(enumerate(random_ranges(rng, count), 1))
+    engine = ColorFilterEngine()
+    for _ in range(3):
+        image = random_frame(rng)
+        expected_mask, expected_labels = reference(image, entries)
+        mask, labels = engine.build_mask(image, entries, with_labels=True, pool=engine.buffers())
+        assert np.array_equal(mask, expected_mask)
+        assert np.array_equal(labels, expected_labels)
+
+
+def test_wrapping_ranges_only():
+    entries = ((1, ColorRange((170, 50, 50), (10, 255, 255))), (2, ColorRange((175, 0, 0), (3, 255, 255))),
+               (3, ColorRange((100, 0, 0), (110, 255, 255))))
+    hue = np.repeat(np.arange(256, dtype=np.uint8), 4).reshape(32, 32)
+    image = cv2.merge([hue, np.full_like(hue, 200), np.full_like(hue, 200)])
+    mask, labels = RangeLUT(entries).apply(image)
+    expected_mask, expected_labels = reference(image, entries)
+    assert np.array_equal(mask, expected_mask)
+    assert np.array_equal(labels, expected_labels)
+    assert set(np.unique(labels[hue <= 10]).tolist()) == {1}
+    assert set(np.unique(labels[(hue >= 100) & (hue <= 110)]).tolist()) == {3}
+
+
+def test_too_many_ranges_per_table():
+    entries = tuple(enumerate(random_ranges(np.random.RandomState(0), RangeLUT.MAX_RANGES + 1), 1))
+    with pytest.raises(ValueError):
+        RangeLUT(entries)
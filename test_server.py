@@ -0,0 +1,142 @@
+"""Servidor de detecções de ponta a ponta em localhost, com uma fonte sintética."""
+import asyncio
+import json
+
+import numpy as np
+
+from capture import SyntheticCapture
+from color_engine import ColorRange, FilterParams
+from server import (HEADER, MAGIC, MSG_DETECTIONS, MSG_HELLO, MSG_MASK_RAW, MSG_SUBSCRIBE, SUB_DETECTIONS,
+                    SUB_MASK_RAW, VERSION, ClientConnection, DetectionServer, decode_detections,
+                    decode_raw_mask, pack_message, read_message)
+from sinks import RECORD_DTYPE
+
+PARAMS = FilterParams(ranges=(ColorRange((0, 100, 100), (10, 255, 255), name="vermelho"),
+                              ColorRange((40, 100, 100), (85, 255, 255), name="verde")),
+                      min_contour_area=20)
+
+
+async def started_server(fps=60.0, queue_size=8):
+    server = DetectionServer(SyntheticCapture(320, 240, fps=fps), PARAMS, queue_size=queue_size)
+    await server.start("127.0.0.1", 0)
+    return server
+
+
+async def connect(server, flags):
+    host, port = server.addresses[0][:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(pack_message(MSG_SUBSCRIBE, bytes([flags])))
+    await writer.drain()
+    return reader, writer
+
+
+async def read_until(reader, msg_type, timeout=5.0):
+    while True:
+        message = await asyncio.wait_for(read_message(reader), timeout)
+        if message[0] == msg_type:
+            return message
+
+
+def test_hello_and_detections():
+    async def scenario():
+        server = await started_server()
+        try:
+            reader, writer = await connect(server, SUB_DETECTIONS)
+            msg_type, _, _, payload = await asyncio.wait_for(read_message(reader), 5.0)
+            assert msg_type == MSG_HELLO
+            hello = json.loads(payload.decode("utf-8"))
+            assert hello["names"] == {"1": "vermelho", "2": "verde"}
+            assert np.dtype([tuple(field) for field in hello["dtype"]]) == RECORD_DTYPE
+
+            frames = []
+            while len(frames) < 3:
+                _, frame, timestamp, payload = await read_until(reader, MSG_DETECTIONS)
+                records = decode_detections(payload)
+                assert len(payload) == len(records) * RECORD_DTYPE.itemsize
+                assert len(records) > 0
+                assert (records["frame"] == frame).all()
+                assert np.allclose(records["timestamp"], timestamp)
+                assert set(records["label"].tolist()) <= {1, 2}
+                assert (records["w"] > 0).all() and (records["h"] > 0).all()
+                frames.append(frame)
+            assert frames == sorted(frames)
+            writer.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_raw_mask_header():
+    async def scenario():
+        server = await started_server()
+        try:
+            reader, writer = await connect(server, SUB_MASK_RAW)
+            # Detecções (a assinatura padrão) podem chegar antes de o servidor ler a assinatura
+            while True:
+                header = await asyncio.wait_for(reader.readexactly(HEADER.size), 5.0)
+                magic, version, msg_type, _, frame, _, length = HEADER.unpack(header)
+                assert (magic, version) == (MAGIC, VERSION)
+                if msg_type == MSG_MASK_RAW:
+                    break
+                await reader.readexactly(length)
+            mask = decode_raw_mask(await reader.readexactly(length))
+            assert length == 4 + 320 * 240
+            assert mask.shape == (240, 320)
+            assert set(np.unique(mask).tolist()) <= {0, 255}
+            writer.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_client_queue_drops_oldest():
+    client = ClientConnection(None, 2)
+    for message in (b"a", b"b", b"c"):
+        client.push(message)
+    assert client.dropped == 1
+    assert [client.queue.get_nowait() for _ in range(2)] == [b"b", b"c"]
+
+
+def test_slow_client_drops_without_blocking_others():
+    async def scenario():
+        server = await started_server(fps=0, queue_size=2)
+        try:
+            # O cliente lento assina máscaras (~77 KB cada) e não lê nada
+            slow_reader, slow_writer = await connect(server, SUB_MASK_RAW)
+            fast_reader, fast_writer = await connect(server, SUB_DETECTIONS)
+            await read_until(fast_reader, MSG_HELLO)
+            start = server.frames
+            received = 0
+            while server.frames < start + 200:
+                await read_until(fast_reader, MSG_DETECTIONS)
+                received += 1
+            slow = next(c for c in server.clients if c.flags == SUB_MASK_RAW)
+            assert slow.dropped > 0
+            assert slow.queue.qsize() <= 2
+            assert received >= 100 # O cliente rápido não é atrasado pelo lento
+            # A conexão lenta continua válida: volta a receber ao ler
+            await read_until(slow_reader, MSG_HELLO)
+            await read_until(slow_reader, MSG_MASK_RAW, timeout=10.0)
+            slow_writer.close()
+            fast_writer.close()
+        finally:
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_stop_cancels_client_handlers():
+    async def scenario():
+        server = await started_server()
+        _, writer = await connect(server, SUB_DETECTIONS)
+        while not server._handlers:
+            await asyncio.sleep(0.01)
+        handlers = list(server._handlers)
+        await server.stop()
+        assert all(task.cancelled() for task in handlers)
+        assert not server.clients
+        writer.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,132 @@
+"""Sinks de detecções: ida e volta por `AsyncSink` em cada formato, descarte e erros."""
+import csv
+import json
+import math
+import threading
+
+import numpy as np
+import pytest
+
+from sinks import RECORD_DTYPE, AsyncSink, open_sink, read_binary_records
+
+NAMES = {1: "vermelho", 2: "azul"}
+STREAMS = {0: "cam0", 1: "cam1"}
+
+
+def make_batch(frame, count, stream=0):
+    records = np.zeros(count, dtype=RECORD_DTYPE)
+    records["stream"] = stream
+    records["frame"] = frame
+    records["timestamp"] = np.nan if frame == 0 else 10.0 + frame / 30.0
+    records["label"] = np.arange(count) % 2 + 1
+    records["x"] = np.arange(count) * 10
+    records["y"] = frame
+    records["w"] = 5
+    records["h"] = 7
+    records["cx"] = records["x"] + 2.5
+    records["cy"] = records["y"] + 3.5
+    records["area"] = np.arange(count) + 0.25
+    if count:
+        records["cx"][-1] = records["cy"][-1] = np.nan # Centroide indefinido (m00 == 0)
+    return records
+
+
+def write_batches(path, batches, **kwargs):
+    sink = AsyncSink(open_sink(str(path), NAMES, STREAMS), **kwargs)
+    for batch in batches:
+        sink.submit(batch)
+    sink.close()
+    return sink
+
+
+BATCHES = [make_batch(0, 3), make_batch(1, 0), make_batch(2, 4, stream=1), make_batch(3, 1)]
+
+
+def test_binary_round_trip(tmp_path):
+    path = tmp_path / "log.bin"
+    # Lotes pequenos forçam várias gravações
+    sink = write_batches(path, BATCHES, batch_rows=2, drop_when_full=False)
+    expected = np.concatenate(BATCHES)
+    assert sink.written == len(expected) and sink.error is None
+    records, names, streams = read_binary_records(str(path))
+    assert records.dtype == RECORD_DTYPE
+    assert records.tobytes() == expected.tobytes() # Inclusive os NaN
+    assert names == NAMES and streams == STREAMS
+
+
+def test_json_lines_round_trip(tmp_path):
+    path = tmp_path / "log.jsonl"
+    write_batches(path, BATCHES, drop_when_full=False)
+    expected = np.concatenate(BATCHES)
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert len(rows) == len(expected)
+    for row, r in zip(rows, expected):
+        assert row["stream"] == STREAMS[int(r["stream"])]
+        assert row["frame"] == r["frame"]
+        assert row["timestamp"] == (None if math.isnan(r["timestamp"]) else round(float(r["timestamp"]), 3))
+        assert row["name"] == NAMES[int(r["label"])]
+        assert row["box"] == [int(r["x"]), int(r["y"]), int(r["w"]), int(r["h"])]
+        if math.isnan(r["cx"]):
+            assert row["centroid"] is None
+        else:
+            assert row["centroid"] == pytest.approx([float(r["cx"]), float(r["cy"])], abs=0.01)
+        assert row["area"] == pytest.approx(float(r["area"]), abs=0.01)
+
+
+def test_csv_round_trip(tmp_path):
+    path = tmp_path / "log.csv"
+    write_batches(path, BATCHES, drop_when_full=False)
+    expected = np.concatenate(BATCHES)
+    with open(path, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == len(expected)
+    for row, r in zip(rows, expected):
+        assert row["stream"] == STREAMS[int(r["stream"])]
+        assert int(row["frame"]) == r["frame"]
+        assert row["timestamp"] == ("" if math.isnan(r["timestamp"]) else str(round(float(r["timestamp"]), 3)))
+        assert row["name"] == NAMES[int(r["label"])]
+        assert [int(row[k]) for k in ("x", "y", "w", "h")] == [int(r[k]) for k in ("x", "y", "w", "h")]
+        assert row["cx"] == ("" if math.isnan(r["cx"]) else str(round(float(r["cx"]), 3)))
+        assert float(row["area"]) == pytest.approx(float(r["area"]), abs=0.01)
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        open_sink(str(tmp_path / "log.txt"))
+
+
+def test_drops_when_queue_full(tmp_path):
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5.0)
+        return make_batch(0, 1)
+
+    sink = AsyncSink(open_sink(str(tmp_path / "log.bin")), max_queue=2)
+    sink.submit(blocking) # Ocupa a thread de escrita
+    assert started.wait(5.0)
+    for frame in range(1, 6):
+        sink.submit(make_batch(frame, 2)) # Só os dois primeiros cabem na fila
+    assert sink.dropped == 3
+    release.set()
+    sink.close()
+    records, _, _ = read_binary_records(str(tmp_path / "log.bin"))
+    assert sink.written == 5
+    assert records["frame"].tolist() == [0, 1, 1, 2, 2]
+
+
+def test_callable_error_does_not_stop_writer(tmp_path):
+    def broken():
+        raise RuntimeError("falhou ao montar")
+
+    sink = AsyncSink(open_sink(str(tmp_path / "log.bin")), drop_when_full=False)
+    sink.submit(lambda: make_batch(1, 2))
+    sink.submit(broken)
+    sink.submit(lambda: make_batch(2, 3))
+    sink.close()
+    assert isinstance(sink.error, RuntimeError)
+    records, _, _ = read_binary_records(str(tmp_path / "log.bin"))
+    assert records["frame"].tolist() == [1, 1, 2, 2, 2]
+    assert sink.written == 5
@@ -0,0 +1,48 @@
+"""Bloco a bloco deve dar o mesmo resultado que o frame inteiro."""
+import cv2
+import numpy as np
+import pytest
+
+from color_engine import ColorFilterEngine, ColorRange, FilterParams
+from tiling import TiledProcessor
+
+
+def make_frame():
+    """Quadrados vermelhos e azuis alternados, vários cruzando as emendas dos blocos."""
+    frame = np.zeros((240, 320, 3), dtype=np.uint8)
+    colors = [(0, 0, 255), (255, 0, 0)]
+    for i, x in enumerate(range(10, 300, 50)):
+        y = 20 + (i % 3) * 70
+        cv2.rectangle(frame, (x, y), (x + 40, y + 50), colors[i % 2], -1)
+    return frame
+
+
+@pytest.mark.parametrize("analysis", ["contours", "components"])
+@pytest.mark.parametrize("workers", [1, 3])
+def test_tiled_labels_match_engine(analysis, workers):
+    # Duas faixas no mesmo espaço de cor: rótulos saem da tabela, não da mistura de espaços
+    params = FilterParams(ranges=(ColorRange((0, 100, 100), (10, 255, 255), "HSV"),
+                                  ColorRange((100, 100, 100), (130, 255, 255), "HSV")),
+                          min_contour_area=100, analysis=analysis)
+    frame = make_frame()
+    engine = ColorFilterEngine()
+    expected = engine.process(frame, params)
+    tiled = TiledProcessor(engine, tile_size=64, workers=workers)
+    try:
+        result = tiled.process(frame, params)
+    finally:
+        tiled.close()
+
+    assert np.array_equal(result.mask, expected.mask)
+    assert result.labels is not None
+    assert np.array_equal(result.labels, expected.labels)
+    assert sorted(set(expected.object_labels().tolist())) == [1, 2]
+    assert np.array_equal(result.object_labels(), expected.object_labels())
+
+
+def test_tiled_single_range_has_no_labels():
+    params = FilterParams(ranges=(ColorRange((0, 100, 100), (10, 255, 255), "HSV"),), min_contour_area=100)
+    tiled = TiledProcessor(ColorFilterEngine(), tile_size=64)
+    result = tiled.process(make_frame(), params)
+    assert result.labels is None
+    assert np.array_equal(result.object_labels(), np.ones(result.count, dtype=np.int64))
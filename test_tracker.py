@@ -0,0 +1,82 @@
+"""IDs estáveis do `ObjectTracker`."""
+import numpy as np
+
+from tracker import ObjectTracker
+
+SIZE = 20
+
+
+def detections(*centers):
+    centers = np.array(centers, dtype=np.float64).reshape(-1, 2)
+    boxes = np.hstack([centers - SIZE / 2.0, np.full((len(centers), 2), SIZE)])
+    return boxes, centers
+
+
+def ids_by_position(tracks):
+    return {tuple(np.round(c).astype(int)): int(i) for i, c in zip(tracks.ids, tracks.centroids)}
+
+
+def test_crossing_objects_keep_ids():
+    # Dois objetos em sentidos opostos na mesma linha, a 30 px/s; cruzam por volta de t=1 s
+    tracker = ObjectTracker(max_distance=40.0)
+    history = {}
+    for frame in range(61):
+        t = frame / 30.0
+        a, b = (100 + 30 * frame, 200), (1900 - 30 * frame, 204)
+        tracks = tracker.update(*detections(a, b), timestamp=t)
+        ids = ids_by_position(tracks)
+        history.setdefault("a", set()).add(ids[a])
+        history.setdefault("b", set()).add(ids[b])
+    assert len(history["a"]) == 1 and len(history["b"]) == 1
+    assert history["a"] != history["b"]
+
+
+def test_object_returns_within_max_missed():
+    tracker = ObjectTracker(max_missed=3)
+    first = tracker.update(*detections((100, 100), (300, 300)), timestamp=0.0).ids
+    for frame in range(1, 4):
+        # O segundo objeto some por 3 frames (dentro de `max_missed`) e volta no mesmo lugar
+        tracker.update(*detections((100, 100)), timestamp=frame / 30.0)
+    back = tracker.update(*detections((100, 100), (300, 300)), timestamp=4 / 30.0)
+    assert back.ids.tolist() == first.tolist()
+
+    for frame in range(5, 10):
+        tracker.update(*detections((100, 100)), timestamp=frame / 30.0)
+    # Ausente por mais de `max_missed` frames: volta com ID novo
+    late = tracker.update(*detections((100, 100), (300, 300)), timestamp=10 / 30.0)
+    assert late.ids[0] == first[0]
+    assert late.ids[1] not in first
+
+
+def test_repeated_timestamp_does_not_move_predictions():
+    tracker = ObjectTracker(max_distance=30.0)
+    # 300 px/s para a direita
+    for frame in range(5):
+        tracks = tracker.update(*detections((100 + 10 * frame, 100)), timestamp=frame / 30.0)
+    track_id = tracks.ids[0]
+    velocity = tracks.velocities[0].copy()
+    assert velocity[0] > 100
+
+    # Quadro congelado: mesmo timestamp e mesma posição, várias vezes
+    for _ in range(3):
+        tracks = tracker.update(*detections((140, 100)), timestamp=4 / 30.0)
+        assert tracks.ids[0] == track_id
+        assert np.allclose(tracks.velocities[0], velocity)
+    # Timestamp ausente depois de reais também não avança
+    tracks = tracker.update(*detections((140, 100)), timestamp=None)
+    assert tracks.ids[0] == track_id
+    assert np.allclose(tracks.velocities[0], velocity)
+
+    # O movimento continua de onde parou
+    tracks = tracker.update(*detections((150, 100)), timestamp=5 / 30.0)
+    assert tracks.ids[0] == track_id
+    # Medida de 10 px em 1/30 s, suavizada com a velocidade de antes do congelamento
+    assert np.allclose(tracks.velocities[0], 0.5 * velocity + 0.5 * np.array([300.0, 0.0]))
+
+
+def test_without_timestamps_uses_frames():
+    tracker = ObjectTracker()
+    for frame in range(4):
+        tracks = tracker.update(*detections((50 + 5 * frame, 50)))
+    assert tracks.ids.tolist() == [1]
+    assert np.allclose(tracks.velocities[0], [5, 0], atol=1.0)
@@ -0,0 +1,74 @@
+"""Modo congelado: cada mudança de parâmetro deve dar o mesmo resultado que `engine.process`."""
+import dataclasses
+
+import cv2
+import numpy as np
+import pytest
+
+from color_engine import ColorFilterEngine, ColorRange, FilterParams
+from tuning import FrozenFrameProcessor
+
+RED = ColorRange((0, 100, 100), (10, 255, 255), "HSV")
+BLUE = ColorRange((100, 100, 100), (130, 255, 255), "HSV")
+GREEN_LAB = ColorRange((50, 0, 0), (255, 110, 255), "Lab")
+BASE = FilterParams(ranges=(RED, BLUE), blur_size=3, erosion_size=1, dilation_size=2, min_contour_area=40)
+
+
+def make_frame():
+    frame = np.random.RandomState(1).randint(0, 50, (180, 240, 3)).astype(np.uint8)
+    cv2.circle(frame, (50, 50), 22, (0, 0, 230), -1)
+    cv2.circle(frame, (120, 60), 6, (0, 0, 230), -1)
+    cv2.rectangle(frame, (140, 90), (220, 160), (230, 40, 0), -1)
+    cv2.rectangle(frame, (20, 120), (80, 170), (0, 200, 0), -1)
+    return frame
+
+
+def assert_same(result, expected):
+    assert np.array_equal(result.mask, expected.mask)
+    assert (result.labels is None) == (expected.labels is None)
+    if expected.labels is not None:
+        assert np.array_equal(result.labels, expected.labels)
+    assert np.array_equal(result.boxes, expected.boxes)
+    assert np.allclose(result.areas, expected.areas)
+    assert np.allclose(result.centroids, expected.centroids, equal_nan=True)
+    assert result.scale == expected.scale
+
+
+@pytest.mark.parametrize("change, stages", [
+    ({"min_contour_area": 300}, ("contours",)),
+    ({"analysis": "components"}, ("contours",)),
+    ({"dilation_size": 5}, ("morphology", "contours")),
+    ({"erosion_size": 0}, ("morphology", "contours")),
+    ({"blur_size": 7}, ("blur", "mask", "merge", "morphology", "contours")),
+    ({"ranges": (RED, ColorRange((95, 80, 80), (135, 255, 255), "HSV"))}, ("mask", "merge", "morphology", "contours")),
+    ({"ranges": (RED, BLUE, GREEN_LAB)}, None),
+    ({"ranges": (RED,)}, ("mask", "merge", "morphology", "contours")),
+    ({"process_scale": 0.5}, None),
+])
+def test_change_matches_engine(change, stages):
+    frame = make_frame()
+    frozen = FrozenFrameProcessor(ColorFilterEngine())
+    frozen.freeze(frame)
+    first = frozen.process(BASE)
+    assert_same(first, ColorFilterEngine().process(frame, BASE))
+    assert frozen.process(BASE) is first # Nada mudou: mesmo objeto
+
+    params = dataclasses.replace(BASE, **change)
+    result = frozen.process(params)
+    assert_same(result, ColorFilterEngine().process(frame, params))
+    if stages is not None:
+        assert frozen.recomputed == stages
+
+    # Voltar aos parâmetros originais também confere com o motor
+    assert_same(frozen.process(BASE), first)
+
+
+def test_changes_in_sequence():
+    frame = make_frame()
+    frozen = FrozenFrameProcessor(ColorFilterEngine())
+    frozen.freeze(frame)
+    params = BASE
+    for change in ({"min_contour_area": 10}, {"dilation_size": 0}, {"blur_size": 0},
+                   {"ranges": (BLUE, GREEN_LAB)}, {"process_scale": 0.5}, {"erosion_size": 3}):
+        params = dataclasses.replace(params, **change)
+        assert_same(frozen.process(params), ColorFilterEngine().process(frame, params))
@@ -0,0 +1,92 @@
+"""Processamento em blocos sobrepostos para entradas de altíssima resolução (4K/8K)."""
+import dataclasses
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from color_engine import kernel_margin, scale_kernel
+from profiling import NULL_TIMER
+
+
+def tile_grid(width, height, tile_size):
+    """Lista de blocos (x0, y0, x1, y1) que cobrem a imagem sem sobreposição."""
+    return [(x, y, min(x + tile_size, width), min(y + tile_size, height))
+            for y in range(0, height, tile_size) for x in range(0, width, tile_size)]
+
+
+class TiledProcessor:
+    """Gera a máscara em blocos de `tile_size` pixels e busca os objetos na máscara costurada.
+
+    Cada bloco é processado com uma borda extra de contexto (calculada pelos
+    kernels de blur, erosão e dilatação, `kernel_margin`), e só o seu interior
+    é copiado para a máscara final, que sai idêntica à do frame inteiro. Os
+    temporários (frame convertido, suavizado, tabelas por canal) passam a ter o
+    tamanho de um bloco, então o pico de memória fica limitado e os dados
+    cabem melhor em cache. Como contornos e componentes são extraídos da
+    máscara completa, objetos que cruzam as emendas saem inteiros. Com
+    `workers` > 1 os blocos são distribuídos entre núcleos.
+
+    Tem a mesma interface `process` do motor e pode substituí-lo no pipeline.
+    """
+
+    def __init__(self, engine, tile_size=1024, workers=1):
+        self.engine = engine
+        self.tile_size = tile_size
+        self.workers = max(1, workers or 1)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="Tile") if self.workers > 1 else None
+
+    def process(self, frame, params, timer=NULL_TIMER):
+        """Processa um frame BGR e retorna um `DetectionResult`, como `ColorFilterEngine.process`."""
+        timer.start()
+        frame, scale = self.engine.scale_frame(frame, params.process_scale, self.engine.buffers())
+        if scale != 1.0:
+            timer.mark("scale")
+            # Blocos trabalham na resolução de análise, com os kernels já convertidos
+            tile_params = dataclasses.replace(
+                params, process_scale=1.0, blur_size=scale_kernel(params.blur_size, scale),
+                erosion_size=scale_kernel(params.erosion_size, scale),
+                dilation_size=scale_kernel(params.dilation_size, scale))
+        else:
+            tile_params = params
+
+        height, width = frame.shape[:2]
+        margin = kernel_margin(tile_params)
+        mask = np.empty((height, width), dtype=np.uint8)
+        # Com mais de uma faixa o motor também gera a imagem de rótulos; ela é
+        # criada quando o primeiro bloco a devolve
+        labels = []
+        labels_lock = threading.Lock()
+
+        def run(tile, tile_timer):
+            x0, y0, x1, y1 = tile
+            cx0, cy0 = max(0, x0 - margin), max(0, y0 - margin)
+            cx1, cy1 = min(width, x1 + margin), min(height, y1 + margin)
+            part_mask, part_labels, _ = self.engine.compute_mask(frame[cy0:cy1, cx0:cx1], tile_params, tile_timer)
+            inner = (slice(y0 - cy0, y1 - cy0), slice(x0 - cx0, x1 - cx0))
+            mask[y0:y1, x0:x1] = part_mask[inner]
+            if part_labels is not None:
+                if not labels:
+                    with labels_lock:
+                        if not labels:
+                            labels.append(np.zeros((height, width), dtype=np.uint8))
+                labels[0][y0:y1, x0:x1] = part_labels[inner]
+
+        tiles = tile_grid(width, height, self.tile_size)
+        if self._executor is None or len(tiles) == 1:
+            for tile in tiles:
+                run(tile, timer)
+        else:
+            # Os tempos por etapa ficam somados no bloco "tiles" (as etapas rodam em paralelo)
+            list(self._executor.map(lambda tile: run(tile, NULL_TIMER), tiles))
+            timer.mark("tiles")
+
+        timer.start()
+        result = self.engine.find(mask, params, scale)
+        result.labels = labels[0] if labels else None
+        timer.mark("contours")
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
@@ -0,0 +1,158 @@
+"""Rastreamento de múltiplos objetos com IDs estáveis sobre a saída do motor."""
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class Tracks:
+    """Estado de um conjunto de trilhas (arrays alinhados por posição)."""
+    ids: np.ndarray        # (N,) ID estável de cada trilha
+    boxes: np.ndarray      # (N, 4) última caixa x, y, w, h
+    centroids: np.ndarray  # (N, 2) último centro
+    velocities: np.ndarray # (N, 2) velocidade suavizada (px/s com timestamps, senão px/frame)
+    ages: np.ndarray       # (N,) frames desde a criação
+    missed: np.ndarray     # (N,) frames consecutivos sem detecção
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def box_iou(boxes_a, boxes_b):
+    """Matriz (M, N) de IoU entre caixas x, y, w, h."""
+    a = boxes_a[:, None, :].astype(np.float64)
+    b = boxes_b[None, :, :].astype(np.float64)
+    ix = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    iy = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = ix * iy
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def match_mutual_best(score):
+    """Associação gulosa vetorizada: casa pares que são o melhor um do outro, em rodadas.
+
+    `score` é (M, N) com -inf nos pares inválidos. Cada rodada casa ao menos
+    o par de maior score restante, e tudo é feito com operações NumPy sobre a
+    matriz, sem laços Python por par. Retorna (linhas, colunas) casadas.
+    """
+    score = score.copy()
+    rows, cols = [], []
+    while score.size:
+        best_col = score.argmax(axis=1)
+        best_row = score.argmax(axis=0)
+        candidates = np.arange(score.shape[0])
+        valid = np.isfinite(score[candidates, best_col]) & (best_row[best_col] == candidates)
+        if not valid.any():
+            break
+        r, c = candidates[valid], best_col[valid]
+        rows.append(r)
+        cols.append(c)
+        score[r, :] = -np.inf
+        score[:, c] = -np.inf
+    if not rows:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    return np.concatenate(rows), np.concatenate(cols)
+
+
+class ObjectTracker:
+    """Associa detecções entre frames por IoU / distância entre centros e atribui IDs estáveis.
+
+    As posições das trilhas são previstas pela velocidade antes da associação.
+    Um par é candidato se o IoU for ao menos `iou_threshold` ou se os centros
+    estiverem a até `max_distance` pixels; trilhas sem detecção por mais de
+    `max_missed` frames são removidas.
+    """
+
+    def __init__(self, iou_threshold=0.1, max_distance=80.0, max_missed=5, smoothing=0.5):
+        self.iou_threshold = iou_threshold
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.smoothing = smoothing # Peso da velocidade anterior na média exponencial
+        self.reset()
+
+    def reset(self):
+        """Descarta todas as trilhas."""
+        self.tracks = Tracks(
+            np.empty(0, dtype=np.int64), np.empty((0, 4), dtype=np.float64), np.empty((0, 2), dtype=np.float64),
+            np.empty((0, 2), dtype=np.float64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        self._next_id = 1
+        self._last_time = None
+
+    def update(self, boxes, centroids, timestamp=None):
+        """Atualiza as trilhas com as detecções do frame e retorna um `Tracks` alinhado a elas."""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        centroids = np.asarray(centroids, dtype=np.float64).reshape(-1, 2)
+        # Centro da caixa quando o centroide não existe (m00 == 0)
+        centers = boxes[:, :2] + boxes[:, 2:] / 2.0
+        centroids = np.where(np.isnan(centroids), centers, centroids)
+
+        # Passo de tempo nas unidades das velocidades: segundos com timestamps, 1 frame sem eles.
+        # Timestamp repetido (ex: frame congelado), que volta ou que falta depois de um real não
+        # avança nada: a previsão fica parada e a velocidade não é atualizada.
+        if timestamp is None:
+            dt = 1.0 if self._last_time is None else 0.0
+        elif self._last_time is not None and timestamp > self._last_time:
+            dt = timestamp - self._last_time
+        else:
+            dt = 0.0
+        if timestamp is not None:
+            self._last_time = timestamp
+
+        old = self.tracks
+        # Previsão pela velocidade atual
+        predicted_centroids = old.centroids + old.velocities * dt
+        predicted_boxes = old.boxes.copy()
+        predicted_boxes[:, :2] += old.velocities * dt
+
+        iou = box_iou(predicted_boxes, boxes)
+        distance = np.linalg.norm(predicted_centroids[:, None, :] - centroids[None, :, :], axis=2)
+        valid = (iou >= self.iou_threshold) | (distance <= self.max_distance)
+        # IoU domina; a distância só desempata
+        score = np.where(valid, iou + 1e-3 * (1.0 - np.minimum(distance / self.max_distance, 1.0)), -np.inf)
+        track_idx, det_idx = match_mutual_best(score)
+
+        count = len(boxes)
+        ids = np.empty(count, dtype=np.int64)
+        velocities = np.zeros((count, 2), dtype=np.float64)
+        ages = np.zeros(count, dtype=np.int64)
+
+        # Trilhas casadas: mesma identidade, velocidade suavizada
+        ids[det_idx] = old.ids[track_idx]
+        if dt > 0:
+            measured = (centroids[det_idx] - old.centroids[track_idx]) / dt
+            velocities[det_idx] = self.smoothing * old.velocities[track_idx] + (1.0 - self.smoothing) * measured
+        else:
+            velocities[det_idx] = old.velocities[track_idx]
+        ages[det_idx] = old.ages[track_idx] + 1
+
+        # Detecções novas recebem IDs novos
+        new = np.ones(count, dtype=bool)
+        new[det_idx] = False
+        new_count = int(new.sum())
+        ids[new] = np.arange(self._next_id, self._next_id + new_count)
+        self._next_id += new_count
+
+        current = Tracks(ids, boxes, centroids, velocities, ages, np.zeros(count, dtype=np.int64))
+
+        # Trilhas sem detecção continuam por até max_missed frames
+        lost = np.ones(len(old), dtype=bool)
+        lost[track_idx] = False
+        lost &= old.missed < self.max_missed
+        self.tracks = Tracks(
+            np.concatenate([current.ids, old.ids[lost]]),
+            np.concatenate([current.boxes, predicted_boxes[lost]]),
+            np.concatenate([current.centroids, predicted_centroids[lost]]),
+            np.concatenate([current.velocities, old.velocities[lost]]),
+            np.concatenate([current.ages, old.ages[lost] + 1]),
+            np.concatenate([current.missed, old.missed[lost] + 1]))
+        return current
+
+
+def draw_tracks(image, tracks, scale=1.0):
+    """Escreve o ID de cada trilha acima da sua caixa (`scale` como em `draw_detections`)."""
+    for track_id, (x, y, _, _) in zip(tracks.ids, tracks.boxes * scale):
+        cv2.putText(image, f"#{track_id}", (int(x), max(12, int(y) - 5)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1, cv2.LINE_AA)
+    return image
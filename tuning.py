@@ -0,0 +1,111 @@
+"""Modo de ajuste sobre um quadro congelado, com recomputação incremental por etapa."""
+from color_engine import apply_morphology, blur_frame, convert_color, group_ranges, merge_masks, scale_kernel
+from profiling import NULL_TIMER
+
+
+class FrozenFrameProcessor:
+    """Processa sempre o mesmo frame, refazendo só as etapas cujos parâmetros mudaram.
+
+    Cada produto intermediário (frame reduzido, frame convertido e suavizado
+    por espaço, máscara por grupo de faixas, máscara combinada, morfologia e
+    objetos) fica guardado junto com a chave dos parâmetros que o geraram.
+    Assim, mudar `min_contour_area` só refiltra os objetos, mudar
+    `dilation_size` só refaz a morfologia e mexer em uma faixa só recalcula a
+    máscara do seu espaço de cor. O resultado é o mesmo de `engine.process`.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.frame = None
+        self.recomputed = () # Etapas refeitas na última chamada de `process`
+        self.clear()
+
+    def clear(self):
+        """Descarta todos os produtos intermediários."""
+        self._scaled = None   # (escala pedida, (frame reduzido, escala efetiva))
+        self._converted = {}  # espaço -> (escala, imagem)
+        self._blurred = {}    # espaço -> ((escala, blur), imagem)
+        self._masks = {}      # espaço -> (chave, (máscara, rótulos))
+        self._merged = None   # (chave, (máscara, rótulos))
+        self._morphology = None
+        self._result = None
+
+    def freeze(self, frame):
+        """Passa a trabalhar sobre `frame` (uma cópia é guardada)."""
+        self.frame = frame.copy()
+        self.clear()
+
+    def release(self):
+        """Descarta o frame congelado e os intermediários."""
+        self.frame = None
+        self.clear()
+
+    def _cached(self, slot, key, compute, stage, recomputed):
+        if slot is not None and slot[0] == key:
+            return slot, slot[1]
+        value = compute()
+        recomputed.append(stage)
+        return (key, value), value
+
+    def process(self, params, timer=NULL_TIMER):
+        """Retorna o `DetectionResult` do frame congelado para `params`.
+
+        Se nada mudou desde a chamada anterior, o mesmo objeto é retornado.
+        """
+        if self.frame is None:
+            raise RuntimeError("Nenhum frame congelado.")
+        timer.start()
+        recomputed = []
+        engine = self.engine
+
+        self._scaled, (frame, scale) = self._cached(
+            self._scaled, params.process_scale,
+            lambda: engine.scale_frame(self.frame, params.process_scale), "scale", recomputed)
+        blur_size = scale_kernel(params.blur_size, scale)
+        erosion_size = scale_kernel(params.erosion_size, scale)
+        dilation_size = scale_kernel(params.dilation_size, scale)
+        timer.mark("scale")
+
+        groups = group_ranges(params.ranges)
+        parts, part_keys = [], []
+        for space, entries in groups.items():
+            self._converted[space], image = self._cached(
+                self._converted.get(space), scale,
+                lambda: convert_color(frame, space), "conversion", recomputed)
+            timer.mark("conversion")
+            self._blurred[space], image = self._cached(
+                self._blurred.get(space), (scale, blur_size),
+                lambda: blur_frame(image, blur_size), "blur", recomputed)
+            timer.mark("blur")
+            key = (scale, blur_size, entries, len(groups) > 1)
+            self._masks[space], part = self._cached(
+                self._masks.get(space), key,
+                lambda: engine.build_mask(image, entries, with_labels=len(groups) > 1), "mask", recomputed)
+            parts.append(part)
+            part_keys.append((space, key))
+            timer.mark("mask")
+        # Espaços que não estão mais em uso liberam memória
+        for cache in (self._converted, self._blurred, self._masks):
+            for space in set(cache) - set(groups):
+                del cache[space]
+
+        merged_key = (scale, tuple(part_keys))
+        self._merged, (mask, labels) = self._cached(
+            self._merged, merged_key, lambda: merge_masks(parts, frame.shape), "merge", recomputed)
+        morphology_key = (merged_key, erosion_size, dilation_size)
+        self._morphology, mask = self._cached(
+            self._morphology, morphology_key,
+            lambda: apply_morphology(mask, erosion_size, dilation_size), "morphology", recomputed)
+        timer.mark("morphology")
+
+        result_key = (morphology_key, params.min_contour_area, params.analysis, params.color_space)
+
+        def find():
+            result = engine.find(mask, params, scale)
+            result.labels = labels
+            return result
+
+        self._result, result = self._cached(self._result, result_key, find, "contours", recomputed)
+        timer.mark("contours")
+        self.recomputed = tuple(recomputed)
+        return result